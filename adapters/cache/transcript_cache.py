@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from domain.entities import TranscriptResult
+from domain.utils.lang_mapper import LanguageMapper
+
+
+# Versión de la configuración del pipeline; cambiarla invalida las entradas previas.
+PIPELINE_VERSION = "decode16k-denoisegate-upload-v3"
+
+
+class TranscriptCache:
+    """
+    Caché de transcripciones direccionada por contenido.
+
+    La clave combina el hash de los bytes originales del audio con el motor,
+    el tamaño de modelo, el idioma normalizado con LanguageMapper, el
+    proveedor y el tipo MIME (eligen decodificador y política de limpieza)
+    y la configuración del pipeline. Tiene dos niveles:
+    - Memoria: LRU en proceso con número máximo de entradas.
+    - Disco: un archivo JSON por entrada, con TTL y límite de tamaño total.
+
+    Métodos:
+        hash_file(path):
+            Calcula el SHA-256 de un archivo leyendo por bloques.
+        key(digest, engine, model_size, lang, settings, provider, mime_type):
+            Construye la clave de caché.
+        get(key) / put(key, result):
+            Consultan y guardan resultados.
+        stats():
+            Devuelve los contadores de aciertos y fallos.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "./tmp/cache",
+        memory_items: int = 512,
+        disk_max_mb: int = 512,
+        ttl_seconds: int = 7 * 24 * 3600,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.memory_items = memory_items
+        self.disk_max_bytes = disk_max_mb * 1024 * 1024
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._disk_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*.json"))
+
+    @classmethod
+    def from_env(cls) -> "TranscriptCache":
+        """
+        Construye la caché a partir de las variables de entorno:
+        STT_CACHE_DIR, STT_CACHE_MEMORY_ITEMS, STT_CACHE_DISK_MB y STT_CACHE_TTL_S.
+        """
+        return cls(
+            cache_dir=os.getenv("STT_CACHE_DIR", "./tmp/cache"),
+            memory_items=int(os.getenv("STT_CACHE_MEMORY_ITEMS", "512")),
+            disk_max_mb=int(os.getenv("STT_CACHE_DISK_MB", "512")),
+            ttl_seconds=int(os.getenv("STT_CACHE_TTL_S", str(7 * 24 * 3600))),
+        )
+
+    @staticmethod
+    def hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+        """Calcula el SHA-256 de un archivo leyendo por bloques."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(
+        digest: str,
+        engine: str,
+        model_size: str = None,
+        lang: str = "",
+        settings: dict = None,
+        provider: str = "",
+        mime_type: str = "",
+    ) -> str:
+        """
+        Construye la clave de caché.
+
+        Argumentos:
+            digest: SHA-256 de los bytes originales del audio.
+            engine: Motor STT solicitado.
+            model_size: Tamaño del modelo (solo aplica a Whisper).
+            lang: Código de idioma solicitado; se normaliza según el motor.
+            settings: Parámetros adicionales del pipeline que afectan al resultado
+                (p. ej. la política de limpieza de DenoiseGate).
+            provider: Proveedor o fuente del audio.
+            mime_type: Tipo MIME detectado en la entrada.
+        """
+        engine = (engine or "whisper").strip().lower()
+        if engine == "azure":
+            lang = LanguageMapper.for_azure(lang)
+        elif engine == "google":
+            lang = LanguageMapper.for_google(lang)
+        else:
+            lang = LanguageMapper.for_whisper(lang)
+
+        parts = {
+            "digest": digest,
+            "engine": engine,
+            "model_size": (model_size or "").strip().lower(),
+            "lang": lang,
+            "provider": (provider or "").strip().lower(),
+            "mime_type": (mime_type or "").strip().lower(),
+            "pipeline": PIPELINE_VERSION,
+            "settings": settings or {},
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str):
+        """
+        Busca un resultado en memoria y después en disco.
+
+        Retorna:
+            TranscriptResult | None: Resultado almacenado o None si no existe o expiró.
+        """
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return result
+
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                self._remove(path)
+                result = None
+            else:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+                result = TranscriptResult(**data)
+        except (OSError, ValueError, TypeError):
+            result = None
+
+        with self._lock:
+            if result is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: TranscriptResult):
+        """Guarda un resultado exitoso en ambos niveles; los errores (aunque sean parciales) no se almacenan."""
+        if result.raw and (result.raw.get("error") or result.raw.get("segment_errors")):
+            return
+
+        data = asdict(result)
+        data["timestamp"] = result.timestamp.isoformat()
+        payload = json.dumps(data, default=str, ensure_ascii=False).encode("utf-8")
+
+        # Archivo temporal único por escritor: dos put() de la misma clave no se pisan.
+        path = self._path(key)
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".tmp", delete=False) as tmp:
+            tmp.write(payload)
+        previous = path.stat().st_size if path.exists() else 0
+        os.replace(tmp.name, path)
+
+        with self._lock:
+            self._remember(key, result)
+            self._disk_bytes += len(payload) - previous
+            self._counters["stores"] += 1
+
+        if self._disk_bytes > self.disk_max_bytes:
+            self._evict_disk()
+
+    def _remember(self, key: str, result: TranscriptResult):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _remove(self, path: Path):
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes -= size
+            self._counters["evictions"] += 1
+
+    @staticmethod
+    def _mtime(path: Path) -> float:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return 0.0
+
+    def _evict_disk(self):
+        """Elimina entradas expiradas y, si aún se excede el límite, las más antiguas."""
+        entries = sorted(self.cache_dir.glob("*.json"), key=self._mtime)
+        now = time.time()
+        for path in entries:
+            expired = now - self._mtime(path) > self.ttl_seconds
+            if not expired and self._disk_bytes <= self.disk_max_bytes:
+                break
+            self._remove(path)
+
+    def stats(self) -> dict:
+        """Devuelve los contadores y la ocupación actual de la caché."""
+        with self._lock:
+            lookups = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = lookups - self._counters["misses"]
+            return dict(
+                self._counters,
+                hit_ratio=round(hits / lookups, 3) if lookups else 0.0,
+                memory_items=len(self._memory),
+                disk_mb=round(self._disk_bytes / (1024 * 1024), 2),
+            )
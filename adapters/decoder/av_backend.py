@@ -0,0 +1,95 @@
+from math import gcd
+from pathlib import Path
+import numpy as np
+
+# PyAV se importa en el primer uso (load_av); es opcional: sin él los decoders usan pydub/ffmpeg.
+av = None
+_av_checked = False
+
+
+TARGET_SAMPLE_RATE = 16000
+
+_INT_SCALES = {"s16": 32768.0, "s16p": 32768.0, "s32": 2147483648.0, "s32p": 2147483648.0}
+
+
+def load_av():
+    """Importa PyAV la primera vez que se necesita; retorna el módulo o None si no está instalado."""
+    global av, _av_checked
+    if not _av_checked:
+        try:
+            import av as module
+        except ImportError:
+            module = None
+        av, _av_checked = module, True
+    return av
+
+
+def is_available() -> bool:
+    """Indica si PyAV está instalado y puede decodificar en proceso."""
+    return load_av() is not None
+
+
+def _frame_to_mono(frame) -> np.ndarray:
+    """Convierte un frame de PyAV a un arreglo float32 mono."""
+    data = frame.to_ndarray()
+    channels = len(frame.layout.channels)
+
+    if not frame.format.is_planar:
+        # Formato entrelazado: (1, muestras * canales) -> (canales, muestras).
+        data = data.reshape(-1, channels).T
+
+    scale = _INT_SCALES.get(frame.format.name)
+    data = data.astype(np.float32, copy=False)
+    if scale:
+        data = data / scale
+
+    return data[0] if channels == 1 else data.mean(axis=0)
+
+
+def resample_to_16k(y: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Remuestrea a 16 kHz con un filtro polifásico de razón entera.
+
+    Para Opus (48 kHz) la razón es exactamente 1/3; para otras frecuencias
+    se usa la razón reducida up/down (por ejemplo 160/441 para 44.1 kHz).
+    """
+    if sample_rate == TARGET_SAMPLE_RATE:
+        return y.astype(np.float32, copy=False)
+
+    from scipy.signal import resample_poly
+
+    factor = gcd(sample_rate, TARGET_SAMPLE_RATE)
+    up, down = TARGET_SAMPLE_RATE // factor, sample_rate // factor
+    return resample_poly(y, up, down).astype(np.float32, copy=False)
+
+
+def decode_mono16k(src: Path) -> np.ndarray:
+    """
+    Decodifica Ogg/Opus, M4A/AAC u otro formato soportado por FFmpeg dentro
+    del proceso (sin subprocesos ni archivos intermedios) a PCM float32
+    mono 16 kHz.
+
+    Argumentos:
+        src: Ruta del archivo de audio.
+
+    Retorna:
+        np.ndarray: Muestras float32 mono a 16 kHz en [-1, 1].
+
+    Lanza:
+        RuntimeError: Si PyAV no está instalado.
+        ValueError: Si el archivo no contiene pistas de audio.
+    """
+    if load_av() is None:
+        raise RuntimeError("PyAV no está instalado.")
+
+    with av.open(str(src)) as container:
+        if not container.streams.audio:
+            raise ValueError(f"El archivo {src.name} no contiene audio.")
+
+        stream = container.streams.audio[0]
+        sample_rate = stream.codec_context.sample_rate
+        blocks = [_frame_to_mono(frame) for frame in container.decode(stream)]
+
+    y = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+    # El decodificador Opus y el filtro polifásico pueden rebasar ligeramente el pico.
+    return np.clip(resample_to_16k(y, sample_rate), -1.0, 1.0)
@@ -2,6 +2,7 @@ from pathlib import Path
 from adapters.decoder.ogg_opus import OggOpusDecoder
 from adapters.decoder.m4a_aac import M4ADecoder
 from adapters.decoder.wav_decoder import WavDecoder
+from adapters.decoder.probe import HEADER_BYTES, sniff_format
 
 
 class DecoderFactory:
@@ -9,9 +10,10 @@ class DecoderFactory:
     Fábrica de decodificadores de audio.
 
     Selecciona el decodificador más adecuado basándose en:
-    1. La extensión del archivo (.ogg, .m4a, .wav).
+    1. El contenido real del archivo (bytes mágicos RIFF/WAVE, OggS, ftyp, fLaC...).
     2. El tipo MIME reportado por FastAPI (audio/ogg, audio/m4a, etc.).
-    3. El proveedor declarado, como último recurso.
+    3. La extensión del archivo (.ogg, .m4a, .wav).
+    4. El proveedor declarado, como último recurso.
 
     Este diseño garantiza que el sistema sea totalmente agnóstico
     al origen del audio, priorizando siempre el formato real del archivo.
@@ -34,6 +36,22 @@ class DecoderFactory:
         suffix = file_path.suffix.lower() if file_path else ""
         mime_type = (mime_type or "").lower()
 
+        # --- Detección por contenido ---
+        container = ""
+        if file_path and file_path.exists():
+            with open(file_path, "rb") as f:
+                container = sniff_format(f.read(HEADER_BYTES))
+
+        if container in ["wav", "flac"]:
+            print(f"[DecoderFactory] Detección por contenido: {container.upper()}.")
+            return WavDecoder()
+        elif container == "m4a":
+            print("[DecoderFactory] Detección por contenido: M4A/AAC.")
+            return M4ADecoder()
+        elif container in ["ogg", "mp3", "webm"]:
+            print(f"[DecoderFactory] Detección por contenido: {container.upper()}.")
+            return OggOpusDecoder()
+
         # --- Detección por MIME type ---
         if mime_type in ["audio/ogg", "audio/opus", "application/ogg"]:
             print("[DecoderFactory] Detección MIME: OGG/Opus.")
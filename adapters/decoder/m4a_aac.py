@@ -1,5 +1,9 @@
 from pathlib import Path
+import numpy as np
+import soundfile as sf
 from pydub import AudioSegment
+from adapters.decoder import av_backend
+from domain.entities import AudioBuffer
 from domain.ports import AudioDecoderPort
 
 
@@ -8,15 +12,53 @@ class M4ADecoder(AudioDecoderPort):
     Decoder de archivos de audio en formato M4A/AAC.
 
     Convierte archivos utilizados por plataformas como Microsoft Teams
-    o Messenger al formato WAV mono 16 kHz, garantizando compatibilidad
+    o Messenger a PCM mono 16 kHz, garantizando compatibilidad
     con los motores de transcripción de Tracky STT.
 
+    Si PyAV está instalado decodifica AAC dentro del proceso y remuestrea
+    con un filtro polifásico de razón entera; si no, usa pydub/ffmpeg.
+
     Métodos:
+        decode(src):
+            Decodifica el archivo M4A/AAC a un AudioBuffer mono 16 kHz en memoria.
         to_wav_mono16k(src):
             Convierte el archivo M4A/AAC a formato WAV mono 16 kHz
             y devuelve la ruta del archivo resultante.
     """
 
+    def decode(self, src: Path) -> AudioBuffer:
+        """
+        Decodifica un archivo M4A/AAC a PCM float32 mono 16 kHz.
+
+        Argumentos:
+            src: Ruta del archivo de audio fuente (.m4a o .aac).
+
+        Retorna:
+            AudioBuffer: Audio decodificado en memoria.
+        """
+        print(f"[M4ADecoder] Decodificando archivo: {src.name}")
+        if av_backend.is_available():
+            samples = av_backend.decode_mono16k(src)
+        else:
+            samples = self.decode_pydub(src)
+        return AudioBuffer(samples=samples, sample_rate=16000, source_format="m4a", source_path=src)
+
+    @staticmethod
+    def decode_pydub(src: Path) -> np.ndarray:
+        """Decodifica con pydub (un subproceso ffmpeg por archivo); se usa como respaldo."""
+        audio = AudioSegment.from_file(src, format="m4a")
+
+        if audio.channels > 1:
+            audio = audio.set_channels(1)
+            print("[M4ADecoder] Convertido a mono.")
+
+        if audio.frame_rate != 16000:
+            audio = audio.set_frame_rate(16000)
+            print("[M4ADecoder] Frecuencia ajustada a 16 kHz.")
+
+        scale = float(1 << (8 * audio.sample_width - 1))
+        return np.array(audio.get_array_of_samples(), dtype=np.float32) / scale
+
     def to_wav_mono16k(self, src: Path) -> Path:
         """
         Convierte un archivo M4A/AAC al formato WAV mono 16 kHz.
@@ -28,19 +70,10 @@ class M4ADecoder(AudioDecoderPort):
             Path: Ruta del archivo convertido (.wav).
         """
         try:
-            print(f"[M4ADecoder] Decodificando archivo: {src.name}")
-            audio = AudioSegment.from_file(src, format="m4a")
-
-            if audio.channels > 1:
-                audio = audio.set_channels(1)
-                print("[M4ADecoder] Convertido a mono.")
-
-            if audio.frame_rate != 16000:
-                audio = audio.set_frame_rate(16000)
-                print("[M4ADecoder] Frecuencia ajustada a 16 kHz.")
+            buffer = self.decode(src)
 
             out_path = src.with_suffix(".wav")
-            audio.export(out_path, format="wav")
+            sf.write(out_path, buffer.samples, buffer.sample_rate)
 
             print(f"[M4ADecoder] Archivo convertido exitosamente: {out_path.name}")
             return out_path
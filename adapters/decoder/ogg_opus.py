@@ -1,5 +1,9 @@
 from pathlib import Path
+import numpy as np
+import soundfile as sf
 from pydub import AudioSegment
+from adapters.decoder import av_backend
+from domain.entities import AudioBuffer
 from domain.ports import AudioDecoderPort
 
 
@@ -7,15 +11,47 @@ class OggOpusDecoder(AudioDecoderPort):
     """
     Decoder de archivos de audio en formato OGG/Opus.
 
-    Convierte cualquier archivo .ogg o .opus a formato WAV
+    Convierte cualquier archivo .ogg o .opus a PCM float32
     con frecuencia de muestreo de 16 kHz y canal mono,
     garantizando compatibilidad con los motores STT.
 
+    Si PyAV está instalado decodifica dentro del proceso y remuestrea
+    48 kHz -> 16 kHz con un filtro polifásico 1/3; si no, usa pydub/ffmpeg.
+
     Métodos:
+        decode(src):
+            Decodifica el archivo a un AudioBuffer mono 16 kHz en memoria.
         to_wav_mono16k(src):
             Convierte el archivo a formato WAV mono 16 kHz y devuelve la ruta resultante.
     """
 
+    def decode(self, src: Path) -> AudioBuffer:
+        """
+        Decodifica un archivo OGG/Opus a PCM float32 mono 16 kHz.
+
+        Argumentos:
+            src: Ruta del archivo de audio fuente (.ogg o .opus).
+
+        Retorna:
+            AudioBuffer: Audio decodificado en memoria.
+        """
+        if av_backend.is_available():
+            samples = av_backend.decode_mono16k(src)
+        else:
+            samples = self.decode_pydub(src)
+
+        print(f"[OggOpusDecoder] Archivo decodificado en memoria: {src.name}")
+        return AudioBuffer(samples=samples, sample_rate=16000, source_format="ogg", source_path=src)
+
+    @staticmethod
+    def decode_pydub(src: Path) -> np.ndarray:
+        """Decodifica con pydub (un subproceso ffmpeg por archivo); se usa como respaldo."""
+        audio = AudioSegment.from_file(src)
+        audio = audio.set_frame_rate(16000).set_channels(1)
+
+        scale = float(1 << (8 * audio.sample_width - 1))
+        return np.array(audio.get_array_of_samples(), dtype=np.float32) / scale
+
     def to_wav_mono16k(self, src: Path) -> Path:
         """
         Convierte un archivo OGG/Opus al formato WAV mono 16 kHz.
@@ -27,11 +63,10 @@ class OggOpusDecoder(AudioDecoderPort):
             Path: Ruta del archivo convertido (.wav).
         """
         try:
-            audio = AudioSegment.from_file(src)
-            audio = audio.set_frame_rate(16000).set_channels(1)
+            buffer = self.decode(src)
 
             out = src.with_suffix(".wav")
-            audio.export(out, format="wav")
+            sf.write(out, buffer.samples, buffer.sample_rate)
 
             print(f"[OggOpusDecoder] Archivo convertido correctamente: {out.name}")
             return out
@@ -0,0 +1,268 @@
+import struct
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional
+
+
+HEADER_BYTES = 4096
+TAIL_BYTES = 65536
+MAX_MOOV_BYTES = 16 * 1024 * 1024
+
+MP4_CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+MIME_TYPES = {
+    "wav": "audio/wav",
+    "ogg": "audio/ogg",
+    "m4a": "audio/mp4",
+    "flac": "audio/flac",
+    "mp3": "audio/mpeg",
+    "webm": "audio/webm",
+}
+
+
+@dataclass
+class AudioProbe:
+    """
+    Resultado del sondeo de cabeceras de un archivo de audio.
+
+    Atributos:
+        container: Contenedor detectado por los bytes mágicos (wav, ogg, m4a, flac, mp3, webm).
+        codec: Códec detectado (pcm, opus, vorbis, aac, flac, mp3...).
+        sample_rate: Frecuencia de muestreo en Hz, si se pudo leer.
+        channels: Número de canales, si se pudo leer.
+        duration: Duración en segundos, si se pudo calcular sin decodificar.
+        bits_per_sample: Bits por muestra (solo PCM/FLAC).
+        data_offset: Desplazamiento del bloque de datos PCM (solo WAV).
+        data_size: Bytes del bloque de datos presentes en el archivo (solo WAV).
+    """
+    container: str = ""
+    codec: str = ""
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    duration: Optional[float] = None
+    bits_per_sample: Optional[int] = None
+    data_offset: Optional[int] = None
+    data_size: Optional[int] = None
+
+    @property
+    def mime_type(self) -> str:
+        """Tipo MIME correspondiente al contenedor detectado."""
+        return MIME_TYPES.get(self.container, "")
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def sniff_format(header: bytes) -> str:
+    """
+    Identifica el contenedor a partir de los primeros bytes del archivo.
+
+    Retorna:
+        str: 'wav', 'ogg', 'm4a', 'flac', 'mp3', 'webm' o '' si es desconocido.
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    return ""
+
+
+def _probe_wav(f, header: bytes, file_size: int) -> AudioProbe:
+    info = AudioProbe(container="wav", codec="pcm")
+    byte_rate = 0
+    offset = 12
+    while offset + 8 <= len(header):
+        chunk_id = header[offset:offset + 4]
+        chunk_size = struct.unpack("<I", header[offset + 4:offset + 8])[0]
+        body = offset + 8
+
+        if chunk_id == b"fmt " and body + 16 <= len(header):
+            fmt_tag, channels, sample_rate, byte_rate, _, bits = struct.unpack(
+                "<HHIIHH", header[body:body + 16]
+            )
+            if fmt_tag == 0xFFFE and body + 26 <= len(header):
+                fmt_tag = struct.unpack("<H", header[body + 24:body + 26])[0]
+            info.codec = {1: "pcm", 3: "pcm_float"}.get(fmt_tag, f"wav_0x{fmt_tag:04x}")
+            info.channels, info.sample_rate, info.bits_per_sample = channels, sample_rate, bits
+
+        elif chunk_id == b"data":
+            info.data_offset = body
+            available = file_size - body
+            data_size = available if chunk_size in (0, 0xFFFFFFFF) else min(chunk_size, available)
+            info.data_size = max(0, data_size)
+            if byte_rate:
+                info.duration = data_size / byte_rate
+            break
+
+        offset = body + chunk_size + (chunk_size & 1)
+
+    return info
+
+
+def is_ogg_page(data: bytes, pos: int, serial: bytes = None) -> bool:
+    """
+    Indica si en `pos` empieza una cabecera de página Ogg válida y no solo
+    los bytes 'OggS' dentro del audio: versión 0, solo las banderas
+    continuación/BOS/EOS y, si se indica, el mismo número de serie del flujo.
+    """
+    if pos < 0 or pos + 27 > len(data) or data[pos:pos + 4] != b"OggS":
+        return False
+    if data[pos + 4] != 0 or data[pos + 5] & ~0x07:
+        return False
+    return serial is None or data[pos + 14:pos + 18] == serial
+
+
+def _probe_ogg(f, header: bytes, file_size: int) -> AudioProbe:
+    info = AudioProbe(container="ogg")
+    pre_skip = 0
+
+    opus = header.find(b"OpusHead")
+    vorbis = header.find(b"\x01vorbis")
+    flac = header.find(b"\x7fFLAC")
+    if opus >= 0 and opus + 16 <= len(header):
+        info.codec, info.sample_rate = "opus", 48000
+        info.channels = header[opus + 9]
+        pre_skip = struct.unpack("<H", header[opus + 10:opus + 12])[0]
+    elif vorbis >= 0 and vorbis + 16 <= len(header):
+        info.codec = "vorbis"
+        info.channels = header[vorbis + 11]
+        info.sample_rate = struct.unpack("<I", header[vorbis + 12:vorbis + 16])[0]
+    elif flac >= 0:
+        info.codec = "flac"
+
+    if info.sample_rate:
+        serial = header[14:18] if is_ogg_page(header, 0) else None
+        f.seek(max(0, file_size - TAIL_BYTES))
+        tail = f.read(TAIL_BYTES)
+        pos = tail.rfind(b"OggS")
+        while pos >= 0:
+            if is_ogg_page(tail, pos, serial):
+                granule = struct.unpack("<q", tail[pos + 6:pos + 14])[0]
+                if granule > 0:
+                    info.duration = max(0, granule - pre_skip) / info.sample_rate
+                    break
+            pos = tail.rfind(b"OggS", 0, pos)
+
+    return info
+
+
+def _iter_boxes(data: bytes, start: int = 0, end: int = None):
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[pos:pos + 8])
+        header = 8
+        if size == 1 and pos + 16 <= end:
+            size = struct.unpack(">Q", data[pos + 8:pos + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield box_type, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _parse_moov(moov: bytes, info: AudioProbe):
+    for box_type, start, end in _iter_boxes(moov):
+        if box_type in MP4_CONTAINER_BOXES:
+            _parse_moov(moov[start:end], info)
+
+        elif box_type in (b"mvhd", b"mdhd") and info.duration is None:
+            version = moov[start]
+            if version == 1:
+                timescale, duration = struct.unpack(">IQ", moov[start + 20:start + 32])
+            else:
+                timescale, duration = struct.unpack(">II", moov[start + 12:start + 20])
+            if timescale:
+                info.duration = duration / timescale
+
+        elif box_type == b"stsd" and not info.codec:
+            for entry_type, entry_start, _ in _iter_boxes(moov, start + 8, end):
+                if entry_type in (b"mp4a", b"alac", b"Opus", b"fLaC"):
+                    info.codec = {b"mp4a": "aac", b"alac": "alac", b"Opus": "opus", b"fLaC": "flac"}[entry_type]
+                    info.channels = struct.unpack(">H", moov[entry_start + 16:entry_start + 18])[0]
+                    info.sample_rate = struct.unpack(">I", moov[entry_start + 24:entry_start + 28])[0] >> 16
+                    break
+
+
+def _probe_mp4(f, header: bytes, file_size: int) -> AudioProbe:
+    info = AudioProbe(container="m4a")
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        box_header = f.read(16)
+        size, box_type = struct.unpack(">I4s", box_header[:8])
+        header_size = 8
+        if size == 1:
+            size, header_size = struct.unpack(">Q", box_header[8:16])[0], 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header_size:
+            break
+
+        if box_type == b"moov":
+            if size <= MAX_MOOV_BYTES:
+                f.seek(pos + header_size)
+                _parse_moov(f.read(size - header_size), info)
+            break
+        pos += size
+
+    return info
+
+
+def _probe_flac(f, header: bytes, file_size: int) -> AudioProbe:
+    info = AudioProbe(container="flac", codec="flac")
+    if len(header) >= 26:
+        streaminfo = header[8:26]
+        packed = int.from_bytes(streaminfo[10:18], "big")
+        info.sample_rate = packed >> 44
+        info.channels = ((packed >> 41) & 0x7) + 1
+        info.bits_per_sample = ((packed >> 36) & 0x1F) + 1
+        total_samples = packed & 0xFFFFFFFFF
+        if info.sample_rate and total_samples:
+            info.duration = total_samples / info.sample_rate
+    return info
+
+
+PROBERS = {
+    "wav": _probe_wav,
+    "ogg": _probe_ogg,
+    "m4a": _probe_mp4,
+    "flac": _probe_flac,
+}
+
+
+def probe(path: Path) -> AudioProbe:
+    """
+    Sondea un archivo de audio leyendo solo cabeceras (sin decodificar).
+
+    Identifica el contenedor por los bytes mágicos y, para WAV, Ogg,
+    M4A y FLAC, devuelve códec, frecuencia, canales y duración.
+
+    Argumentos:
+        path: Ruta del archivo de audio.
+
+    Retorna:
+        AudioProbe: Información del audio; los campos desconocidos quedan en None.
+    """
+    path = Path(path)
+    file_size = path.stat().st_size
+    with open(path, "rb") as f:
+        header = f.read(HEADER_BYTES)
+        container = sniff_format(header)
+        prober = PROBERS.get(container)
+        if prober is None:
+            return AudioProbe(container=container, codec="mp3" if container == "mp3" else "")
+        try:
+            return prober(f, header, file_size)
+        except (struct.error, IndexError, OSError):
+            return AudioProbe(container=container)
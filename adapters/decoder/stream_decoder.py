@@ -0,0 +1,87 @@
+import numpy as np
+import soxr
+from adapters.decoder import av_backend
+from adapters.decoder.av_backend import TARGET_SAMPLE_RATE
+
+
+PCM_FORMATS = {"pcm16": ("<i2", 32768.0), "s16le": ("<i2", 32768.0), "f32": ("<f4", 1.0), "f32le": ("<f4", 1.0)}
+OPUS_SAMPLE_RATE = 48000
+
+
+class StreamFrameDecoder:
+    """
+    Decodificador incremental para audio que llega en tramas (WebSocket).
+
+    Acepta PCM crudo (pcm16/s16le o f32/f32le, mono, a cualquier frecuencia)
+    o paquetes Opus crudos (uno por mensaje), y entrega bloques float32
+    mono 16 kHz a medida que llegan. El remuestreo es en streaming, así que
+    las fronteras entre tramas no introducen discontinuidades.
+
+    Métodos:
+        feed(data):
+            Decodifica una trama y devuelve las muestras nuevas.
+        flush():
+            Devuelve las muestras retenidas por el remuestreador al cerrar.
+    """
+
+    def __init__(self, fmt: str = "pcm16", sample_rate: int = TARGET_SAMPLE_RATE):
+        self.fmt = (fmt or "pcm16").lower()
+        self.sample_rate = sample_rate
+        self._carry = b""
+
+        if self.fmt == "opus":
+            av = av_backend.load_av()
+            if av is None:
+                raise ValueError("El formato opus requiere PyAV instalado.")
+            self._codec = av.CodecContext.create("opus", "r")
+            self._codec.sample_rate = OPUS_SAMPLE_RATE
+            self._av_resampler = av.AudioResampler(format="flt", layout="mono", rate=TARGET_SAMPLE_RATE)
+        elif self.fmt in PCM_FORMATS:
+            self._dtype, self._scale = PCM_FORMATS[self.fmt]
+            self._resampler = (
+                soxr.ResampleStream(sample_rate, TARGET_SAMPLE_RATE, 1, dtype="float32")
+                if sample_rate != TARGET_SAMPLE_RATE else None
+            )
+        else:
+            raise ValueError(f"Formato de trama no soportado: {fmt}")
+
+    def _decode_opus(self, packet) -> np.ndarray:
+        blocks = []
+        for frame in self._codec.decode(packet):
+            for resampled in self._av_resampler.resample(frame):
+                blocks.append(resampled.to_ndarray()[0])
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+    def feed(self, data: bytes) -> np.ndarray:
+        """
+        Decodifica una trama.
+
+        Argumentos:
+            data: Bytes PCM (pueden cortar una muestra a la mitad) o un paquete Opus.
+
+        Retorna:
+            np.ndarray: Muestras float32 mono 16 kHz (puede estar vacío).
+        """
+        if self.fmt == "opus":
+            return self._decode_opus(av_backend.av.Packet(data))
+
+        data = self._carry + data
+        width = np.dtype(self._dtype).itemsize
+        usable = len(data) - len(data) % width
+        self._carry = data[usable:]
+
+        y = np.frombuffer(data[:usable], dtype=self._dtype).astype(np.float32)
+        if self._scale != 1.0:
+            y *= np.float32(1.0 / self._scale)
+        if self._resampler is not None:
+            y = self._resampler.resample_chunk(y)
+        return y
+
+    def flush(self) -> np.ndarray:
+        """Vacía el remuestreador al terminar la sesión."""
+        if self.fmt == "opus":
+            blocks = [frame.to_ndarray()[0] for frame in self._av_resampler.resample(None)]
+            return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+        if self._resampler is not None:
+            return self._resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        return np.zeros(0, dtype=np.float32)
@@ -1,27 +1,168 @@
+import os
 from pathlib import Path
 import soundfile as sf
 import numpy as np
-from librosa import resample
+import soxr
+from adapters.decoder.probe import AudioProbe, probe
+from domain.entities import AudioBuffer
 from domain.ports import AudioDecoderPort
 
 
+TARGET_SAMPLE_RATE = 16000
+BLOCK_FRAMES = 65536
+
+# Formatos que pueden entregarse directamente desde el archivo mapeado en memoria.
+FAST_PATH_DTYPES = {("pcm", 16): "<i2", ("pcm_float", 32): "<f4"}
+
+
 class WavDecoder(AudioDecoderPort):
     """
     Decoder para archivos de audio en formato WAV.
 
-    Asegura que cualquier archivo WAV sea convertido a
-    formato estándar mono 16 kHz y normalizado, garantizando
-    compatibilidad total con los motores de transcripción.
+    Asegura que cualquier archivo WAV sea convertido a formato estándar
+    mono 16 kHz, garantizando compatibilidad total con los motores de
+    transcripción.
+
+    El decodificador no normaliza: entrega las muestras a su nivel original
+    en escala completa y deja en metadata el pico original ('source_peak',
+    1.0 = 0 dBFS) y la ganancia que lo llevaría a escala completa ('gain').
+    La normalización la aplican después quienes de todos modos copian el
+    audio (limpieza, codificación de subida, Whisper), así que el mismo
+    audio llega con el mismo nivel sea cual sea su subtipo.
+
+    Los WAV que ya son mono 16 kHz se mapean en memoria: float32 se entrega
+    como vista del archivo, sin copia ni reescritura; PCM16 se convierte a
+    float32 en una sola pasada, la única copia inevitable. El resto se
+    procesa por bloques para que la memoria de trabajo no dependa de la
+    duración de la grabación.
 
     Métodos:
+        decode(src):
+            Lee y convierte un archivo WAV a un AudioBuffer en memoria.
         to_wav_mono16k(src):
             Convierte y normaliza un archivo WAV al formato estándar.
     """
 
+    @staticmethod
+    def _fast_path_dtype(info: AudioProbe):
+        """Devuelve el dtype para mapear el archivo si ya está en el formato destino."""
+        if (
+            info.container != "wav"
+            or info.sample_rate != TARGET_SAMPLE_RATE
+            or info.channels != 1
+            or info.data_offset is None
+            or info.data_size is None
+        ):
+            return None
+        return FAST_PATH_DTYPES.get((info.codec, info.bits_per_sample))
+
+    @staticmethod
+    def _map(src: Path, info: AudioProbe, dtype: str):
+        """
+        Mapea el bloque de datos PCM del archivo como arreglo float32 mono.
+
+        El número de muestras sale del tamaño del bloque de datos (acotado al
+        tamaño real del archivo), en múltiplos enteros de la muestra, para
+        que el mapa nunca pase del final de un archivo truncado.
+
+        float32 se entrega como vista del mapa (copy-on-write, sin copia);
+        PCM16 se convierte a float32 en escala completa en una sola pasada.
+
+        Retorna el arreglo y el pico original en escala completa (1.0 = 0 dBFS).
+        """
+        itemsize = np.dtype(dtype).itemsize
+        available = max(0, os.path.getsize(src) - info.data_offset)
+        frames = min(info.data_size, available) // itemsize
+        if frames == 0:
+            return np.zeros(0, dtype=np.float32), 0.0
+
+        pcm = np.memmap(src, dtype=dtype, mode="c", offset=info.data_offset, shape=(frames,))
+        peak = float(max(abs(float(pcm.max())), abs(float(pcm.min()))))
+
+        if pcm.dtype == np.float32:
+            return pcm, peak
+        y = np.multiply(pcm, np.float32(1.0 / 32768.0), dtype=np.float32)
+        return y, peak / 32768.0
+
+    @staticmethod
+    def _read_blocks(src: Path):
+        """
+        Lee el archivo por bloques: mezcla a mono y remuestrea a 16 kHz con un
+        remuestreador en streaming, escribiendo sobre un arreglo preasignado.
+
+        Retorna el arreglo a su nivel original y el pico en escala completa.
+        """
+        info = sf.info(str(src))
+        sr = info.samplerate
+        expected = int(np.ceil(info.frames * TARGET_SAMPLE_RATE / sr)) + 1
+        out = np.empty(expected, dtype=np.float32)
+        resampler = soxr.ResampleStream(sr, TARGET_SAMPLE_RATE, 1, dtype="float32") if sr != TARGET_SAMPLE_RATE else None
+
+        filled, peak = 0, 0.0
+        blocks = sf.blocks(str(src), blocksize=BLOCK_FRAMES, dtype="float32", always_2d=True)
+        for block in blocks:
+            mono = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1, dtype=np.float32)
+            if resampler is not None:
+                mono = resampler.resample_chunk(mono)
+            filled, peak = WavDecoder._append(out, filled, mono, peak)
+
+        if resampler is not None:
+            filled, peak = WavDecoder._append(out, filled, resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True), peak)
+
+        return out[:filled], peak
+
+    @staticmethod
+    def _append(out: np.ndarray, filled: int, chunk: np.ndarray, peak: float):
+        """Copia un bloque remuestreado al arreglo de salida y actualiza el pico."""
+        n = min(len(chunk), len(out) - filled)
+        out[filled:filled + n] = chunk[:n]
+        if n:
+            peak = max(peak, float(np.max(np.abs(chunk[:n]))))
+        return filled + n, peak
+
+    def decode(self, src: Path) -> AudioBuffer:
+        """
+        Lee un archivo WAV y lo entrega como PCM float32 mono 16 kHz a su nivel original.
+
+        El pico original queda en metadata['source_peak'] (la saturación se
+        mide sobre él) y la ganancia de normalización al pico en
+        metadata['gain'], para aplicarla más adelante.
+
+        Argumentos:
+            src: Ruta del archivo WAV de entrada.
+
+        Retorna:
+            AudioBuffer: Audio decodificado en memoria.
+        """
+        info = probe(src)
+        dtype = self._fast_path_dtype(info)
+
+        if dtype is not None:
+            print(f"[WavDecoder] Archivo recibido: {src.name} | Ya es mono 16 kHz ({info.codec}/{info.bits_per_sample}), se mapea en memoria.")
+            y, source_peak = self._map(src, info, dtype)
+        else:
+            print(f"[WavDecoder] Archivo recibido: {src.name} | Frecuencia original: {info.sample_rate} Hz")
+            y, source_peak = self._read_blocks(src)
+            print("[WavDecoder] Convertido a mono 16 kHz por bloques.")
+
+        return AudioBuffer(
+            samples=y,
+            sample_rate=TARGET_SAMPLE_RATE,
+            source_format="wav",
+            source_path=src,
+            metadata={
+                "zero_copy": isinstance(y, np.memmap),
+                "source_peak": source_peak,
+                "gain": 1.0 / source_peak if source_peak > 0 else 1.0,
+            },
+        )
+
     def to_wav_mono16k(self, src: Path) -> Path:
         """
         Convierte y normaliza un archivo WAV al formato estándar mono 16 kHz.
 
+        Un float32 mono 16 kHz ya normalizado (ganancia 1) no se reescribe.
+
         Argumentos:
             src: Ruta del archivo WAV de entrada.
 
@@ -29,23 +170,14 @@ class WavDecoder(AudioDecoderPort):
             Path: Ruta del archivo convertido (.wav).
         """
         try:
-            y, sr = sf.read(src)
-            print(f"[WavDecoder] Archivo recibido: {src.name} | Frecuencia original: {sr} Hz")
-
-            if y.ndim > 1:
-                y = np.mean(y, axis=1)
-                print("[WavDecoder] Convertido a mono.")
-
-            if sr != 16000:
-                y = resample(y, orig_sr=sr, target_sr=16000)
-                sr = 16000
-                print(f"[WavDecoder] Frecuencia ajustada a 16 kHz.")
-
-            if np.max(np.abs(y)) > 0:
-                y = y / np.max(np.abs(y))
+            buffer = self.decode(src)
+            gain = buffer.metadata["gain"]
+            if buffer.metadata.get("zero_copy") and gain == 1.0:
+                print(f"[WavDecoder] {src.name} ya está en formato estándar, no se reescribe.")
+                return src
 
             out_path = src.with_suffix(".wav")
-            sf.write(out_path, y, sr)
+            sf.write(out_path, buffer.samples * np.float32(gain), buffer.sample_rate)
 
             print(f"[WavDecoder] Archivo decodificado correctamente: {out_path.name}")
             return out_path
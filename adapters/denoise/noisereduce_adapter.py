@@ -1,9 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import os
 import numpy as np
 import librosa
 import soundfile as sf
-import noisereduce as nr
-from scipy.signal import butter, lfilter
+from domain.entities import AudioBuffer
 from domain.ports import NoiseReducerPort
 
 
@@ -15,40 +16,231 @@ class NoiseReduceAdapter(NoiseReducerPort):
     `noisereduce`, estandarizando el audio a 16 kHz y canal mono para
     optimizar el desempeño de los motores STT.
 
+    Las grabaciones más largas que STT_DENOISE_STREAM_MIN_S se procesan en
+    modo streaming: el filtro pasa-banda conserva su estado entre bloques,
+    la reducción de ruido corre sobre bloques solapados repartidos entre
+    varios hilos y se recombina con overlap-add sobre el mismo arreglo, de
+    modo que la memoria de trabajo no crece con la duración.
+
     Métodos:
+        reduce_buffer(buffer):
+            Procesa el audio en memoria aplicando filtros y reducción de ruido.
+        light_buffer(buffer):
+            Limpieza ligera: solo pasa-banda, recorte de silencios y normalización.
         reduce(wav_path):
             Procesa el archivo WAV aplicando filtros y reducción de ruido.
     """
 
-    def __init__(self):
+    TRIM_TOP_DB = 25
+    FRAME_LENGTH = 2048
+    HOP_LENGTH = 512
+
+    def __init__(
+        self,
+        stream_min_seconds: float = None,
+        block_seconds: float = None,
+        overlap_seconds: float = None,
+        workers: int = None,
+    ):
         self.sample_rate = 16000
+        self.stream_min_seconds = stream_min_seconds or float(os.getenv("STT_DENOISE_STREAM_MIN_S", "120"))
+        self.block_seconds = block_seconds or float(os.getenv("STT_DENOISE_BLOCK_S", "30"))
+        self.overlap_seconds = overlap_seconds or float(os.getenv("STT_DENOISE_OVERLAP_S", "2"))
+        self.workers = workers or int(os.getenv("STT_DENOISE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+    @staticmethod
+    def _bandpass_coefficients(sr: int):
+        from scipy.signal import butter
 
-    def _bandpass_filter(self, y: np.ndarray, sr: int) -> np.ndarray:
-        """Aplica un filtro pasa-banda entre 300 Hz y 3400 Hz."""
         nyq = 0.5 * sr
         low, high = 300 / nyq, 3400 / nyq
-        b, a = butter(1, [low, high], btype="band")
+        return butter(1, [low, high], btype="band")
+
+    def _bandpass_filter(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """Aplica un filtro pasa-banda entre 300 Hz y 3400 Hz."""
+        from scipy.signal import lfilter
+
+        b, a = self._bandpass_coefficients(sr)
         return lfilter(b, a, y)
 
+    def _bandpass_filter_blocks(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """
+        Aplica el mismo filtro pasa-banda bloque a bloque sobre un arreglo
+        float32 nuevo, arrastrando el estado del filtro IIR entre bloques.
+        """
+        from scipy.signal import lfilter, lfilter_zi
+
+        b, a = self._bandpass_coefficients(sr)
+        zi = lfilter_zi(b, a) * 0.0
+        out = np.empty(len(y), dtype=np.float32)
+        step = int(self.block_seconds * sr)
+        for start in range(0, len(y), step):
+            out[start:start + step], zi = lfilter(b, a, y[start:start + step], zi=zi)
+        return out
+
+    def _rms_frames(self, y: np.ndarray) -> np.ndarray:
+        """
+        Calcula el RMS por ventana (como librosa.feature.rms con center=True)
+        procesando la señal por tramos para no materializar todas las ventanas.
+        """
+        frame, hop = self.FRAME_LENGTH, self.HOP_LENGTH
+        n_frames = 1 + len(y) // hop
+        per_chunk = max(1, int(self.block_seconds * self.sample_rate) // hop)
+        rms = np.empty(n_frames, dtype=np.float32)
+
+        for f0 in range(0, n_frames, per_chunk):
+            f1 = min(n_frames, f0 + per_chunk)
+            start, end = f0 * hop - frame // 2, (f1 - 1) * hop + frame // 2
+            segment = y[max(0, start):min(len(y), end)]
+            segment = np.pad(segment, (max(0, -start), max(0, end - len(y))))
+            rms[f0:f1] = librosa.feature.rms(y=segment, frame_length=frame, hop_length=hop, center=False)[0]
+
+        return rms
+
+    def _trim_bounds(self, y: np.ndarray):
+        """Equivalente a librosa.effects.trim(top_db=25), devolviendo solo los índices."""
+        power_db = 10 * np.log10(np.maximum(1e-10, self._rms_frames(y).astype(np.float64) ** 2))
+        nonsilent = np.flatnonzero(power_db > power_db.max() - self.TRIM_TOP_DB)
+        if len(nonsilent) == 0:
+            return 0, 0
+        return int(nonsilent[0] * self.HOP_LENGTH), min(len(y), int((nonsilent[-1] + 1) * self.HOP_LENGTH))
+
+    @staticmethod
+    def _trim_offset(buffer: AudioBuffer, start: int, sr: int) -> float:
+        """
+        Segundos recortados al inicio respecto al audio original (acumulados
+        si el buffer ya venía recortado), para que los tiempos de los tramos
+        se reporten sobre el audio recibido y no sobre el recortado.
+        """
+        return round(buffer.metadata.get("trim_offset", 0.0) + start / sr, 3)
+
+    def _overlap_add(self, y: np.ndarray, sr: int, prop: float) -> float:
+        """
+        Reduce el ruido de `y` en sitio por bloques solapados.
+
+        Cada bloque se procesa con margen a ambos lados y se recombina con
+        rampas lineales complementarias alrededor de cada frontera. Los
+        bloques se copian al enviarse al pool y solo se escribe el resultado
+        de un bloque cuando el siguiente ya fue copiado, así que la memoria
+        extra es de unos pocos bloques.
+
+        Retorna:
+            float: Pico absoluto de la señal resultante.
+        """
+        n = len(y)
+        step = int(self.block_seconds * sr)
+        pad = min(int(self.overlap_seconds * sr), step // 2)
+        fade = min(pad, step // 4)
+        bounds = list(range(0, n, step)) + [n]
+        if len(bounds) > 2 and n - bounds[-2] < 2 * fade:
+            bounds.pop(-2)
+
+        import noisereduce as nr
+
+        ramp = np.linspace(0.0, 1.0, 2 * fade, endpoint=False, dtype=np.float32) + np.float32(0.5 / max(1, 2 * fade))
+
+        def denoise(block: np.ndarray) -> np.ndarray:
+            return nr.reduce_noise(y=block, sr=sr, prop_decrease=prop).astype(np.float32, copy=False)
+
+        def submit(k: int):
+            lo, hi = max(0, bounds[k] - pad), min(n, bounds[k + 1] + pad)
+            return lo, pool.submit(denoise, y[lo:hi].copy())
+
+        peak = 0.0
+        n_blocks = len(bounds) - 1
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {}
+            next_k = 0
+            for k in range(n_blocks):
+                while next_k < n_blocks and next_k <= k + self.workers:
+                    pending[next_k] = submit(next_k)
+                    next_k += 1
+
+                lo, future = pending.pop(k)
+                out = future.result()
+                start, end = bounds[k], bounds[k + 1]
+                head = start - fade if k > 0 else start
+                tail = end + fade if k < n_blocks - 1 else end
+                piece = out[head - lo:tail - lo]
+
+                if k > 0:
+                    y[head:start + fade] += piece[:2 * fade] * ramp
+                    piece = piece[2 * fade:]
+                    head = start + fade
+                if k < n_blocks - 1:
+                    y[head:end - fade] = piece[:-2 * fade]
+                    y[end - fade:tail] = piece[-2 * fade:] * ramp[::-1]
+                else:
+                    y[head:tail] = piece
+
+                done_start = bounds[k] - fade if k > 0 else 0
+                done_end = bounds[k + 1] - fade if k < n_blocks - 1 else n
+                if done_end > done_start:
+                    peak = max(peak, float(np.abs(y[done_start:done_end]).max()))
+
+        return peak
+
+    def _reduce_streaming(self, buffer: AudioBuffer) -> AudioBuffer:
+        """
+        Versión por bloques de reduce_buffer para grabaciones largas.
+
+        Produce una salida equivalente (mismos filtro, recorte, estimación de
+        ruido y reducción no estacionaria) con memoria de trabajo acotada.
+        """
+        sr = buffer.sample_rate
+        y = self._bandpass_filter_blocks(buffer.samples, sr)
+        start, end = self._trim_bounds(y)
+        y = y[start:end]
+
+        noise_level = float(np.percentile(self._rms_frames(y), 20)) if len(y) else 0.0
+        print(
+            f"[NoiseReduceAdapter] Nivel de ruido estimado: {noise_level:.4f} "
+            f"| modo streaming ({self.block_seconds:.0f} s por bloque, {self.workers} hilos)"
+        )
+
+        prop = 0.9 if noise_level > 0.02 else 0.6
+        peak = self._overlap_add(y, sr, prop) if len(y) else 0.0
+        if peak > 0:
+            y *= np.float32(1.0 / peak)
+
+        return AudioBuffer(
+            samples=y,
+            sample_rate=sr,
+            source_format=buffer.source_format,
+            source_path=buffer.source_path,
+            metadata=dict(
+                buffer.metadata,
+                noise_level=noise_level,
+                denoise_mode="streaming",
+                gain=1.0,
+                trim_offset=self._trim_offset(buffer, start, sr),
+            ),
+        )
+
     def _estimate_noise_level(self, y: np.ndarray) -> float:
         """Estima el nivel promedio de ruido en la señal de audio."""
         rms = librosa.feature.rms(y=y, frame_length=2048, hop_length=512)[0]
         return float(np.percentile(rms, 20))
 
-    def reduce(self, wav_path: Path) -> Path:
+    def reduce_buffer(self, buffer: AudioBuffer) -> AudioBuffer:
         """
-        Reduce el ruido de un archivo WAV.
+        Reduce el ruido de un audio en memoria.
 
         Argumentos:
-            wav_path: Ruta del archivo WAV a procesar.
+            buffer: Audio mono 16 kHz a procesar.
 
         Retorna:
-            Path: Ruta del archivo procesado (se sobrescribe el original).
+            AudioBuffer: Audio procesado (si ocurre un error se devuelve el original).
         """
         try:
-            y, sr = librosa.load(wav_path, sr=self.sample_rate, mono=True)
-            y = self._bandpass_filter(y, sr)
-            y_trimmed, _ = librosa.effects.trim(y, top_db=25)
+            if buffer.duration > self.stream_min_seconds:
+                return self._reduce_streaming(buffer)
+
+            import noisereduce as nr
+
+            sr = buffer.sample_rate
+            y = self._bandpass_filter(buffer.samples, sr)
+            y_trimmed, (start, _) = librosa.effects.trim(y, top_db=self.TRIM_TOP_DB)
 
             noise_level = self._estimate_noise_level(y_trimmed)
             print(f"[NoiseReduceAdapter] Nivel de ruido estimado: {noise_level:.4f}")
@@ -59,7 +251,69 @@ class NoiseReduceAdapter(NoiseReducerPort):
             if np.max(np.abs(y_clean)) > 0:
                 y_clean = y_clean / np.max(np.abs(y_clean))
 
-            sf.write(wav_path, y_clean, sr)
+            return AudioBuffer(
+                samples=y_clean.astype(np.float32, copy=False),
+                sample_rate=sr,
+                source_format=buffer.source_format,
+                source_path=buffer.source_path,
+                metadata=dict(
+                    buffer.metadata, noise_level=noise_level, gain=1.0, trim_offset=self._trim_offset(buffer, start, sr)
+                ),
+            )
+
+        except Exception as e:
+            print(f"[NoiseReduceAdapter] Error procesando audio en memoria: {e}")
+            return buffer
+
+    def light_buffer(self, buffer: AudioBuffer) -> AudioBuffer:
+        """
+        Aplica solo el filtro pasa-banda, el recorte de silencios y la
+        normalización, sin reducción espectral de ruido.
+
+        Argumentos:
+            buffer: Audio mono 16 kHz a procesar.
+
+        Retorna:
+            AudioBuffer: Audio procesado (si ocurre un error se devuelve el original).
+        """
+        try:
+            y = self._bandpass_filter_blocks(buffer.samples, buffer.sample_rate)
+            start, end = self._trim_bounds(y)
+            y = y[start:end]
+
+            peak = float(np.max(np.abs(y))) if len(y) else 0.0
+            if peak > 0:
+                y *= np.float32(1.0 / peak)
+
+            return AudioBuffer(
+                samples=y,
+                sample_rate=buffer.sample_rate,
+                source_format=buffer.source_format,
+                source_path=buffer.source_path,
+                metadata=dict(
+                    buffer.metadata, gain=1.0, trim_offset=self._trim_offset(buffer, start, buffer.sample_rate)
+                ),
+            )
+
+        except Exception as e:
+            print(f"[NoiseReduceAdapter] Error en la limpieza ligera: {e}")
+            return buffer
+
+    def reduce(self, wav_path: Path) -> Path:
+        """
+        Reduce el ruido de un archivo WAV.
+
+        Argumentos:
+            wav_path: Ruta del archivo WAV a procesar.
+
+        Retorna:
+            Path: Ruta del archivo procesado (se sobrescribe el original).
+        """
+        try:
+            y, sr = librosa.load(wav_path, sr=self.sample_rate, mono=True)
+            clean = self.reduce_buffer(AudioBuffer(samples=y, sample_rate=sr, source_path=wav_path))
+
+            sf.write(wav_path, clean.samples, clean.sample_rate)
             print(f"[NoiseReduceAdapter] Archivo procesado correctamente: {wav_path.name}")
             return wav_path
 
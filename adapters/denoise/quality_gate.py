@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+import numpy as np
+from domain.entities import AudioBuffer
+from domain.ports import NoiseReducerPort
+
+
+CLOUD_ENGINES = {"azure", "google"}
+DENOISE_PATHS = ("skip", "light", "full")
+
+FRAME_SECONDS = 0.02
+CLIP_THRESHOLD = 0.999
+
+
+@dataclass
+class QualityReport:
+    """
+    Estimación rápida de la calidad de un audio.
+
+    Atributos:
+        snr_db: Relación señal/ruido estimada (percentil 90 vs. 10 de la energía por trama).
+        clipping_ratio: Fracción de muestras en escala completa (saturación), medida
+            sobre el nivel original del audio ('source_peak' del decodificador).
+        rms: Nivel RMS global.
+        duration: Duración del audio en segundos.
+        analysis_ms: Tiempo empleado en el análisis.
+    """
+    snr_db: float
+    clipping_ratio: float
+    rms: float
+    duration: float
+    analysis_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {k: round(v, 4) for k, v in asdict(self).items()}
+
+
+def analyze(samples: np.ndarray, sample_rate: int, source_peak: float = None) -> QualityReport:
+    """
+    Estima SNR y saturación en una sola pasada vectorizada.
+
+    La señal se divide en tramas de 20 ms; la energía de las tramas más
+    fuertes (percentil 90) se compara con la de las más silenciosas
+    (percentil 10), que se toma como piso de ruido.
+
+    La saturación se mide contra la escala completa del audio original. El
+    decodificador entrega las muestras sin normalizar y deja su pico en
+    source_peak; si las muestras llegan escaladas, source_peak permite
+    volver al nivel original (None: ya están en escala completa). Medirla
+    relativa al pico de una señal normalizada contaría como saturada
+    cualquier muestra cercana al máximo, aunque el original no lo esté.
+
+    Argumentos:
+        samples: Muestras float32 mono.
+        sample_rate: Frecuencia de muestreo en Hz.
+        source_peak: Pico original en escala completa (1.0 = 0 dBFS), o None.
+
+    Retorna:
+        QualityReport: SNR, saturación y nivel del audio.
+    """
+    start = time.perf_counter()
+    n = len(samples)
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+    usable = n - n % frame
+
+    if usable == 0:
+        return QualityReport(0.0, 0.0, 0.0, n / sample_rate if sample_rate else 0.0)
+
+    magnitude = np.abs(samples[:usable])
+    peak = float(magnitude.max())
+    if source_peak is None:
+        scale = 1.0 if peak > 0 else 0.0
+    else:
+        scale = source_peak / peak if peak > 0 else 0.0
+    frames = samples[:usable].reshape(-1, frame)
+    energy = np.einsum("ij,ij->i", frames, frames) / frame
+
+    noise, signal = np.percentile(energy, [10, 90])
+    snr_db = 10 * np.log10(max(float(signal), 1e-12) / max(float(noise), 1e-12))
+    clipping = float(np.count_nonzero(magnitude * scale >= CLIP_THRESHOLD)) / usable if scale > 0 else 0.0
+
+    return QualityReport(
+        snr_db=float(snr_db),
+        clipping_ratio=clipping,
+        rms=float(np.sqrt(energy.mean())),
+        duration=n / sample_rate,
+        analysis_ms=(time.perf_counter() - start) * 1000,
+    )
+
+
+class DenoiseGate:
+    """
+    Decide, por motor y proveedor, cuánta limpieza necesita cada audio.
+
+    - skip: el audio pasa sin cambios, tal como lo entrega el decodificador
+      (a su nivel original; la ganancia de metadata['gain'] se aplica al
+      codificar la subida o en el motor).
+    - light: solo pasa-banda, recorte de silencios y normalización.
+    - full: reducción de ruido espectral completa (reduce_noise).
+
+    Whisper recibe limpieza completa solo cuando el SNR es bajo; Azure y
+    Google hacen su propio manejo de ruido, así que por defecto se omite
+    salvo en audios muy ruidosos. Un audio saturado (más de
+    STT_DENOISE_CLIP_RATIO de muestras en escala completa) recibe limpieza
+    completa en cualquier motor: la distorsión de la saturación genera
+    armónicos que el SNR por tramas no refleja. STT_DENOISE_POLICY permite forzar la ruta
+    por motor o proveedor, p. ej. "web=skip,teams=full,azure=light".
+
+    El costo de la limpieza completa se mide por segundo de audio para
+    reportar el tiempo ahorrado cuando se omite.
+    """
+
+    _cost_lock = threading.Lock()
+    _full_ms_per_second = float(os.getenv("STT_DENOISE_FULL_MS_PER_S", "20"))
+
+    def __init__(
+        self,
+        engine: str,
+        skip_snr_db: float = 30.0,
+        light_snr_db: float = 15.0,
+        cloud_full_snr_db: float = 5.0,
+        cloud_light_snr_db: float = 12.0,
+        clip_full_ratio: float = 0.01,
+        overrides: dict = None,
+    ):
+        self.engine = (engine or "").lower()
+        self.skip_snr_db = skip_snr_db
+        self.light_snr_db = light_snr_db
+        self.cloud_full_snr_db = cloud_full_snr_db
+        self.cloud_light_snr_db = cloud_light_snr_db
+        self.clip_full_ratio = clip_full_ratio
+        self.overrides = overrides or {}
+
+    @classmethod
+    def from_env(cls, engine: str) -> "DenoiseGate":
+        """
+        Crea la compuerta a partir de STT_DENOISE_SKIP_SNR_DB, STT_DENOISE_LIGHT_SNR_DB,
+        STT_DENOISE_CLOUD_FULL_SNR_DB, STT_DENOISE_CLOUD_LIGHT_SNR_DB,
+        STT_DENOISE_CLIP_RATIO y STT_DENOISE_POLICY.
+        """
+        overrides = {}
+        for item in os.getenv("STT_DENOISE_POLICY", "").split(","):
+            key, _, path = item.partition("=")
+            if path.strip().lower() in DENOISE_PATHS:
+                overrides[key.strip().lower()] = path.strip().lower()
+
+        return cls(
+            engine,
+            skip_snr_db=float(os.getenv("STT_DENOISE_SKIP_SNR_DB", "30")),
+            light_snr_db=float(os.getenv("STT_DENOISE_LIGHT_SNR_DB", "15")),
+            cloud_full_snr_db=float(os.getenv("STT_DENOISE_CLOUD_FULL_SNR_DB", "5")),
+            cloud_light_snr_db=float(os.getenv("STT_DENOISE_CLOUD_LIGHT_SNR_DB", "12")),
+            clip_full_ratio=float(os.getenv("STT_DENOISE_CLIP_RATIO", "0.01")),
+            overrides=overrides,
+        )
+
+    def _override(self, provider: str):
+        provider = (provider or "").lower()
+        for key in (f"{self.engine}/{provider}", provider, self.engine):
+            if key in self.overrides:
+                return self.overrides[key]
+        return None
+
+    def policy(self, provider: str) -> dict:
+        """
+        Configuración que determina la ruta de limpieza para un proveedor:
+        la ruta forzada por STT_DENOISE_POLICY o los umbrales que aplican al
+        motor. Forma parte de la clave de la caché de transcripciones.
+        """
+        forced = self._override(provider)
+        if forced:
+            return {"path": forced}
+        if self.engine in CLOUD_ENGINES:
+            return {
+                "full_snr_db": self.cloud_full_snr_db,
+                "light_snr_db": self.cloud_light_snr_db,
+                "clip_ratio": self.clip_full_ratio,
+            }
+        return {"skip_snr_db": self.skip_snr_db, "light_snr_db": self.light_snr_db, "clip_ratio": self.clip_full_ratio}
+
+    def decide(self, report: QualityReport, provider: str) -> str:
+        """
+        Elige la ruta de limpieza para un audio.
+
+        Argumentos:
+            report: Análisis de calidad del audio.
+            provider: Proveedor o fuente del audio.
+
+        Retorna:
+            str: 'skip', 'light' o 'full'.
+        """
+        forced = self._override(provider)
+        if forced:
+            return forced
+
+        if report.clipping_ratio > self.clip_full_ratio:
+            return "full"
+
+        if self.engine in CLOUD_ENGINES:
+            if report.snr_db < self.cloud_full_snr_db:
+                return "full"
+            return "light" if report.snr_db < self.cloud_light_snr_db else "skip"
+
+        if report.snr_db >= self.skip_snr_db:
+            return "skip"
+        return "light" if report.snr_db >= self.light_snr_db else "full"
+
+    @classmethod
+    def _record_full_cost(cls, elapsed_ms: float, duration: float):
+        if duration <= 0:
+            return
+        with cls._cost_lock:
+            cls._full_ms_per_second = 0.8 * cls._full_ms_per_second + 0.2 * (elapsed_ms / duration)
+
+    def apply(self, denoiser: NoiseReducerPort, buffer: AudioBuffer, provider: str) -> AudioBuffer:
+        """
+        Analiza el audio, aplica la ruta elegida y deja el reporte en
+        buffer.metadata['pipeline'].
+
+        Argumentos:
+            denoiser: Reductor de ruido a utilizar.
+            buffer: Audio decodificado.
+            provider: Proveedor o fuente del audio.
+
+        Retorna:
+            AudioBuffer: Audio listo para el motor STT.
+        """
+        report = analyze(buffer.samples, buffer.sample_rate, buffer.metadata.get("source_peak"))
+        path = self.decide(report, provider)
+
+        start = time.perf_counter()
+        if path == "full":
+            clean = denoiser.reduce_buffer(buffer)
+        elif path == "light":
+            clean = denoiser.light_buffer(buffer)
+        else:
+            clean = buffer
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if path == "full":
+            self._record_full_cost(elapsed_ms, report.duration)
+        estimated_full_ms = self._full_ms_per_second * report.duration
+        saved_ms = 0.0 if path == "full" else max(0.0, estimated_full_ms - elapsed_ms - report.analysis_ms)
+
+        print(
+            f"[DenoiseGate] SNR {report.snr_db:.1f} dB | saturación {report.clipping_ratio:.2%} "
+            f"| motor {self.engine or '-'} | ruta: {path}"
+        )
+
+        clean.metadata = dict(
+            clean.metadata,
+            pipeline={
+                "quality": report.to_dict(),
+                "denoise": path,
+                "denoise_ms": round(elapsed_ms, 2),
+                "denoise_saved_ms": round(saved_ms, 2),
+            },
+        )
+        return clean
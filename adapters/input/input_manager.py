@@ -1,11 +1,14 @@
 from fastapi import UploadFile, HTTPException
 from pathlib import Path
 import base64
-import requests
+import os
 import mimetypes
 import re
 import tempfile
 import uuid
+from adapters.input.spool_writer import SpoolWriter, IngestLimitError
+from adapters.input.remote_client import get_remote_client
+from adapters.decoder.probe import probe
 
 
 class InputManager:
@@ -14,11 +17,28 @@ class InputManager:
     - Archivo (UploadFile)
     - URL remota
     - Cadena Base64
+
+    Las tres rutas copian la entrada en bloques de tamaño fijo directamente
+    al archivo temporal, calculando el hash del contenido al vuelo y
+    abortando en cuanto se superan el tamaño o la duración máximos.
+    Al terminar se sondean las cabeceras del archivo (sin decodificar) para
+    conocer el formato real y la duración antes de cualquier trabajo costoso.
+    Las URL se descargan con el cliente HTTP asíncrono compartido del proceso.
     """
 
-    def __init__(self, tmp_dir: str = "./tmp", save_files: bool = False):
+    def __init__(
+        self,
+        tmp_dir: str = "./tmp",
+        save_files: bool = False,
+        max_bytes: int = None,
+        max_seconds: float = None,
+        chunk_size: int = None,
+    ):
         self.tmp_dir = Path(tmp_dir)
-        self.save_files = save_files 
+        self.save_files = save_files
+        self.max_bytes = max_bytes or int(os.getenv("STT_MAX_INPUT_BYTES", str(50 * 1024 * 1024)))
+        self.max_seconds = max_seconds or float(os.getenv("STT_MAX_INPUT_SECONDS", "3600"))
+        self.chunk_size = chunk_size or int(os.getenv("STT_INGEST_CHUNK_BYTES", str(64 * 1024)))
         if self.save_files:
             self.tmp_dir.mkdir(parents=True, exist_ok=True)
 
@@ -27,57 +47,131 @@ class InputManager:
         if self.save_files:
             return self.tmp_dir / f"temp_{uuid.uuid4()}{suffix}"
         else:
-            import tempfile
             tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+            tmp.close()
             return Path(tmp.name)
 
     def _sanitize_filename(self, name: str) -> str:
         """Elimina caracteres no válidos para nombres de archivo en Windows y Linux."""
         return re.sub(r'[\\/*?:"<>|]', "_", name)
 
-    def process_input(self, file: UploadFile = None, audio_url: str = None, audio_base64: str = None) -> dict:
-        if file:
-            tmp_path = self._create_temp_path(Path(file.filename).suffix)
-            tmp_path.write_bytes(file.file.read())
-            mime_type = file.content_type or mimetypes.guess_type(tmp_path.name)[0]
-            return {"path": tmp_path, "mime_type": mime_type}
+    def _iter_base64(self, audio_base64: str):
+        """Decodifica Base64 por bloques, conservando el resto no múltiplo de 4."""
+        step = self.chunk_size * 4 // 3
+        carry = ""
+        for start in range(0, len(audio_base64), step):
+            piece = carry + "".join(audio_base64[start:start + step].split())
+            cut = len(piece) - len(piece) % 4
+            carry = piece[cut:]
+            if cut:
+                yield base64.b64decode(piece[:cut])
+        if carry:
+            yield base64.b64decode(carry + "=" * (-len(carry) % 4))
 
-        elif audio_url:
-            try:
-                
+    def _open_writer(self, tmp_path: Path) -> SpoolWriter:
+        return SpoolWriter(tmp_path, max_bytes=self.max_bytes, max_seconds=self.max_seconds)
+
+    def _result(self, writer: SpoolWriter, declared_mime: str = None) -> dict:
+        """
+        Cierra el archivo temporal, sondea sus cabeceras y arma los datos de entrada.
+
+        El tipo MIME se toma del contenido real cuando se reconoce el formato;
+        si no, se usa el declarado por el cliente.
+
+        Lanza:
+            IngestLimitError: Si la duración sondeada supera el máximo permitido.
+        """
+        writer.close()
+        info = probe(writer.path)
+        duration = info.duration or writer.duration
+        if self.max_seconds and duration and duration > self.max_seconds:
+            raise IngestLimitError(
+                f"El audio supera la duración máxima permitida ({self.max_seconds:.0f} s)."
+            )
+        return {
+            "path": writer.path,
+            "sha256": writer.sha256,
+            "size": writer.size,
+            "duration": duration,
+            "mime_type": info.mime_type or declared_mime,
+            "probe": info.to_dict(),
+        }
+
+    async def process_input(self, file: UploadFile = None, audio_url: str = None, audio_base64: str = None) -> dict:
+        """
+        Copia la entrada al archivo temporal por bloques.
+
+        Retorna:
+            dict: Ruta, tipo MIME, hash SHA-256, tamaño, duración y sondeo de cabeceras.
+
+        Lanza:
+            HTTPException: 413 si se superan los límites, 400 ante otros errores.
+        """
+        writer = None
+        try:
+            if file:
+                writer = self._open_writer(self._create_temp_path(Path(file.filename or "").suffix))
+                while True:
+                    chunk = await file.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    writer.write(chunk)
+                return self._result(
+                    writer, file.content_type or mimetypes.guess_type(writer.path.name)[0]
+                )
+
+            elif audio_url:
                 clean_url = audio_url.split("?")[0]
-         
+
                 name = Path(clean_url).name
                 safe_name = self._sanitize_filename(name or "remote_audio.ogg")
                 tmp_path = self._create_temp_path(Path(safe_name).suffix)
 
-                response = requests.get(audio_url)
-                response.raise_for_status()
-                tmp_path.write_bytes(response.content)
+                def open_sink(headers):
+                    nonlocal writer
+                    declared = int(headers.get("Content-Length") or 0)
+                    if self.max_bytes and declared > self.max_bytes:
+                        raise IngestLimitError(
+                            f"El audio supera el tamaño máximo permitido ({self.max_bytes} bytes)."
+                        )
+                    writer = self._open_writer(tmp_path)
+                    return writer
 
-                mime_type = (
-                    response.headers.get("Content-Type")
+                try:
+                    headers = await get_remote_client().stream(audio_url, open_sink)
+                except IngestLimitError:
+                    tmp_path.unlink(missing_ok=True)
+                    raise
+                except Exception as e:
+                    tmp_path.unlink(missing_ok=True)
+                    raise HTTPException(status_code=400, detail=f"Error descargando audio remoto: {e}")
+
+                return self._result(
+                    writer,
+                    headers.get("Content-Type")
                     or mimetypes.guess_type(tmp_path.name)[0]
-                    or "audio/ogg"
+                    or "audio/ogg",
                 )
 
-                return {"path": tmp_path, "mime_type": mime_type}
-
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Error descargando audio remoto: {e}")
+            elif audio_base64:
+                writer = self._open_writer(self._create_temp_path(".wav"))
+                try:
+                    for chunk in self._iter_base64(audio_base64):
+                        writer.write(chunk)
+                except IngestLimitError:
+                    raise
+                except Exception as e:
+                    writer.discard()
+                    raise HTTPException(status_code=400, detail=f"Error procesando audio Base64: {e}")
+                return self._result(writer, mimetypes.guess_type(writer.path.name)[0] or "audio/wav")
 
-        elif audio_base64:
-            tmp_path = self._create_temp_path(".wav")
-            try:
-                audio_data = base64.b64decode(audio_base64)
-                tmp_path.write_bytes(audio_data)
-                mime_type = mimetypes.guess_type(tmp_path.name)[0] or "audio/wav"
-                return {"path": tmp_path, "mime_type": mime_type}
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Error procesando audio Base64: {e}")
+        except IngestLimitError as e:
+            if writer is not None:
+                writer.discard()
+            raise HTTPException(status_code=413, detail=str(e))
 
         raise HTTPException(status_code=400, detail="Debe enviarse un archivo, URL o Base64 de audio.")
-    
+
     def cleanup(self, path: Path):
         """Elimina archivos temporales si no deben conservarse."""
         if not self.save_files and path.exists():
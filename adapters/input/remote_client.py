@@ -0,0 +1,151 @@
+import asyncio
+import os
+from urllib.parse import urlsplit
+import httpx
+
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class RemoteFetchError(Exception):
+    """Se lanza cuando no es posible descargar el audio remoto tras los reintentos."""
+
+
+class RemoteAudioClient:
+    """
+    Cliente HTTP asíncrono compartido para descargar audio remoto.
+
+    Mantiene un único httpx.AsyncClient por proceso con pool de conexiones
+    y keep-alive, de modo que las descargas repetidas a los mismos hosts
+    (contentUrl de Teams, WhatsApp, etc.) reutilizan la conexión TCP+TLS.
+    Aplica timeouts de conexión y lectura, un límite de concurrencia por
+    host y reintentos acotados con backoff exponencial.
+
+    Métodos:
+        stream(url, open_sink):
+            Descarga la URL por bloques hacia el destino devuelto por open_sink.
+        aclose():
+            Cierra el cliente y sus conexiones.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 50,
+        max_keepalive: int = 20,
+        per_host: int = 8,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=60.0,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.per_host = per_host
+        self.retries = max(1, retries)
+        self.backoff = backoff
+        self.chunk_size = chunk_size
+
+        self._client = None
+        self._host_limits = {}
+
+    @classmethod
+    def from_env(cls) -> "RemoteAudioClient":
+        """
+        Construye el cliente a partir de las variables de entorno:
+        STT_HTTP_MAX_CONNECTIONS, STT_HTTP_MAX_KEEPALIVE, STT_HTTP_PER_HOST,
+        STT_HTTP_CONNECT_TIMEOUT, STT_HTTP_READ_TIMEOUT, STT_HTTP_RETRIES y STT_HTTP_BACKOFF.
+        """
+        return cls(
+            max_connections=int(os.getenv("STT_HTTP_MAX_CONNECTIONS", "50")),
+            max_keepalive=int(os.getenv("STT_HTTP_MAX_KEEPALIVE", "20")),
+            per_host=int(os.getenv("STT_HTTP_PER_HOST", "8")),
+            connect_timeout=float(os.getenv("STT_HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("STT_HTTP_READ_TIMEOUT", "30")),
+            retries=int(os.getenv("STT_HTTP_RETRIES", "3")),
+            backoff=float(os.getenv("STT_HTTP_BACKOFF", "0.5")),
+            chunk_size=int(os.getenv("STT_INGEST_CHUNK_BYTES", str(64 * 1024))),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits, timeout=self.timeout, follow_redirects=True
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def stream(self, url: str, open_sink) -> httpx.Headers:
+        """
+        Descarga una URL por bloques.
+
+        Argumentos:
+            url: Dirección del audio remoto.
+            open_sink: Función que recibe las cabeceras de la respuesta y devuelve
+                       un destino con write(chunk) y discard(); se llama de nuevo
+                       en cada reintento para no mezclar descargas parciales.
+
+        Retorna:
+            httpx.Headers: Cabeceras de la respuesta exitosa.
+
+        Lanza:
+            RemoteFetchError: Si la descarga falla tras agotar los reintentos.
+        """
+        last_error = None
+
+        async with self._host_limit(url):
+            for attempt in range(self.retries):
+                if attempt:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+                sink = None
+                try:
+                    async with self.client.stream("GET", url) as response:
+                        if response.status_code in RETRYABLE_STATUS:
+                            last_error = f"HTTP {response.status_code}"
+                            continue
+                        response.raise_for_status()
+
+                        sink = open_sink(response.headers)
+                        async for chunk in response.aiter_bytes(self.chunk_size):
+                            sink.write(chunk)
+                        return response.headers
+
+                except httpx.TransportError as e:
+                    last_error = f"{type(e).__name__}: {e}"
+                    if sink is not None:
+                        sink.discard()
+                    print(f"[RemoteAudioClient] Intento {attempt + 1} fallido para {url}: {last_error}")
+                except BaseException:
+                    if sink is not None:
+                        sink.discard()
+                    raise
+
+        raise RemoteFetchError(f"No se pudo descargar {url} tras {self.retries} intentos ({last_error}).")
+
+    async def aclose(self):
+        """Cierra el cliente HTTP compartido."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_remote_client = None
+
+
+def get_remote_client() -> RemoteAudioClient:
+    """Devuelve el cliente HTTP del proceso, creándolo desde el entorno la primera vez."""
+    global _remote_client
+    if _remote_client is None:
+        _remote_client = RemoteAudioClient.from_env()
+    return _remote_client
@@ -0,0 +1,142 @@
+import hashlib
+import struct
+from pathlib import Path
+from adapters.decoder.probe import is_ogg_page
+
+
+class IngestLimitError(Exception):
+    """Se lanza cuando la entrada supera el tamaño o la duración máxima permitida."""
+
+
+class SpoolWriter:
+    """
+    Escritor incremental de audio entrante hacia el archivo temporal.
+
+    Recibe la entrada en bloques de tamaño fijo y, mientras escribe:
+    - Calcula el SHA-256 del contenido (sin lecturas adicionales).
+    - Aborta en cuanto se supera el tamaño máximo en bytes.
+    - Estima la duración a partir de la cabecera WAV o de las posiciones
+      granulares de las páginas Ogg, y aborta si supera la duración máxima.
+
+    Métodos:
+        write(chunk):
+            Escribe un bloque y aplica los límites.
+        close():
+            Cierra el archivo.
+        discard():
+            Cierra y elimina el archivo parcial.
+    """
+
+    HEADER_BYTES = 4096
+
+    def __init__(self, path: Path, max_bytes: int = None, max_seconds: float = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+
+        self.size = 0
+        self.duration = None
+        self._hash = hashlib.sha256()
+        self._file = open(path, "wb")
+        self._header = b""
+        self._tail = b""
+
+        self._wav_data_offset = None
+        self._wav_byte_rate = None
+        self._ogg_rate = None
+        self._ogg_pre_skip = 0
+        self._ogg_serial = None
+
+    @property
+    def sha256(self) -> str:
+        """Hash SHA-256 de los bytes escritos hasta el momento."""
+        return self._hash.hexdigest()
+
+    def write(self, chunk: bytes):
+        """
+        Escribe un bloque en el archivo temporal.
+
+        Lanza:
+            IngestLimitError: Si se supera el tamaño o la duración máxima.
+        """
+        if not chunk:
+            return
+
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise IngestLimitError(
+                f"El audio supera el tamaño máximo permitido ({self.max_bytes} bytes)."
+            )
+
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+        if len(self._header) < self.HEADER_BYTES:
+            self._header += chunk[: self.HEADER_BYTES - len(self._header)]
+            self._parse_header()
+
+        self._update_duration(chunk)
+        if self.max_seconds and self.duration and self.duration > self.max_seconds:
+            raise IngestLimitError(
+                f"El audio supera la duración máxima permitida ({self.max_seconds} s)."
+            )
+
+    def _parse_header(self):
+        header = self._header
+
+        if header[:4] == b"RIFF" and header[8:12] == b"WAVE" and self._wav_data_offset is None:
+            offset = 12
+            while offset + 8 <= len(header):
+                chunk_id = header[offset:offset + 4]
+                chunk_size = struct.unpack("<I", header[offset + 4:offset + 8])[0]
+                if chunk_id == b"fmt " and offset + 20 <= len(header):
+                    self._wav_byte_rate = struct.unpack("<I", header[offset + 16:offset + 20])[0]
+                elif chunk_id == b"data":
+                    self._wav_data_offset = offset + 8
+                    break
+                offset += 8 + chunk_size + (chunk_size & 1)
+
+        elif is_ogg_page(header, 0) and self._ogg_rate is None:
+            self._ogg_serial = header[14:18]
+            opus = header.find(b"OpusHead")
+            vorbis = header.find(b"\x01vorbis")
+            if opus >= 0 and opus + 12 <= len(header):
+                self._ogg_rate = 48000
+                self._ogg_pre_skip = struct.unpack("<H", header[opus + 10:opus + 12])[0]
+            elif vorbis >= 0 and vorbis + 16 <= len(header):
+                self._ogg_rate = struct.unpack("<I", header[vorbis + 12:vorbis + 16])[0]
+
+    def _update_duration(self, chunk: bytes):
+        if self._wav_data_offset is not None and self._wav_byte_rate:
+            self.duration = max(0, self.size - self._wav_data_offset) / self._wav_byte_rate
+            return
+
+        if not self._ogg_rate:
+            return
+
+        # Las páginas pueden quedar partidas entre bloques: se conserva la cola
+        # anterior. 'OggS' también puede aparecer dentro del audio, así que solo
+        # cuentan las cabeceras válidas del mismo flujo (ver is_ogg_page).
+        data = self._tail + chunk
+        granule = None
+        pos = data.find(b"OggS")
+        while pos >= 0 and pos + 27 <= len(data):
+            if is_ogg_page(data, pos, self._ogg_serial):
+                value = struct.unpack("<q", data[pos + 6:pos + 14])[0]
+                if value > 0:
+                    granule = value
+            pos = data.find(b"OggS", pos + 4)
+        self._tail = data[-26:]
+
+        if granule is not None:
+            self.duration = max(0, granule - self._ogg_pre_skip) / self._ogg_rate
+
+    def close(self):
+        """Cierra el archivo temporal."""
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self):
+        """Cierra y elimina el archivo parcial."""
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,274 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def make_owner() -> str:
+    """
+    Identificador del proceso que reclama trabajos: host, pid y un id de
+    arranque aleatorio (distingue un pid reutilizado tras un reinicio).
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _owner_gone(owner: str) -> bool:
+    """Indica si el dueño es un proceso de este mismo host que ya no existe."""
+    host, _, rest = (owner or "").partition(":")
+    pid = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+class SqliteJobQueue:
+    """
+    Cola de trabajos de transcripción persistente basada en SQLite.
+
+    Guarda cada trabajo aceptado junto con la ruta del audio en disco,
+    de modo que los trabajos sobreviven a reinicios del servicio. Al
+    reclamar un trabajo se registra el proceso dueño y un latido
+    (heartbeat_at) que el dueño renueva mientras lo ejecuta; varios
+    workers de uvicorn pueden compartir la base sin pisarse.
+
+    Un trabajo 'running' solo se vuelve a encolar cuando su dueño ya no
+    existe: el proceso murió en este host o su latido tiene más de
+    `stale_after_s`. Tras `max_attempts` intentos se marca 'failed' en
+    lugar de reencolarse, para que un audio que tumba el proceso no se
+    reintente en cada reinicio.
+
+    La base se crea en el primer uso, no al construir la cola.
+
+    Métodos:
+        enqueue(params, audio_path, callback_url):
+            Registra un trabajo nuevo y devuelve su identificador.
+        claim(owner):
+            Toma de forma atómica el trabajo pendiente más antiguo.
+        heartbeat(owner):
+            Renueva el latido de los trabajos en curso del dueño.
+        complete(job_id, result) / fail(job_id, error):
+            Registran el resultado final del trabajo.
+        requeue_stale(owner):
+            Reencola (o marca 'failed') los trabajos de dueños desaparecidos.
+        get(job_id):
+            Devuelve el estado del trabajo o None si no existe.
+    """
+
+    def __init__(self, db_path: str = "./tmp/jobs.sqlite3", max_attempts: int = 3, stale_after_s: float = 60.0):
+        self.db_path = Path(db_path)
+        self.max_attempts = max(1, max_attempts)
+        self.stale_after_s = stale_after_s
+        self._lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    @classmethod
+    def from_env(cls) -> "SqliteJobQueue":
+        """
+        Construye la cola a partir de STT_JOBS_DB, STT_JOB_MAX_ATTEMPTS y
+        STT_JOB_STALE_S (segundos sin latido para considerar muerto al dueño).
+        """
+        return cls(
+            os.getenv("STT_JOBS_DB", "./tmp/jobs.sqlite3"),
+            max_attempts=int(os.getenv("STT_JOB_MAX_ATTEMPTS", "3")),
+            stale_after_s=float(os.getenv("STT_JOB_STALE_S", "60")),
+        )
+
+    def _init_schema(self, conn: sqlite3.Connection):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                audio_path TEXT NOT NULL,
+                callback_url TEXT,
+                callback_status TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                owner TEXT,
+                heartbeat_at TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        # Bases creadas antes de registrar dueño y latido.
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("owner", "heartbeat_at"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        if not self._schema_ready:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not self._schema_ready:
+                with self._schema_lock:
+                    if not self._schema_ready:
+                        self._init_schema(conn)
+                        self._schema_ready = True
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.utcnow().isoformat()
+
+    def enqueue(self, params: dict, audio_path: Path, callback_url: str = None) -> str:
+        """Registra un trabajo en estado 'queued' y devuelve su id."""
+        job_id = str(uuid.uuid4())
+        now = self._now()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, params, audio_path, callback_url, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(params), str(audio_path), callback_url, now, now),
+            )
+        return job_id
+
+    def claim(self, owner: str):
+        """
+        Toma el trabajo pendiente más antiguo y lo marca como 'running'
+        a nombre de `owner`.
+
+        Argumentos:
+            owner: Identificador del proceso que lo ejecutará (ver make_owner).
+
+        Retorna:
+            dict | None: El trabajo reclamado o None si la cola está vacía.
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = self._now()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, owner = ?, heartbeat_at = ?, "
+                "updated_at = ? WHERE id = ?",
+                (owner, now, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        return self._to_dict(row, status="running")
+
+    def heartbeat(self, owner: str) -> int:
+        """Renueva el latido de los trabajos 'running' del dueño; devuelve cuántos."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+                (self._now(), owner),
+            )
+            return cursor.rowcount
+
+    def complete(self, job_id: str, result: dict):
+        """Marca el trabajo como 'done' y guarda el resultado serializado."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(result, default=str), self._now(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str):
+        """Marca el trabajo como 'failed' con el detalle del error."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, self._now(), job_id),
+            )
+
+    def mark_callback(self, job_id: str, callback_status: str):
+        """Registra el resultado de la entrega del webhook."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET callback_status = ?, updated_at = ? WHERE id = ?",
+                (callback_status, self._now(), job_id),
+            )
+
+    def requeue_stale(self, owner: str) -> dict:
+        """
+        Recupera los trabajos 'running' cuyo dueño desapareció.
+
+        Un dueño desapareció si es un proceso de este host que ya no existe
+        o si su latido tiene más de `stale_after_s`. Los trabajos de `owner`
+        (el proceso que llama) y de dueños vivos no se tocan. Si el trabajo
+        ya agotó `max_attempts` se marca 'failed'; si no, vuelve a 'queued'.
+
+        Argumentos:
+            owner: Identificador del proceso que llama.
+
+        Retorna:
+            dict: Ids afectados, {"requeued": [...], "failed": [...]}.
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=self.stale_after_s)).isoformat()
+        recovered = {"requeued": [], "failed": []}
+
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, owner, attempts, heartbeat_at FROM jobs WHERE status = 'running' AND "
+                "(owner IS NULL OR owner != ?)",
+                (owner,),
+            ).fetchall()
+            now = self._now()
+            for row in rows:
+                stale = row["heartbeat_at"] is None or row["heartbeat_at"] < cutoff
+                if not (stale or _owner_gone(row["owner"])):
+                    continue
+                if row["attempts"] >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, owner = NULL, updated_at = ? WHERE id = ?",
+                        (f"Se agotaron los {self.max_attempts} intentos de ejecución.", now, row["id"]),
+                    )
+                    recovered["failed"].append(row["id"])
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', owner = NULL, updated_at = ? WHERE id = ?",
+                        (now, row["id"]),
+                    )
+                    recovered["requeued"].append(row["id"])
+            conn.execute("COMMIT")
+        return recovered
+
+    def get(self, job_id: str):
+        """Devuelve el trabajo como diccionario o None si no existe."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, status: str = None) -> dict:
+        return {
+            "job_id": row["id"],
+            "status": status or row["status"],
+            "params": json.loads(row["params"]),
+            "audio_path": row["audio_path"],
+            "callback_url": row["callback_url"],
+            "callback_status": row["callback_status"],
+            "attempts": row["attempts"] + (1 if status == "running" else 0),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
@@ -14,6 +14,8 @@ class JsonResponseAdapter:
         serialize(result, mode):
             Convierte un objeto TranscriptResult en un diccionario JSON
             listo para ser devuelto por la API.
+        to_json(data):
+            Convierte un diccionario serializado en texto JSON (p. ej. para webhooks).
     """
 
     @staticmethod
@@ -34,3 +36,18 @@ class JsonResponseAdapter:
             data.pop("raw", None)
 
         return data
+
+    @staticmethod
+    def to_json(data: dict) -> str:
+        """
+        Convierte un diccionario de respuesta en texto JSON.
+
+        Las fechas y demás tipos no nativos se convierten a texto.
+
+        Argumentos:
+            data: Diccionario producido por serialize().
+
+        Retorna:
+            str: Documento JSON.
+        """
+        return json.dumps(data, default=str, ensure_ascii=False)
@@ -2,7 +2,8 @@ import os
 import requests
 from pathlib import Path
 from datetime import datetime
-from domain.entities import TranscriptResult
+from adapters.stt.upload_encoder import UploadPayload, encode_upload, engine_encoding
+from domain.entities import AudioBuffer, TranscriptResult
 from domain.utils.lang_mapper import LanguageMapper
 
 
@@ -12,8 +13,15 @@ class AzureSTTAdapter:
 
     Utiliza LanguageMapper para ajustar el idioma al formato
     esperado por Azure. Devuelve errores detallados en el campo 'raw'.
+
+    El audio se sube comprimido según STT_AZURE_UPLOAD_ENCODING ('ogg_opus'
+    por defecto, o 'wav'); el tamaño enviado y el tiempo de codificación
+    se reportan en raw['upload'].
     """
 
+    # Codificaciones que acepta la API REST de audio corto.
+    SUPPORTED_ENCODINGS = ("ogg_opus", "wav")
+
     def __init__(self):
         """
         Inicializa el adaptador utilizando las variables de entorno
@@ -31,44 +39,93 @@ class AzureSTTAdapter:
                 "Faltan variables de entorno: AZURE_SPEECH_KEY o AZURE_REGION."
             )
 
-        print(f"[AzureSTTAdapter] Endpoint configurado: {self.endpoint}")
+        encoding = engine_encoding("azure")
+        self.upload_encoding = encoding if encoding in self.SUPPORTED_ENCODINGS else "wav"
+
+        print(f"[AzureSTTAdapter] Endpoint configurado: {self.endpoint} | subida {self.upload_encoding}")
+
+    def transcribe_buffer(self, buffer: AudioBuffer, language: str = "es-MX") -> TranscriptResult:
+        """
+        Transcribe audio en memoria utilizando Azure Speech-to-Text.
+
+        El audio se codifica en memoria (Ogg/Opus o WAV PCM 16 bits), sin
+        archivos temporales; si el Opus original llega sin modificar, se
+        envían sus bytes tal cual.
+        """
+        payload = encode_upload(buffer, self.upload_encoding)
+        return self._post(payload.data, language, payload)
 
     def transcribe(self, audio_path: Path, language: str = "es-MX") -> TranscriptResult:
         """
         Transcribe un archivo de audio utilizando Azure Speech-to-Text.
 
+        Si ocurre un error, incluye el mensaje detallado en el campo 'raw'.
+        """
+        try:
+            with open(audio_path, "rb") as audio_file:
+                return self._post(audio_file.read(), language)
+        except OSError as e:
+            return self._error_result(
+                LanguageMapper.for_azure(language), f"Error leyendo el audio: {e}"
+            )
+
+    def _error_result(self, language: str, error_detail: str, upload: dict = None, **details) -> TranscriptResult:
+        raw = dict({"error": error_detail}, **details)
+        if upload:
+            raw["upload"] = upload
+        return TranscriptResult(
+            text="",
+            confidence=0.0,
+            language=language,
+            timestamp=datetime.utcnow(),
+            provider="azure",
+            original_format="wav",
+            raw=raw,
+        )
+
+    def _post(self, audio_data: bytes, language: str, payload: UploadPayload = None) -> TranscriptResult:
+        """
+        Envía el audio a Azure y construye el TranscriptResult.
+
+        Argumentos:
+            audio_data: Bytes del audio.
+            language: Idioma solicitado.
+            payload: Codificación usada; sin ella se envía como WAV.
+
         Si ocurre un error, incluye el mensaje detallado en el campo 'raw'.
         """
         mapped_lang = LanguageMapper.for_azure(language)
+        content_type = payload.content_type if payload else "audio/wav"
+        upload = payload.to_dict() if payload else None
 
         try:
-            with open(audio_path, "rb") as audio_file:
-                response = requests.post(
-                    f"{self.endpoint}?language={mapped_lang}",
-                    headers={
-                        "Ocp-Apim-Subscription-Key": self.key,
-                        "Content-Type": "audio/wav",
-                    },
-                    data=audio_file,
-                    timeout=30,
-                )
+            response = requests.post(
+                f"{self.endpoint}?language={mapped_lang}",
+                headers={
+                    "Ocp-Apim-Subscription-Key": self.key,
+                    "Content-Type": content_type,
+                },
+                data=audio_data,
+                timeout=30,
+            )
 
             if response.status_code != 200:
                 error_detail = (
                     f"Error de Azure STT ({response.status_code}): {response.text}"
                 )
                 print(f"[AzureSTTAdapter] {error_detail}")
-                return TranscriptResult(
-                    text="",
-                    confidence=0.0,
-                    language=mapped_lang,
-                    timestamp=datetime.utcnow(),
-                    provider="azure",
-                    original_format="wav",
-                    raw={"error": error_detail},
+                # status_code y Retry-After permiten al EngineRouter distinguir cuota de fallas.
+                return self._error_result(
+                    mapped_lang,
+                    error_detail,
+                    upload,
+                    status_code=response.status_code,
+                    retry_after=response.headers.get("Retry-After"),
                 )
 
             data = response.json()
+            if upload:
+                data["upload"] = upload
             text = data.get("DisplayText", "").strip()
             status = data.get("RecognitionStatus", "Unknown")
             confidence = 0.9 if status == "Success" else 0.0
@@ -93,12 +150,4 @@ class AzureSTTAdapter:
             error_detail = f"Error procesando la transcripción: {e}"
             print(f"[AzureSTTAdapter] {error_detail}")
 
-        return TranscriptResult(
-            text="",
-            confidence=0.0,
-            language=mapped_lang,
-            timestamp=datetime.utcnow(),
-            provider="azure",
-            original_format="wav",
-            raw={"error": error_detail},
-        )
+        return self._error_result(mapped_lang, error_detail, upload)
@@ -0,0 +1,309 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# Memoria aproximada (MB) que ocupa cada tamaño de Whisper en fp32 sobre CPU.
+WHISPER_MODEL_MB = {
+    "tiny": 75,
+    "base": 145,
+    "small": 485,
+    "medium": 1530,
+    "large": 3090,
+    "large-v2": 3090,
+    "large-v3": 3090,
+    "turbo": 1620,
+}
+
+CLOUD_ENGINES = ("azure", "google")
+
+# Motores locales basados en Whisper; whisper-int8 cuantiza las capas lineales a int8.
+WHISPER_ENGINES = ("whisper", "whisper-int8")
+
+# Fracción aproximada de memoria de un modelo int8 (capas lineales cuantizadas) frente a fp32.
+INT8_MEMORY_FACTOR = 0.4
+
+DEFAULT_WARMUP_SAMPLE = Path(__file__).resolve().parents[2] / "samples" / "web.wav"
+
+
+class EngineRegistry:
+    """
+    Registro de motores STT de larga vida para todo el proceso.
+
+    Carga los motores una sola vez (al arranque o en el primer uso),
+    entrega instancias compartidas y mantiene los modelos Whisper
+    de distintos tamaños bajo un presupuesto de memoria con expulsión LRU.
+    Solo se expulsan tamaños ociosos, es decir, sin préstamos activos.
+
+    Métodos:
+        get(engine_name, model_size):
+            Devuelve la instancia compartida del motor solicitado.
+        lease(engine_name, model_size):
+            Context manager que protege el motor contra la expulsión mientras se usa.
+        preload():
+            Carga los motores y tamaños configurados.
+        warmup(sample_path):
+            Ejecuta una inferencia de calentamiento con un audio de ejemplo.
+        warmed_up():
+            Indica si todos los motores configurados calentaron sin error.
+        failed():
+            Lista los motores que no cargaron o fallaron al calentar.
+        status():
+            Resume el estado de carga y calentamiento para /ready.
+    """
+
+    def __init__(
+        self,
+        engines=("whisper",),
+        whisper_sizes=("medium",),
+        memory_budget_mb: int = 4096,
+    ):
+        self.engines = [e.strip().lower() for e in engines if e.strip()]
+        self.whisper_sizes = [s.strip().lower() for s in whisper_sizes if s.strip()]
+        self.default_whisper_size = self.whisper_sizes[0] if self.whisper_sizes else "medium"
+        self.memory_budget_mb = memory_budget_mb
+
+        self._lock = threading.RLock()
+        self._load_locks = {}
+        self._cloud = {}
+        self._whisper = OrderedDict()
+        self._in_use = {}
+
+        self.ready = False
+        self.errors = {}
+        self.warmup_report = {}
+
+    @classmethod
+    def from_env(cls) -> "EngineRegistry":
+        """
+        Construye el registro a partir de las variables de entorno:
+        STT_ENGINES, WHISPER_MODEL_SIZES y WHISPER_MEMORY_BUDGET_MB.
+        """
+        engines = os.getenv("STT_ENGINES", "whisper").split(",")
+        sizes = os.getenv("WHISPER_MODEL_SIZES", "medium").split(",")
+        budget = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "4096"))
+        return cls(engines=engines, whisper_sizes=sizes, memory_budget_mb=budget)
+
+    def _key(self, engine_name: str, model_size: str = None) -> tuple:
+        engine_name = (engine_name or "whisper").strip().lower()
+        if engine_name in CLOUD_ENGINES:
+            return engine_name, None
+        engine_name = engine_name if engine_name in WHISPER_ENGINES else "whisper"
+        return engine_name, (model_size or self.default_whisper_size).strip().lower()
+
+    def _load_lock(self, key: tuple) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def _create(self, key: tuple):
+        engine_name, model_size = key
+
+        if engine_name == "azure":
+            from adapters.stt.azure_adapter import AzureSTTAdapter
+            print("[EngineRegistry] Cargando motor: Azure Speech-to-Text")
+            return AzureSTTAdapter()
+
+        if engine_name == "google":
+            from adapters.stt.google_adapter import GoogleSTTAdapter
+            print("[EngineRegistry] Cargando motor: Google Cloud Speech-to-Text")
+            return GoogleSTTAdapter()
+
+        if engine_name == "whisper-int8":
+            from adapters.stt.whisper_int8_adapter import WhisperInt8Adapter
+            print(f"[EngineRegistry] Cargando motor: Whisper int8 ({model_size})")
+            return WhisperInt8Adapter(model_size=model_size)
+
+        from adapters.stt.whisper_adapter import WhisperAdapter
+        print(f"[EngineRegistry] Cargando motor: Whisper ({model_size})")
+        return WhisperAdapter(model_size=model_size)
+
+    def _lookup(self, key: tuple):
+        if key[1] is None:
+            return self._cloud.get(key)
+        adapter = self._whisper.get(key)
+        if adapter is not None:
+            self._whisper.move_to_end(key)
+        return adapter
+
+    def _loaded_mb(self) -> int:
+        return int(sum(
+            WHISPER_MODEL_MB.get(size, 1530) * (INT8_MEMORY_FACTOR if engine_name == "whisper-int8" else 1)
+            for engine_name, size in self._whisper
+        ))
+
+    def _evict_idle(self, keep: tuple = None):
+        """
+        Expulsa los tamaños Whisper menos usados hasta respetar el presupuesto.
+        Nunca expulsa `keep` (el modelo recién cargado que se va a entregar).
+        """
+        for key in list(self._whisper):
+            if self._loaded_mb() <= self.memory_budget_mb or len(self._whisper) <= 1:
+                return
+            if key == keep or self._in_use.get(key, 0) > 0:
+                continue
+            adapter = self._whisper.pop(key)
+            if hasattr(adapter, "close"):
+                adapter.close()
+            print(f"[EngineRegistry] Modelo {key[0]} '{key[1]}' expulsado por presupuesto de memoria.")
+
+    def get(self, engine_name: str, model_size: str = None):
+        """
+        Devuelve la instancia compartida del motor solicitado, cargándola si hace falta.
+
+        Argumentos:
+            engine_name: Nombre del motor ('whisper', 'azure', 'google').
+            model_size: Tamaño del modelo Whisper (opcional).
+
+        Retorna:
+            Instancia de un adaptador que implementa la interfaz TranscriberPort.
+        """
+        key = self._key(engine_name, model_size)
+
+        with self._lock:
+            adapter = self._lookup(key)
+        if adapter is not None:
+            return adapter
+
+        with self._load_lock(key):
+            with self._lock:
+                adapter = self._lookup(key)
+            if adapter is not None:
+                return adapter
+
+            adapter = self._create(key)
+
+            with self._lock:
+                if key[1] is None:
+                    self._cloud[key] = adapter
+                else:
+                    self._whisper[key] = adapter
+                    self._evict_idle(keep=key)
+        return adapter
+
+    @contextmanager
+    def lease(self, engine_name: str, model_size: str = None):
+        """
+        Presta un motor compartido y evita que se expulse mientras se usa.
+        """
+        key = self._key(engine_name, model_size)
+        with self._lock:
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            yield self.get(engine_name, model_size)
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+                self._evict_idle()
+
+    def preload(self):
+        """Carga todos los motores y tamaños Whisper configurados."""
+        for engine_name in self.engines:
+            sizes = self.whisper_sizes if engine_name in WHISPER_ENGINES else [None]
+            for size in sizes:
+                name = engine_name if size is None else f"{engine_name}:{size}"
+                try:
+                    self.get(engine_name, size)
+                except Exception as e:
+                    self.errors[name] = str(e)
+                    print(f"[EngineRegistry] No se pudo cargar {name}: {e}")
+
+    def warmup(self, sample_path: Path = DEFAULT_WARMUP_SAMPLE):
+        """
+        Ejecuta una inferencia de calentamiento por cada motor cargado
+        usando una copia del audio de ejemplo (los adaptadores pueden reescribirlo).
+        """
+        with self._lock:
+            loaded = [(k, self._cloud[k]) for k in self._cloud]
+            loaded += [(k, self._whisper[k]) for k in self._whisper]
+
+        for (engine_name, size), adapter in loaded:
+            name = engine_name if size is None else f"{engine_name}:{size}"
+            tmp_dir = Path(tempfile.mkdtemp(prefix="tracky_warmup_"))
+            try:
+                wav = tmp_dir / sample_path.name
+                shutil.copyfile(sample_path, wav)
+                start = time.perf_counter()
+                result = adapter.transcribe(wav, language="es-MX")
+                elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+                error = (result.raw or {}).get("error") if result.raw else None
+                self.warmup_report[name] = {"elapsed_ms": elapsed_ms, "error": error}
+                print(f"[EngineRegistry] Calentamiento de {name} completado en {elapsed_ms} ms.")
+            except Exception as e:
+                self.errors[name] = str(e)
+                print(f"[EngineRegistry] Error calentando {name}: {e}")
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.ready = self.warmed_up()
+        failed = self.failed()
+        if failed:
+            print(f"[EngineRegistry] Motores con calentamiento fallido: {', '.join(failed)}")
+
+    def start(self, sample_path: Path = DEFAULT_WARMUP_SAMPLE) -> threading.Thread:
+        """Precarga y calienta los motores en segundo plano."""
+        def _run():
+            self.preload()
+            self.warmup(sample_path)
+
+        thread = threading.Thread(target=_run, name="engine-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def configured(self) -> list:
+        """Nombres de los motores configurados, con un nombre por tamaño Whisper."""
+        names = []
+        for engine_name in self.engines:
+            sizes = self.whisper_sizes if engine_name in WHISPER_ENGINES else [None]
+            names += [engine_name if size is None else f"{engine_name}:{size}" for size in sizes]
+        return names
+
+    def warmed_up(self) -> bool:
+        """
+        Criterio de /ready: todos los motores configurados cargaron y su
+        calentamiento respondió sin error.
+        """
+        failed = set(self.failed())
+        return all(
+            name in self.warmup_report and name not in failed for name in self.configured()
+        )
+
+    def failed(self) -> list:
+        """Motores que no cargaron o cuyo calentamiento devolvió error."""
+        names = set(self.errors)
+        names.update(name for name, entry in self.warmup_report.items() if entry["error"] is not None)
+        return sorted(names)
+
+    def status(self) -> dict:
+        """Devuelve el estado del registro para el endpoint /ready."""
+        with self._lock:
+            loaded = sorted(k[0] for k in self._cloud)
+            loaded += [f"{k[0]}:{k[1]}" for k in self._whisper]
+            whisper_mb = self._loaded_mb()
+        return {
+            "ready": self.ready,
+            "engines": self.engines,
+            "loaded": loaded,
+            "whisper_memory_mb": whisper_mb,
+            "whisper_memory_budget_mb": self.memory_budget_mb,
+            "warmup": self.warmup_report,
+            "errors": self.errors,
+            "failed": self.failed(),
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> EngineRegistry:
+    """Devuelve el registro de motores del proceso, creándolo desde el entorno la primera vez."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = EngineRegistry.from_env()
+        return _registry
@@ -0,0 +1,450 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, List
+from adapters.stt.engine_registry import CLOUD_ENGINES, get_registry
+from adapters.stt.hedging import LatencyTracker, get_latency_tracker
+from domain.entities import AudioBuffer, TranscriptResult
+
+
+# Costo relativo por defecto de cada motor (los locales no pagan por petición).
+DEFAULT_ENGINE_COST = {"whisper": 0.0, "whisper-int8": 0.0, "google": 1.0, "azure": 1.0}
+
+_QUOTA_PATTERN = re.compile(r"\b429\b|RESOURCE_EXHAUSTED|quota", re.IGNORECASE)
+
+
+def _retry_after_s(value) -> float:
+    """
+    Segundos indicados por un encabezado Retry-After, en segundos o como
+    fecha HTTP; None si falta o no se puede interpretar.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        try:
+            when = parsedate_to_datetime(str(value))
+        except (TypeError, ValueError, IndexError):
+            return None
+        if when is None:
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return seconds if seconds > 0 else None
+
+
+class CircuitBreaker:
+    """
+    Interruptor de circuito por motor.
+
+    Se abre cuando en la ventana reciente hay al menos `failure_threshold`
+    fallos y la tasa de error supera `error_rate`; mientras está abierto el
+    motor no recibe tráfico. Pasado `cooldown_s` deja pasar una sola
+    petición de prueba (semiabierto): si sale bien se cierra, si falla se
+    vuelve a abrir. `clock` permite sustituir el reloj monotónico en pruebas.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        error_rate: float = 0.5,
+        window_s: float = 30.0,
+        cooldown_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.window_s = window_s
+        self.cooldown_s = cooldown_s
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._outcomes = deque()
+        self._opened_at = None
+        self._open_for = cooldown_s
+        self._probing = False
+
+    def _trim(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_s:
+            self._outcomes.popleft()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self.clock() - self._opened_at >= self._open_for:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Indica si el motor puede recibir una petición (reserva la prueba en semiabierto)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self.clock() - self._opened_at < self._open_for or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def abort_probe(self):
+        """Devuelve la prueba reservada por allow() cuando la petición no llegó a enviarse."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, success: bool, open_for: float = None):
+        """
+        Registra el resultado de una petición.
+
+        Argumentos:
+            success: Si la petición terminó sin error.
+            open_for: Abre el circuito de inmediato por esos segundos (p. ej. Retry-After de un 429).
+        """
+        now = self.clock()
+        with self._lock:
+            self._outcomes.append((now, success))
+            self._trim(now)
+
+            if self._opened_at is not None and self._probing:
+                self._probing = False
+                if success:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                    print("[CircuitBreaker] Prueba exitosa: circuito cerrado.")
+                else:
+                    self._opened_at, self._open_for = now, open_for or self.cooldown_s
+                return
+
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            tripped = failures >= self.failure_threshold and failures / len(self._outcomes) >= self.error_rate
+            if open_for or (tripped and self._opened_at is None):
+                self._opened_at, self._open_for = now, open_for or self.cooldown_s
+
+    def error_rate_now(self) -> float:
+        with self._lock:
+            self._trim(self.clock())
+            if not self._outcomes:
+                return 0.0
+            return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+
+class TokenBucket:
+    """Limitador de peticiones por segundo con ráfaga máxima `burst` (reloj sustituible con `clock`)."""
+
+    def __init__(self, rate: float, burst: float = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> bool:
+        with self._lock:
+            self._refill(self.clock())
+            return self._tokens >= 1
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Toma un token, esperando como máximo `timeout` segundos a que se repongan."""
+        deadline = self.clock() + timeout
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class EngineState:
+    """Límites y estado de salud de un motor dentro del router."""
+
+    def __init__(self, name: str, cost: float, rps: float = None, max_concurrency: int = None, breaker: CircuitBreaker = None):
+        self.name = name
+        self.cost = cost
+        self.bucket = TokenBucket(rps) if rps else None
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.quota_errors = 0
+
+    @classmethod
+    def from_env(cls, name: str) -> "EngineState":
+        """
+        Lee STT_<MOTOR>_COST, STT_<MOTOR>_RPS, STT_<MOTOR>_MAX_CONCURRENCY y los
+        parámetros comunes del interruptor STT_ROUTER_BREAKER_FAILURES,
+        STT_ROUTER_BREAKER_ERROR_RATE, STT_ROUTER_BREAKER_WINDOW_S y STT_ROUTER_BREAKER_COOLDOWN_S.
+        """
+        prefix = f"STT_{name.upper().replace('-', '_')}"
+        rps = os.getenv(f"{prefix}_RPS")
+        concurrency = os.getenv(f"{prefix}_MAX_CONCURRENCY")
+        return cls(
+            name,
+            cost=float(os.getenv(f"{prefix}_COST", str(DEFAULT_ENGINE_COST.get(name, 1.0)))),
+            rps=float(rps) if rps else None,
+            max_concurrency=int(concurrency) if concurrency else None,
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("STT_ROUTER_BREAKER_FAILURES", "5")),
+                error_rate=float(os.getenv("STT_ROUTER_BREAKER_ERROR_RATE", "0.5")),
+                window_s=float(os.getenv("STT_ROUTER_BREAKER_WINDOW_S", "30")),
+                cooldown_s=float(os.getenv("STT_ROUTER_BREAKER_COOLDOWN_S", "30")),
+            ),
+        )
+
+
+class EngineRouter:
+    """
+    Router de motores STT del proceso.
+
+    Lleva por motor la latencia reciente (LatencyTracker compartido con el
+    hedging), la tasa de error, un interruptor de circuito y los límites de
+    cuota: peticiones por segundo (token bucket) y concurrencia máxima.
+    Con stt_engine=auto elige el motor sano más barato cuya latencia p95
+    cumple el objetivo; si ninguno lo cumple, el sano más rápido.
+
+    Métodos:
+        rank(target_ms):
+            Ordena los motores candidatos para una petición.
+        acquire(engine, wait_s):
+            Reserva cupo (interruptor, token y concurrencia) para una petición.
+        release(engine, result, elapsed_ms):
+            Libera el cupo y registra el resultado.
+        status():
+            Estado de cada motor para /health.
+    """
+
+    def __init__(self, engines: List[str], target_ms: float = 10000.0, tracker: LatencyTracker = None):
+        self.engines = {name: EngineState.from_env(name) for name in engines}
+        self.target_ms = target_ms
+        self.tracker = tracker or get_latency_tracker()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "EngineRouter":
+        """
+        Construye el router con los motores de STT_ROUTER_ENGINES (por defecto
+        STT_ENGINES) y el objetivo de latencia STT_ROUTER_TARGET_MS.
+        """
+        engines = os.getenv("STT_ROUTER_ENGINES") or os.getenv("STT_ENGINES", "whisper")
+        return cls(
+            [e.strip().lower() for e in engines.split(",") if e.strip()],
+            target_ms=float(os.getenv("STT_ROUTER_TARGET_MS", "10000")),
+        )
+
+    def state(self, engine: str) -> EngineState:
+        with self._lock:
+            if engine not in self.engines:
+                self.engines[engine] = EngineState.from_env(engine)
+            return self.engines[engine]
+
+    def _has_capacity(self, state: EngineState) -> bool:
+        if state.max_concurrency is not None and state.in_flight >= state.max_concurrency:
+            return False
+        return state.bucket is None or state.bucket.available()
+
+    def rank(self, target_ms: float = None) -> List[str]:
+        """
+        Ordena los motores para stt_engine=auto.
+
+        Se descartan los motores con el circuito abierto o sin cupo; entre los
+        que cumplen el objetivo de latencia (o aún no tienen historial) gana el
+        de menor costo y luego el de menor tasa de error y p95. Los que no
+        cumplen el objetivo quedan al final, del más rápido al más lento.
+        """
+        target_ms = target_ms or self.target_ms
+        within, beyond = [], []
+        for name, state in list(self.engines.items()):
+            if state.breaker.state == "open" or not self._has_capacity(state):
+                continue
+            p95 = self.tracker.percentile(name)
+            error_rate = state.breaker.error_rate_now()
+            if p95 is None or p95 <= target_ms:
+                within.append((state.cost, error_rate, p95 or 0.0, name))
+            else:
+                beyond.append((p95, state.cost, name))
+        return [item[-1] for item in sorted(within)] + [item[-1] for item in sorted(beyond)]
+
+    def acquire(self, engine: str, wait_s: float = 0.0):
+        """
+        Reserva cupo para una petición al motor.
+
+        Retorna:
+            str | None: None si se reservó, o el motivo del rechazo
+            ('circuit_open', 'concurrency', 'rate_limit').
+        """
+        state = self.state(engine)
+        if not state.breaker.allow():
+            return "circuit_open"
+        with self._lock:
+            if state.max_concurrency is not None and state.in_flight >= state.max_concurrency:
+                state.throttled += 1
+                state.breaker.abort_probe()
+                return "concurrency"
+            state.in_flight += 1
+        if state.bucket is not None and not state.bucket.acquire(wait_s):
+            with self._lock:
+                state.in_flight -= 1
+                state.throttled += 1
+            state.breaker.abort_probe()
+            return "rate_limit"
+        return None
+
+    def release(self, engine: str, result: TranscriptResult = None, elapsed_ms: float = 0.0):
+        """
+        Libera el cupo y alimenta latencia, tasa de error e interruptor con el resultado.
+
+        Un error de cuota (429) abre el circuito de inmediato por lo que indique
+        Retry-After o, si falta o no se puede interpretar, por el enfriamiento
+        del interruptor.
+        """
+        state = self.state(engine)
+        with self._lock:
+            state.in_flight -= 1
+
+        raw = (result.raw if result is not None else None) or {}
+        error = raw.get("error") if result is not None else "sin resultado"
+        quota = bool(error) and (raw.get("status_code") == 429 or bool(_QUOTA_PATTERN.search(str(error))))
+        open_for = (_retry_after_s(raw.get("retry_after")) or state.breaker.cooldown_s) if quota else None
+
+        with self._lock:
+            state.requests += 1
+            state.failures += bool(error)
+            state.quota_errors += quota
+
+        if not error:
+            self.tracker.record(engine, elapsed_ms)
+        state.breaker.record(not error, open_for=open_for)
+        if quota:
+            print(f"[EngineRouter] {engine} sin cuota (429); circuito abierto {open_for:.1f} s")
+
+    def status(self) -> dict:
+        with self._lock:
+            states = list(self.engines.values())
+        return {
+            state.name: {
+                "circuit": state.breaker.state,
+                "error_rate": round(state.breaker.error_rate_now(), 3),
+                "p95_ms": self.tracker.percentile(state.name),
+                "cost": state.cost,
+                "in_flight": state.in_flight,
+                "max_concurrency": state.max_concurrency,
+                "rps": state.bucket.rate if state.bucket else None,
+                "requests": state.requests,
+                "failures": state.failures,
+                "throttled": state.throttled,
+                "quota_errors": state.quota_errors,
+            }
+            for state in states
+        }
+
+
+class RoutedTranscriber:
+    """
+    Transcriptor que pasa por el EngineRouter.
+
+    Con un solo motor (stt_engine explícito) aplica su interruptor y sus
+    límites: si el circuito está abierto o no hay cupo tras
+    STT_ROUTER_MAX_WAIT_MS, responde de inmediato con error en lugar de
+    insistir. Con stt_engine=auto prueba los motores en el orden del router
+    y pasa al siguiente si uno falla o no tiene cupo. La decisión queda en
+    raw['router'].
+
+    Métodos:
+        transcribe_buffer(buffer, language):
+            Transcribe el audio con el motor elegido por el router.
+    """
+
+    def __init__(self, router: EngineRouter, engine: str = "auto", model_size: str = None, target_ms: float = None, registry=None):
+        self.router = router
+        self.engine = (engine or "auto").strip().lower()
+        self.model_size = model_size
+        self.target_ms = target_ms
+        self.registry = registry or get_registry()
+        self.max_wait_s = float(os.getenv("STT_ROUTER_MAX_WAIT_MS", "2000")) / 1000
+
+    def _error_result(self, language: str, error: str, attempts: list) -> TranscriptResult:
+        return TranscriptResult(
+            text="",
+            confidence=0.0,
+            language=language,
+            timestamp=datetime.utcnow(),
+            provider=self.engine,
+            original_format="wav",
+            raw={"error": error, "router": {"requested": self.engine, "engine": None, "attempts": attempts}},
+        )
+
+    def transcribe_buffer(self, buffer: AudioBuffer, language: str) -> TranscriptResult:
+        candidates = self.router.rank(self.target_ms) if self.engine == "auto" else [self.engine]
+        if not candidates:
+            return self._error_result(language, "Ningún motor disponible: circuitos abiertos o sin cupo.", [])
+
+        attempts, last, last_engine = [], None, None
+        for engine in candidates:
+            # En modo auto no se espera cupo: se pasa al siguiente candidato.
+            rejected = self.router.acquire(engine, 0.0 if self.engine == "auto" else self.max_wait_s)
+            if rejected:
+                attempts.append({"engine": engine, "rejected": rejected})
+                continue
+
+            started = time.perf_counter()
+            result = None
+            try:
+                with self.registry.lease(engine, self.model_size) as adapter:
+                    result = adapter.transcribe_buffer(buffer, language)
+            except Exception as e:
+                result = self._error_result(language, f"Error en el motor {engine}: {e}", attempts)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.router.release(engine, result, elapsed_ms)
+
+            error = (result.raw or {}).get("error")
+            attempts.append({"engine": engine, "elapsed_ms": round(elapsed_ms, 1), "error": error})
+            last, last_engine = result, engine
+            if not error:
+                break
+
+        if last is None:
+            reasons = ", ".join(f"{a['engine']}: {a['rejected']}" for a in attempts)
+            return self._error_result(language, f"Motor no disponible ({reasons}).", attempts)
+
+        last.raw = dict(last.raw or {}, router={
+            "requested": self.engine,
+            "engine": last_engine,
+            "attempts": attempts,
+        })
+        return last
+
+
+_ROUTER = None
+_ROUTER_LOCK = threading.Lock()
+
+
+def get_router() -> EngineRouter:
+    """Router compartido por el proceso."""
+    global _ROUTER
+    with _ROUTER_LOCK:
+        if _ROUTER is None:
+            _ROUTER = EngineRouter.from_env()
+        return _ROUTER
+
+
+def is_routed(engine_name: str) -> bool:
+    """Motores que pasan por el router: 'auto' y los de la nube (cuota y errores remotos)."""
+    return (engine_name or "").strip().lower() in ("auto",) + CLOUD_ENGINES
@@ -1,72 +1,287 @@
 from google.cloud import speech
 from google.oauth2 import service_account
+from adapters.stt.upload_encoder import (
+    encode_upload,
+    encode_upload_parts,
+    engine_encoding,
+    parts_report,
+    scaled_samples,
+    stream_flac,
+)
 from domain.ports import TranscriberPort
-from domain.entities import TranscriptResult
+from domain.entities import AudioBuffer, TranscriptResult
 from pathlib import Path
 from datetime import datetime
 import os
+import threading
+import numpy as np
+import soundfile as sf
 from google.protobuf.json_format import MessageToDict
 
+
+# Límite de Google para audio en línea (10 MB), con margen para el resto de la petición.
+INLINE_MAX_BYTES = 10 * 1000 * 1000 - 64 * 1024
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_speech_client() -> speech.SpeechClient:
+    """
+    Cliente de Google Speech compartido por el proceso: un solo canal gRPC
+    (con sus conexiones HTTP/2) reutilizado por todas las peticiones.
+    Usa las credenciales de GOOGLE_APPLICATION_CREDENTIALS.
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+            if not creds_path:
+                raise ValueError("Falta la variable GOOGLE_APPLICATION_CREDENTIALS en el entorno.")
+            credentials = service_account.Credentials.from_service_account_file(creds_path)
+            _CLIENT = speech.SpeechClient(credentials=credentials)
+        return _CLIENT
+
+
 class GoogleSTTAdapter(TranscriberPort):
     """
     Adaptador agnóstico para Google Cloud Speech-to-Text.
     Utiliza el archivo de credenciales definido en la variable
     de entorno GOOGLE_APPLICATION_CREDENTIALS y devuelve un
     objeto TranscriptResult compatible con el dominio.
+
+    El audio se envía comprimido según STT_GOOGLE_UPLOAD_ENCODING ('flac'
+    por defecto, 'ogg_opus' o 'linear16'); el tamaño enviado y el tiempo
+    de codificación se reportan en raw['upload'].
+
+    El modo de reconocimiento se elige por duración:
+    - 'sync' (recognize) hasta STT_GOOGLE_SYNC_MAX_S (55 s).
+    - 'streaming' (streaming_recognize) hasta STT_GOOGLE_STREAM_MAX_S
+      (290 s), enviando el audio por tramas a medida que se codifica.
+    - 'long_running' (long_running_recognize) por encima.
+    Todos los resultados se unen en un solo texto; el modo usado se
+    reporta en raw['mode'].
+
+    Los modos largos solo se alcanzan si el adaptador recibe el audio
+    completo, que es lo que ocurre por defecto: para Google el VAD solo
+    descarta el audio sin voz y no lo corta (ver app.pipeline._segmenter).
+    Con STT_VAD=1, o con Azure como respaldo en hedging, cada tramo mide
+    como máximo STT_VAD_MAX_SEGMENT_S (55 s) y todas las llamadas usan 'sync'.
+
+    Google rechaza audio en línea de más de 10 MB en recognize y
+    long_running_recognize; por encima de STT_GOOGLE_INLINE_MAX_BYTES el
+    audio se divide en partes que se envían como operaciones separadas
+    (reportado en raw['upload']['parts']).
     """
 
-    def __init__(self):
-        creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-        if not creds_path:
-            raise ValueError("Falta la variable GOOGLE_APPLICATION_CREDENTIALS en el entorno.")
-        credentials = service_account.Credentials.from_service_account_file(creds_path)
-        self.client = speech.SpeechClient(credentials=credentials)
+    ENCODINGS = {
+        "flac": speech.RecognitionConfig.AudioEncoding.FLAC,
+        "ogg_opus": speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+        "linear16": speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        "wav": speech.RecognitionConfig.AudioEncoding.LINEAR16,
+    }
 
-    def transcribe(self, wav_path: Path, language: str) -> TranscriptResult:
-        with open(wav_path, "rb") as audio_file:
-            content = audio_file.read()
+    def __init__(self, client: speech.SpeechClient = None):
+        """
+        Argumentos:
+            client: Cliente ya construido (opcional); por defecto el cliente
+                compartido del proceso (get_speech_client).
+        """
+        self.client = client or get_speech_client()
+        self.upload_encoding = engine_encoding("google")
+        self.sync_max_s = float(os.getenv("STT_GOOGLE_SYNC_MAX_S", "55"))
+        self.stream_max_s = float(os.getenv("STT_GOOGLE_STREAM_MAX_S", "290"))
+        self.chunk_bytes = int(os.getenv("STT_GOOGLE_CHUNK_BYTES", "16384"))
+        self.long_running_timeout = float(os.getenv("STT_GOOGLE_LRR_TIMEOUT_S", "900"))
+        self.inline_max_bytes = int(os.getenv("STT_GOOGLE_INLINE_MAX_BYTES", str(INLINE_MAX_BYTES)))
+
+    def _mode(self, duration: float) -> str:
+        if duration <= self.sync_max_s:
+            return "sync"
+        if duration <= self.stream_max_s:
+            return "streaming"
+        return "long_running"
 
-        audio = speech.RecognitionAudio(content=content)
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,
+    def _config(self, encoding, sample_rate: int, language: str) -> speech.RecognitionConfig:
+        return speech.RecognitionConfig(
+            encoding=encoding,
+            sample_rate_hertz=sample_rate,
             language_code=language,
             enable_automatic_punctuation=True
         )
 
+    def transcribe_buffer(self, buffer: AudioBuffer, language: str) -> TranscriptResult:
+        """
+        Transcribe audio en memoria sin pasar por disco, comprimido con la
+        codificación configurada o, si el Opus original llega sin
+        modificar, con sus bytes tal cual.
+
+        En modo streaming con PCM o FLAC, cada trama se codifica justo antes
+        de enviarse, así que la subida empieza sin esperar a codificar todo.
+        Con ogg_opus el audio se codifica (o se lee, en passthrough) antes de
+        la primera trama; es el formato más pequeño y rápido de codificar.
+        """
+        mode = self._mode(buffer.duration)
+        original_format = buffer.source_format or "wav"
+        step = self.chunk_bytes // 2
+
+        if mode == "streaming" and self.upload_encoding in ("linear16", "wav"):
+            config = self._config(self.ENCODINGS["linear16"], buffer.sample_rate, language)
+            chunks = (
+                self._pcm16(scaled_samples(buffer, i, i + step))
+                for i in range(0, len(buffer.samples), step)
+            )
+            return self._run(mode, config, chunks, language, original_format)
+
+        if mode == "streaming" and self.upload_encoding == "flac":
+            config = self._config(self.ENCODINGS["flac"], buffer.sample_rate, language)
+            upload = {}
+            return self._run(mode, config, stream_flac(buffer, step, upload), language, original_format, upload)
+
+        if mode == "streaming":
+            payload = encode_upload(buffer, self.upload_encoding)
+            config = self._config(self.ENCODINGS[payload.encoding], payload.sample_rate, language)
+            return self._run(mode, config, payload.data, language, original_format, payload.to_dict())
+
+        return self._run_inline(mode, buffer, self.upload_encoding, language, original_format)
+
+    def transcribe(self, wav_path: Path, language: str) -> TranscriptResult:
+        """
+        Transcribe un WAV en disco. En modo streaming el archivo se lee y
+        convierte por bloques mientras se envía, sin cargarlo completo.
+        """
+        info = sf.info(str(wav_path))
+        mode = self._mode(info.duration)
+        config = self._config(self.ENCODINGS["linear16"], info.samplerate, language)
+
+        if mode == "streaming":
+            chunks = (
+                self._pcm16(block if block.ndim == 1 else block.mean(axis=1))
+                for block in sf.blocks(str(wav_path), blocksize=self.chunk_bytes // 2, dtype="float32")
+            )
+            return self._run(mode, config, chunks, language, str(wav_path.suffix))
+
+        samples, sample_rate = sf.read(str(wav_path), dtype="float32", always_2d=True)
+        buffer = AudioBuffer(samples=samples.mean(axis=1), sample_rate=sample_rate)
+        return self._run_inline(mode, buffer, "linear16", language, str(wav_path.suffix))
+
+    def _run_inline(self, mode: str, buffer: AudioBuffer, encoding: str, language: str, original_format: str):
+        """Codifica el audio en partes de hasta inline_max_bytes y lo envía en línea (sync o long_running)."""
+        try:
+            payloads = encode_upload_parts(buffer, encoding, self.inline_max_bytes)
+        except Exception as e:
+            return self._error(f"No se pudo codificar el audio: {e}", language, original_format, mode)
+        config = self._config(self.ENCODINGS[payloads[0].encoding], payloads[0].sample_rate, language)
+        return self._run(
+            mode, config, [p.data for p in payloads], language, original_format, parts_report(payloads)
+        )
+
+    @staticmethod
+    def _pcm16(samples: np.ndarray) -> bytes:
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+    def _chunked(self, content: bytes):
+        for i in range(0, len(content), self.chunk_bytes):
+            yield content[i:i + self.chunk_bytes]
+
+    @staticmethod
+    def _with_upload(raw: dict, upload: dict = None) -> dict:
+        if upload:
+            raw["upload"] = upload
+        return raw
+
+    def _request(self, mode: str, config: speech.RecognitionConfig, content):
+        """
+        Ejecuta el reconocimiento y devuelve (lista de resultados, respuestas en dict).
+
+        Argumentos:
+            mode: 'sync', 'streaming' o 'long_running'.
+            config: Configuración de reconocimiento.
+            content: Bytes del audio, una lista de partes (sync y long_running)
+                o un iterador de tramas (streaming).
+        """
+        if mode == "streaming":
+            chunks = self._chunked(content) if isinstance(content, bytes) else content
+            requests = (speech.StreamingRecognizeRequest(audio_content=chunk) for chunk in chunks)
+            streaming_config = speech.StreamingRecognitionConfig(config=config, interim_results=False)
+            results, responses = [], []
+            for response in self.client.streaming_recognize(config=streaming_config, requests=requests):
+                if response.error.code:
+                    raise RuntimeError(f"Google streaming ({response.error.code}): {response.error.message}")
+                results.extend(r for r in response.results if r.is_final)
+                responses.append(MessageToDict(response._pb))
+            return results, {"responses": responses}
+
+        parts = content if isinstance(content, list) else [content]
+        if mode == "long_running":
+            # Todas las operaciones se lanzan antes de esperar la primera.
+            operations = [
+                self.client.long_running_recognize(config=config, audio=speech.RecognitionAudio(content=part))
+                for part in parts
+            ]
+            responses = [operation.result(timeout=self.long_running_timeout) for operation in operations]
+        else:
+            responses = [
+                self.client.recognize(config=config, audio=speech.RecognitionAudio(content=part))
+                for part in parts
+            ]
+
+        results = [result for response in responses for result in response.results]
+        if len(responses) == 1:
+            return results, MessageToDict(responses[0]._pb)
+        return results, {"parts": [MessageToDict(response._pb) for response in responses]}
+
+    def _error(self, message: str, language: str, original_format: str, mode: str, upload: dict = None):
+        return TranscriptResult(
+            text="",
+            confidence=0.0,
+            language=language,
+            timestamp=datetime.utcnow(),
+            provider="google",
+            original_format=original_format,
+            raw=self._with_upload({"error": message, "mode": mode}, upload)
+        )
+
+    def _run(
+        self,
+        mode: str,
+        config: speech.RecognitionConfig,
+        content,
+        language: str,
+        original_format: str,
+        upload: dict = None,
+    ) -> TranscriptResult:
         try:
-            response = self.client.recognize(config=config, audio=audio)
+            results, raw = self._request(mode, config, content)
+            alternatives = [r.alternatives[0] for r in results if r.alternatives]
+            raw = self._with_upload(dict(raw, mode=mode), upload)
 
-            if not response.results:
+            if not alternatives:
                 return TranscriptResult(
                     text="",
                     confidence=0.0,
                     language=language,
                     timestamp=datetime.utcnow(),
                     provider="google",
-                    original_format=str(wav_path.suffix),
-                    raw={"error": "No transcription results found."}
+                    original_format=original_format,
+                    raw=dict(raw, error="No transcription results found.")
                 )
 
-            result = response.results[0].alternatives[0]
+            # Se unen todos los enunciados; la confianza se pondera por longitud del texto.
+            text = " ".join(a.transcript.strip() for a in alternatives if a.transcript.strip())
+            weights = [max(1, len(a.transcript)) for a in alternatives]
+            confidence = sum(a.confidence * w for a, w in zip(alternatives, weights)) / sum(weights)
+            print(f"[GoogleSTTAdapter] Modo {mode}: {len(alternatives)} resultados unidos.")
+
             return TranscriptResult(
-                text=result.transcript.strip(),
-                confidence=result.confidence,
+                text=text,
+                confidence=confidence,
                 language=language,
                 timestamp=datetime.utcnow(),
                 provider="google",
-                original_format=str(wav_path.suffix),
-                raw = MessageToDict(response._pb)
+                original_format=original_format,
+                raw=raw
             )
 
         except Exception as e:
-            return TranscriptResult(
-                text="",
-                confidence=0.0,
-                language=language,
-                timestamp=datetime.utcnow(),
-                provider="google",
-                original_format=str(wav_path.suffix),
-                raw={"error": str(e)}
-            )
-        
\ No newline at end of file
+            return self._error(str(e), language, original_format, mode, upload)
@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from domain.entities import AudioBuffer, TranscriptResult
+
+
+class LatencyTracker:
+    """
+    Latencias recientes de cada motor STT (ventana deslizante) para
+    estimar percentiles como el p95.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._latencies = {}
+
+    def record(self, engine: str, elapsed_ms: float):
+        with self._lock:
+            self._latencies.setdefault(engine, deque(maxlen=self.window)).append(elapsed_ms)
+
+    def percentile(self, engine: str, pct: float = 95):
+        """Percentil de latencia del motor en ms, o None si aún hay pocas muestras."""
+        with self._lock:
+            values = sorted(self._latencies.get(engine, ()))
+        if len(values) < self.min_samples:
+            return None
+        return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            engines = {engine: len(values) for engine, values in self._latencies.items()}
+        return {
+            engine: {"samples": count, "p50_ms": self.percentile(engine, 50), "p95_ms": self.percentile(engine, 95)}
+            for engine, count in engines.items()
+        }
+
+
+class InFlightCounter:
+    """
+    Llamadas cubiertas en cola o en curso por motor, incluidas las que el
+    llamador ya abandonó: siguen ocupando un hilo del pool y su lease del
+    registro hasta que el motor responde.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def add(self, engine: str):
+        with self._lock:
+            self._counts[engine] = self._counts.get(engine, 0) + 1
+
+    def done(self, engine: str):
+        with self._lock:
+            self._counts[engine] = max(0, self._counts.get(engine, 0) - 1)
+
+    def count(self, engine: str = None) -> int:
+        """Llamadas del motor indicado, o de todos los motores."""
+        with self._lock:
+            if engine is None:
+                return sum(self._counts.values())
+            return self._counts.get(engine, 0)
+
+
+_TRACKER = LatencyTracker()
+_IN_FLIGHT = InFlightCounter()
+_EXECUTOR = None
+_EXECUTOR_WORKERS = 0
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Historial de latencias por motor compartido por el proceso."""
+    return _TRACKER
+
+
+def _executor() -> ThreadPoolExecutor:
+    """
+    Pool compartido para las llamadas cubiertas. No se usa como context
+    manager: la petición perdedora puede seguir corriendo después de que
+    el llamador ya recibió el resultado ganador.
+    """
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR_WORKERS = int(os.getenv("STT_HEDGE_WORKERS", "8"))
+            _EXECUTOR = ThreadPoolExecutor(max_workers=_EXECUTOR_WORKERS, thread_name_prefix="stt-hedge")
+        return _EXECUTOR
+
+
+class HedgedTranscriber:
+    """
+    Transcriptor con peticiones cubiertas (hedging) entre dos motores.
+
+    Envía el audio al motor primario y, si no responde dentro de su p95
+    observado (o de STT_HEDGE_DEFAULT_DELAY_MS mientras no hay historial),
+    lanza la misma petición al motor de respaldo. Gana el primer resultado
+    aceptable (sin error); si el primario falla antes del plazo, el
+    respaldo se lanza de inmediato. La petición perdedora se cancela si aún
+    no empezó o, si ya está en curso, se abandona y su resultado se descarta.
+    El detalle queda en raw['hedge'].
+
+    Una llamada abandonada sigue ocupando un hilo del pool y su lease hasta
+    que el motor responde, así que el respaldo no se lanza (raw['hedge']
+    ['skipped']) si el motor de respaldo ya tiene STT_HEDGE_MAX_IN_FLIGHT
+    llamadas en curso o si todos los hilos del pool están ocupados; en ese
+    caso se espera solo al primario. Solo las respuestas aceptables
+    alimentan el historial de latencias: un error rápido no debe bajar el p95.
+
+    Los motores se toman con registry.lease(engine, model_size); con
+    STTFactory como registro, los motores en la nube pasan por el
+    EngineRouter (interruptor, cuota y concurrencia) igual que sin cobertura.
+
+    Métodos:
+        transcribe_buffer(buffer, language):
+            Transcribe el audio con cobertura entre ambos motores.
+    """
+
+    def __init__(
+        self,
+        registry,
+        primary: str,
+        backup: str,
+        model_size: str = None,
+        default_delay_ms: float = None,
+        tracker: LatencyTracker = None,
+        max_in_flight: int = None,
+    ):
+        self.registry = registry
+        self.primary = primary.strip().lower()
+        self.backup = backup.strip().lower()
+        self.model_size = model_size
+        self.default_delay_ms = default_delay_ms or float(os.getenv("STT_HEDGE_DEFAULT_DELAY_MS", "3000"))
+        self.tracker = tracker or get_latency_tracker()
+        self.max_in_flight = max_in_flight or int(os.getenv("STT_HEDGE_MAX_IN_FLIGHT", "2"))
+
+    def _call(self, engine: str, buffer: AudioBuffer, language: str) -> TranscriptResult:
+        started = time.perf_counter()
+        with self.registry.lease(engine, self.model_size) as adapter:
+            result = adapter.transcribe_buffer(buffer, language)
+        raw = result.raw or {}
+        # Con el router de por medio la latencia ya quedó registrada al liberar el cupo.
+        if not raw.get("error") and "router" not in raw:
+            self.tracker.record(engine, (time.perf_counter() - started) * 1000)
+        return result
+
+    def _submit(self, pool: ThreadPoolExecutor, engine: str, buffer: AudioBuffer, language: str):
+        """Lanza una llamada y la cuenta como en curso hasta que termina o se cancela."""
+        _IN_FLIGHT.add(engine)
+        try:
+            future = pool.submit(self._call, engine, buffer, language)
+        except Exception:
+            _IN_FLIGHT.done(engine)
+            raise
+        future.add_done_callback(lambda _: _IN_FLIGHT.done(engine))
+        return future
+
+    def _skip_backup(self) -> str:
+        """Motivo para no lanzar el respaldo, o None si puede lanzarse."""
+        if _IN_FLIGHT.count(self.backup) >= self.max_in_flight:
+            return f"{self.backup} ya tiene {self.max_in_flight} llamadas en curso"
+        if _IN_FLIGHT.count() >= _EXECUTOR_WORKERS:
+            return "pool de cobertura saturado"
+        return None
+
+    @staticmethod
+    def _acceptable(future) -> bool:
+        if future.exception() is not None:
+            return False
+        return not (future.result().raw or {}).get("error")
+
+    def _error_result(self, engine: str, language: str, error: Exception) -> TranscriptResult:
+        return TranscriptResult(
+            text="",
+            confidence=0.0,
+            language=language,
+            timestamp=datetime.utcnow(),
+            provider=engine,
+            original_format="wav",
+            raw={"error": f"Error en el motor {engine}: {error}"},
+        )
+
+    def transcribe_buffer(self, buffer: AudioBuffer, language: str) -> TranscriptResult:
+        pool = _executor()
+        delay_ms = self.tracker.percentile(self.primary) or self.default_delay_ms
+        started = time.perf_counter()
+
+        futures = {self._submit(pool, self.primary, buffer, language): self.primary}
+        done, _ = wait(futures, timeout=delay_ms / 1000)
+        primary_future = next(iter(futures))
+
+        skipped = None
+        fired = not (done and self._acceptable(primary_future))
+        if fired:
+            skipped = self._skip_backup()
+            fired = skipped is None
+        if skipped:
+            print(f"[HedgedTranscriber] Respaldo {self.backup} omitido: {skipped}")
+        elif fired:
+            print(
+                f"[HedgedTranscriber] {self.primary} sin respuesta aceptable en {delay_ms:.0f} ms; "
+                f"se lanza respaldo {self.backup}"
+            )
+            futures[self._submit(pool, self.backup, buffer, language)] = self.backup
+
+        winner, pending = None, set(futures)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if self._acceptable(future):
+                    winner = future
+                    break
+
+        cancelled = [futures[f] for f in pending if f.cancel()]
+        abandoned = [futures[f] for f in pending if not f.cancelled()]
+
+        # Sin resultado aceptable se devuelve el del primario (o su error) y no hay ganador.
+        source = winner or primary_future
+        if source.exception() is not None:
+            result = self._error_result(futures[source], language, source.exception())
+        else:
+            result = source.result()
+        winner_name = futures[winner] if winner else None
+
+        result.raw = dict(result.raw or {}, hedge={
+            "primary": self.primary,
+            "backup": self.backup,
+            "delay_ms": round(delay_ms, 1),
+            "fired": fired,
+            "skipped": skipped,
+            "winner": winner_name,
+            "cancelled": cancelled,
+            "abandoned": abandoned,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+        print(f"[HedgedTranscriber] Ganó {winner_name or 'ninguno'} ({result.raw['hedge']['elapsed_ms']:.0f} ms)")
+        return result
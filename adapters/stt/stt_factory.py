@@ -1,6 +1,6 @@
-from adapters.stt.whisper_adapter import WhisperAdapter
-from adapters.stt.azure_adapter import AzureSTTAdapter
-from adapters.stt.google_adapter import GoogleSTTAdapter
+from contextlib import nullcontext
+from adapters.stt.engine_registry import get_registry
+from adapters.stt.engine_router import RoutedTranscriber, get_router, is_routed
 
 
 class STTFactory:
@@ -8,34 +8,54 @@ class STTFactory:
     Fábrica de motores Speech-to-Text para Tracky STT.
 
     Selecciona dinámicamente el motor de transcripción a utilizar
-    según el valor proporcionado ('whisper', 'azure', 'google').
+    según el valor proporcionado ('whisper', 'whisper-int8', 'azure', 'google' o 'auto').
+    'whisper-int8' usa Whisper con las capas lineales cuantizadas a int8 para CPU.
+    Las instancias provienen del EngineRegistry del proceso, por lo
+    que los modelos se cargan una sola vez y se comparten entre peticiones.
     Todos los motores devuelven un objeto TranscriptResult.
 
+    Los motores en la nube y 'auto' pasan por el EngineRouter: interruptor
+    de circuito, límites de cuota por motor y, con 'auto', elección del
+    motor sano más barato que cumple el objetivo de latencia.
+
     Métodos:
-        get(engine_name):
-            Retorna una instancia del motor STT correspondiente.
+        get(engine_name, model_size):
+            Retorna la instancia compartida del motor STT correspondiente.
+        lease(engine_name, model_size):
+            Presta el motor compartido mientras dura la transcripción.
     """
 
     @staticmethod
-    def get(engine_name: str):
+    def get(engine_name: str, model_size: str = None, target_ms: float = None):
         """
-        Obtiene una instancia del motor STT correspondiente.
+        Obtiene la instancia compartida del motor STT correspondiente.
 
         Argumentos:
-            engine_name: Nombre del motor de transcripción ('whisper', 'azure', 'google').
+            engine_name: Nombre del motor de transcripción ('whisper', 'whisper-int8', 'azure', 'google', 'auto').
+            model_size: Tamaño del modelo Whisper (opcional).
+            target_ms: Objetivo de latencia para 'auto' (opcional; por defecto STT_ROUTER_TARGET_MS).
 
         Retorna:
             Instancia de un adaptador que implementa la interfaz TranscriberPort.
         """
-        engine_name = (engine_name or "whisper").strip().lower()
+        if is_routed(engine_name):
+            return RoutedTranscriber(get_router(), engine_name, model_size, target_ms)
+        return get_registry().get(engine_name, model_size)
 
-        if engine_name == "azure":
-            print("[STTFactory] Motor seleccionado: Azure Speech-to-Text")
-            return AzureSTTAdapter()
+    @staticmethod
+    def lease(engine_name: str, model_size: str = None, target_ms: float = None):
+        """
+        Presta la instancia compartida del motor STT sin permitir su expulsión.
 
-        if engine_name == "google":
-            print("[STTFactory] Motor seleccionado: Google Cloud Speech-to-Text")
-            return GoogleSTTAdapter()
+        Argumentos:
+            engine_name: Nombre del motor de transcripción ('whisper', 'whisper-int8', 'azure', 'google', 'auto').
+            model_size: Tamaño del modelo Whisper (opcional).
+            target_ms: Objetivo de latencia para 'auto' (opcional; por defecto STT_ROUTER_TARGET_MS).
 
-        print("[STTFactory] Motor seleccionado: Whisper (OpenAI)")
-        return WhisperAdapter()
+        Retorna:
+            Context manager que entrega el adaptador solicitado. Los motores
+            enrutados toman su préstamo del registro en cada llamada.
+        """
+        if is_routed(engine_name):
+            return nullcontext(RoutedTranscriber(get_router(), engine_name, model_size, target_ms))
+        return get_registry().lease(engine_name, model_size)
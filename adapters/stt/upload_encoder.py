@@ -0,0 +1,324 @@
+import io
+import math
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List
+import numpy as np
+import soundfile as sf
+from adapters.decoder import av_backend
+from adapters.decoder.probe import probe
+from domain.entities import AudioBuffer
+
+
+# Codificaciones de subida soportadas: (formato, subtipo de libsndfile, Content-Type).
+ENCODINGS = {
+    "wav": ("WAV", "PCM_16", "audio/wav"),
+    "flac": ("FLAC", "PCM_16", "audio/flac"),
+    "ogg_opus": ("OGG", "OPUS", "audio/ogg; codecs=opus"),
+    "linear16": (None, None, "audio/l16"),
+}
+
+# Frecuencias que Opus acepta; Google exige una de ellas con OGG_OPUS.
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# Codificación por defecto de cada motor en la nube.
+DEFAULT_ENGINE_ENCODINGS = {"azure": "ogg_opus", "google": "flac"}
+
+
+@dataclass
+class UploadPayload:
+    """
+    Audio listo para enviarse a un motor en la nube.
+
+    Atributos:
+        data: Bytes a subir.
+        encoding: Codificación usada ('wav', 'flac', 'ogg_opus', 'linear16').
+        content_type: Content-Type HTTP correspondiente.
+        sample_rate: Frecuencia de muestreo del contenido.
+        encode_ms: Tiempo de codificación (o lectura, en passthrough).
+        passthrough: True si se envían los bytes Opus originales sin recodificar.
+        pcm_bytes: Tamaño que tendría el mismo audio como PCM 16 bits, como referencia.
+    """
+    data: bytes
+    encoding: str
+    content_type: str
+    sample_rate: int
+    encode_ms: float
+    passthrough: bool
+    pcm_bytes: int
+
+    def to_dict(self) -> dict:
+        return {
+            "encoding": self.encoding,
+            "bytes": len(self.data),
+            "pcm_bytes": self.pcm_bytes,
+            "ratio": round(len(self.data) / self.pcm_bytes, 4) if self.pcm_bytes else None,
+            "encode_ms": round(self.encode_ms, 2),
+            "passthrough": self.passthrough,
+        }
+
+
+def engine_encoding(engine: str) -> str:
+    """
+    Codificación de subida configurada para un motor:
+    STT_AZURE_UPLOAD_ENCODING / STT_GOOGLE_UPLOAD_ENCODING, o la de
+    DEFAULT_ENGINE_ENCODINGS.
+    """
+    value = os.getenv(f"STT_{engine.upper()}_UPLOAD_ENCODING", DEFAULT_ENGINE_ENCODINGS.get(engine, "wav"))
+    value = value.strip().lower()
+    return value if value in ENCODINGS else "wav"
+
+
+def _encode_opus(samples: np.ndarray, sample_rate: int) -> bytes:
+    """
+    Codifica Ogg/Opus con libopus vía PyAV (bitrate de voz y complejidad
+    configurables con STT_UPLOAD_OPUS_BITRATE y STT_UPLOAD_OPUS_COMPLEXITY);
+    sin PyAV usa libsndfile, que es varias veces más lento.
+    """
+    out = io.BytesIO()
+    av = av_backend.load_av()
+    if av is None:
+        sf.write(out, samples, sample_rate, format="OGG", subtype="OPUS")
+        return out.getvalue()
+
+    with av.open(out, "w", format="ogg") as container:
+        stream = container.add_stream(
+            "libopus",
+            rate=sample_rate,
+            options={
+                "application": "voip",
+                "compression_level": os.getenv("STT_UPLOAD_OPUS_COMPLEXITY", "3"),
+            },
+        )
+        stream.bit_rate = int(os.getenv("STT_UPLOAD_OPUS_BITRATE", "24000"))
+        stream.layout = "mono"
+        frame = av.AudioFrame.from_ndarray(
+            np.ascontiguousarray(samples, dtype=np.float32)[None, :], format="flt", layout="mono"
+        )
+        frame.sample_rate = sample_rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return out.getvalue()
+
+
+def scaled_samples(buffer: AudioBuffer, start: int = 0, end: int = None) -> np.ndarray:
+    """
+    Copia de las muestras [start, end) con la ganancia de normalización del
+    decodificador (metadata['gain']) aplicada y recortadas a [-1, 1].
+    """
+    samples = buffer.samples[start:end]
+    gain = buffer.metadata.get("gain", 1.0)
+    if gain == 1.0:
+        return np.clip(samples, -1.0, 1.0)
+    scaled = np.multiply(samples, np.float32(gain), dtype=np.float32)
+    return np.clip(scaled, -1.0, 1.0, out=scaled)
+
+
+def _passthrough_source(buffer: AudioBuffer):
+    """
+    Devuelve (ruta, frecuencia) del Ogg/Opus original si el buffer es ese
+    mismo audio sin modificar, o None.
+
+    El audio solo es idéntico al original si la compuerta de ruido decidió
+    no tocarlo ('skip') y el buffer no es un tramo recortado por el VAD
+    (SttService envía el buffer completo, sin 'offset', cuando el VAD
+    encuentra un solo tramo en un audio que no necesita cortarse).
+    """
+    pipeline = buffer.metadata.get("pipeline") or {}
+    if pipeline.get("denoise") != "skip" or "offset" in buffer.metadata:
+        return None
+    if not buffer.source_path or not Path(buffer.source_path).is_file():
+        return None
+    try:
+        info = probe(Path(buffer.source_path))
+    except Exception:
+        return None
+    if info.container == "ogg" and info.codec == "opus" and info.channels == 1:
+        return Path(buffer.source_path), info.sample_rate or 48000
+    return None
+
+
+def encode_upload(buffer: AudioBuffer, encoding: str, passthrough: bool = None) -> UploadPayload:
+    """
+    Codifica un AudioBuffer para subirlo a un motor en la nube.
+
+    Argumentos:
+        buffer: Audio mono a enviar.
+        encoding: Codificación deseada (ver ENCODINGS).
+        passthrough: Permite enviar los bytes Opus originales cuando se pide
+            'ogg_opus' y el audio no fue modificado. Por defecto STT_UPLOAD_PASSTHROUGH (1).
+
+    Retorna:
+        UploadPayload: Bytes a subir y métricas de la codificación.
+    """
+    if passthrough is None:
+        passthrough = os.getenv("STT_UPLOAD_PASSTHROUGH", "1") == "1"
+    pcm_bytes = len(buffer.samples) * 2
+    start = time.perf_counter()
+
+    if encoding == "ogg_opus" and passthrough:
+        source = _passthrough_source(buffer)
+        if source is not None:
+            path, sample_rate = source
+            data = path.read_bytes()
+            return UploadPayload(
+                data, "ogg_opus", ENCODINGS["ogg_opus"][2], sample_rate,
+                (time.perf_counter() - start) * 1000, True, pcm_bytes,
+            )
+
+    if encoding == "ogg_opus" and buffer.sample_rate not in OPUS_SAMPLE_RATES:
+        encoding = "flac"
+
+    fmt, subtype, content_type = ENCODINGS[encoding]
+    samples = scaled_samples(buffer)
+    if fmt is None:
+        data = (samples * 32767).astype("<i2").tobytes()
+    elif encoding == "ogg_opus":
+        data = _encode_opus(samples, buffer.sample_rate)
+    else:
+        out = io.BytesIO()
+        sf.write(out, samples, buffer.sample_rate, format=fmt, subtype=subtype)
+        data = out.getvalue()
+
+    return UploadPayload(
+        data, encoding, content_type, buffer.sample_rate,
+        (time.perf_counter() - start) * 1000, False, pcm_bytes,
+    )
+
+
+def _quiet_cut(samples: np.ndarray, sample_rate: int, target: int, search: int) -> int:
+    """
+    Índice de corte cercano a `target`: el centro del bloque de 100 ms con
+    menos energía a menos de `search` muestras, para no partir palabras.
+    """
+    frame = max(1, sample_rate // 10)
+    lo = max(0, target - search)
+    hi = min(len(samples), target + search)
+    n_frames = (hi - lo) // frame
+    if n_frames < 2:
+        return target
+    frames = samples[lo:lo + n_frames * frame].reshape(n_frames, frame)
+    quietest = int(np.argmin(np.einsum("ij,ij->i", frames, frames)))
+    return lo + quietest * frame + frame // 2
+
+
+def encode_upload_parts(buffer: AudioBuffer, encoding: str, max_bytes: int) -> List[UploadPayload]:
+    """
+    Codifica un AudioBuffer en uno o más payloads de como máximo `max_bytes`.
+
+    Si el audio completo no cabe, se divide en partes de duración similar,
+    cortadas en el bloque más silencioso cercano a cada división, y cada
+    parte se codifica por separado (sin passthrough). Si alguna parte aún
+    excede el límite se vuelve a dividir con una parte más, hasta partes
+    de un segundo.
+
+    Argumentos:
+        buffer: Audio mono a enviar.
+        encoding: Codificación deseada (ver ENCODINGS).
+        max_bytes: Tamaño máximo de cada payload.
+
+    Retorna:
+        list[UploadPayload]: Payloads en orden; uno solo si el audio cabe entero.
+
+    Lanza:
+        ValueError: Si ni con partes de un segundo se respeta el límite.
+    """
+    payloads = [encode_upload(buffer, encoding)]
+    parts = math.ceil(len(payloads[0].data) / max_bytes)
+    n = len(buffer.samples)
+    max_parts = max(1, math.ceil(buffer.duration))
+    while any(len(p.data) > max_bytes for p in payloads):
+        if parts > max_parts:
+            raise ValueError(f"El audio no cabe en partes de {max_bytes} bytes.")
+        # El corte se busca a menos de 5 s (o de un cuarto de parte) de cada división.
+        search = min(5 * buffer.sample_rate, n // parts // 4)
+        cuts = [0] + [
+            _quiet_cut(buffer.samples, buffer.sample_rate, n * i // parts, search)
+            for i in range(1, parts)
+        ] + [n]
+        payloads = [
+            encode_upload(
+                AudioBuffer(
+                    samples=buffer.samples[start:end],
+                    sample_rate=buffer.sample_rate,
+                    source_format=buffer.source_format,
+                    metadata=dict(buffer.metadata, offset=start / buffer.sample_rate),
+                ),
+                encoding,
+            )
+            for start, end in zip(cuts, cuts[1:])
+            if end > start
+        ]
+        parts += 1
+    return payloads
+
+
+def parts_report(payloads: List[UploadPayload]) -> dict:
+    """Métricas de subida de varios payloads sumadas, con el número de partes."""
+    if len(payloads) == 1:
+        return payloads[0].to_dict()
+    data_bytes = sum(len(p.data) for p in payloads)
+    pcm_bytes = sum(p.pcm_bytes for p in payloads)
+    return {
+        "encoding": payloads[0].encoding,
+        "bytes": data_bytes,
+        "pcm_bytes": pcm_bytes,
+        "ratio": round(data_bytes / pcm_bytes, 4) if pcm_bytes else None,
+        "encode_ms": round(sum(p.encode_ms for p in payloads), 2),
+        "passthrough": False,
+        "parts": len(payloads),
+    }
+
+
+def stream_flac(buffer: AudioBuffer, block_samples: int, report: dict) -> Iterator[bytes]:
+    """
+    Codifica FLAC por bloques y entrega los bytes a medida que libsndfile los
+    produce, para que la subida en streaming empiece sin codificar todo el audio.
+
+    La cabecera STREAMINFO se envía tal como se escribe al inicio, sin el
+    total de muestras (libsndfile lo reescribe al cerrar, cuando ya se
+    envió); FLAC lo permite y los decodificadores de flujo no lo necesitan.
+
+    Argumentos:
+        buffer: Audio mono a enviar.
+        block_samples: Muestras que se codifican antes de entregar bytes.
+        report: Diccionario que se completa al terminar con las métricas de
+            UploadPayload.to_dict() (más 'streamed': True).
+
+    Retorna:
+        Iterator[bytes]: Tramas FLAC en orden.
+    """
+    out = io.BytesIO()
+    sent = 0
+    encode_s = 0.0
+    samples = buffer.samples
+    step = max(1, block_samples)
+    with sf.SoundFile(out, "w", samplerate=buffer.sample_rate, channels=1, format="FLAC", subtype="PCM_16") as f:
+        for i in range(0, len(samples), step):
+            start = time.perf_counter()
+            f.write(scaled_samples(buffer, i, i + step))
+            with out.getbuffer() as view:
+                data = bytes(view[sent:])
+            encode_s += time.perf_counter() - start
+            if data:
+                sent += len(data)
+                yield data
+    tail = out.getvalue()[sent:]
+    if tail:
+        sent += len(tail)
+        yield tail
+
+    pcm_bytes = len(samples) * 2
+    report.update({
+        "encoding": "flac",
+        "bytes": sent,
+        "pcm_bytes": pcm_bytes,
+        "ratio": round(sent / pcm_bytes, 4) if pcm_bytes else None,
+        "encode_ms": round(encode_s * 1000, 2),
+        "passthrough": False,
+        "streamed": True,
+    })
@@ -1,12 +1,21 @@
 from pathlib import Path
 from datetime import datetime
+from typing import List
 import whisper
+import torch
 import numpy as np
 import librosa
+import os
 import re
-import soundfile as sf
-from domain.entities import TranscriptResult
+import time
+from domain.entities import AudioBuffer, TranscriptResult
 from domain.utils.lang_mapper import LanguageMapper
+from adapters.stt.whisper_profiles import WhisperProfile, default_profile, get_tracker
+from adapters.stt.whisper_batcher import WhisperBatchScheduler
+
+# Umbrales de ventana sin voz de whisper.transcribe, aplicados también al camino en lote.
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
 
 
 class WhisperAdapter:
@@ -16,50 +25,100 @@ class WhisperAdapter:
     Realiza la transcripción de audio localmente.
     Usa LanguageMapper para normalizar el idioma
     y maneja errores de manera robusta.
+
+    Los parámetros de decodificación vienen de un WhisperProfile (por
+    defecto beam 5, best_of 5, patience 1.0); el tiempo de cada
+    transcripción alimenta el historial de RTF del perfil.
+
+    Con STT_WHISPER_BATCHING=1 (por defecto) los audios de hasta 30 s de
+    peticiones concurrentes se decodifican en micro-lotes a través de un
+    WhisperBatchScheduler compartido por el modelo. El lote reproduce la
+    pasada de model.transcribe sobre una sola ventana: mismas opciones
+    (temperatura 0, beam y patience del perfil, con marcas de tiempo) y la
+    misma supresión de ventanas sin voz. Con temperatura 0 transcribe no
+    tiene temperaturas de respaldo, así que best_of y el umbral de razón de
+    compresión no cambian su resultado y tampoco aplican al lote.
     """
 
+    provider_name = "whisper"
+
     def __init__(self, model_size: str = "medium"):
         """
         Inicializa el modelo Whisper con el tamaño indicado.
         """
-        self.model = whisper.load_model(model_size)
+        self.model_size = model_size
+        self.model = self._load_model(model_size)
+        self.scheduler = (
+            WhisperBatchScheduler.from_env(self.model)
+            if os.getenv("STT_WHISPER_BATCHING", "1") == "1" else None
+        )
         print(f"[WhisperAdapter] Modelo cargado: {model_size}")
 
-    def transcribe(self, wav_path: Path, language: str) -> TranscriptResult:
+    def _load_model(self, model_size: str):
+        """Carga el modelo Whisper fp32."""
+        return whisper.load_model(model_size)
+
+    def close(self):
+        """Libera el planificador de lotes al expulsar el modelo."""
+        if self.scheduler is not None:
+            self.scheduler.close()
+
+    def _error_result(self, language: str, error_detail: str) -> TranscriptResult:
+        return TranscriptResult(
+            text="",
+            confidence=0.0,
+            language=language,
+            timestamp=datetime.utcnow(),
+            provider=self.provider_name,
+            original_format="wav",
+            raw={"error": error_detail},
+        )
+
+    @staticmethod
+    def _clean_text(text: str) -> str:
+        text = re.sub(r"\s+", " ", (text or "").strip())
+        return text.replace("¿ ", "¿").replace(" ?", "?")
+
+    @staticmethod
+    def _normalize_peak(samples) -> np.ndarray:
+        y = np.asarray(samples, dtype=np.float32)
+        peak = np.max(np.abs(y)) if len(y) else 0.0
+        return y / peak if peak > 0 else y
+
+    def _batching(self) -> bool:
+        return self.scheduler is not None and not self.scheduler.closed
+
+    def transcribe_buffer(self, buffer: AudioBuffer, language: str, profile: WhisperProfile = None) -> TranscriptResult:
         """
-        Transcribe un archivo de audio usando Whisper.
+        Transcribe audio en memoria usando Whisper, sin escribir ni releer archivos.
         Si ocurre un error, devuelve un TranscriptResult con el detalle.
         """
-        normalized_lang = LanguageMapper.for_whisper(language)
+        profile = profile or default_profile(self.model_size)
 
-        try:
-            y, sr = librosa.load(str(wav_path), sr=16000)
-            if np.max(np.abs(y)) > 0:
-                y = y / np.max(np.abs(y))
-            sf.write(str(wav_path), y, sr)
-        except Exception as e:
-            error_detail = f"Error al preparar audio: {e}"
-            print(f"[WhisperAdapter] {error_detail}")
-            return TranscriptResult(
-                text="",
-                confidence=0.0,
-                language=normalized_lang,
-                timestamp=datetime.utcnow(),
-                provider="whisper",
-                original_format="wav",
-                raw={"error": error_detail},
-            )
+        if self._batching() and len(buffer.samples) <= whisper.audio.N_SAMPLES:
+            return self.transcribe_batch([buffer], language, profile=profile)[0]
+
+        return self._transcribe_full(buffer, LanguageMapper.for_whisper(language), profile)
+
+    def _transcribe_full(self, buffer: AudioBuffer, normalized_lang: str, profile: WhisperProfile) -> TranscriptResult:
+        """Transcribe con model.transcribe (ventanas de 30 s y supresión de ventanas sin voz)."""
+        y = self._normalize_peak(buffer.samples)
 
         try:
+            started = time.perf_counter()
             result = self.model.transcribe(
-                str(wav_path),
+                y,
                 language=normalized_lang,
                 temperature=0.0,
-                beam_size=5,
-                best_of=5,
-                patience=1.0,
+                beam_size=profile.beam_size,
+                best_of=profile.best_of,
+                patience=profile.patience,
+                logprob_threshold=LOGPROB_THRESHOLD,
+                no_speech_threshold=NO_SPEECH_THRESHOLD,
                 condition_on_previous_text=False,
             )
+            get_tracker().record(profile, time.perf_counter() - started, buffer.duration, self.provider_name)
+            result["profile"] = profile.to_dict()
 
             segments = result.get("segments", [])
             confidence = (
@@ -68,17 +127,15 @@ class WhisperAdapter:
                 else 0.0
             )
 
-            text = result.get("text", "").strip()
-            text = re.sub(r"\s+", " ", text)
-            text = text.replace("¿ ", "¿").replace(" ?", "?")
+            text = self._clean_text(result.get("text", ""))
 
             return TranscriptResult(
                 text=text,
                 confidence=confidence,
                 language=normalized_lang,
                 timestamp=datetime.utcnow(),
-                provider="whisper",
-                original_format="wav",
+                provider=self.provider_name,
+                original_format=buffer.source_format or "wav",
                 raw=result,
             )
 
@@ -89,12 +146,109 @@ class WhisperAdapter:
             error_detail = f"Error durante la transcripción: {e}"
             print(f"[WhisperAdapter] {error_detail}")
 
+        return self._error_result(normalized_lang, error_detail)
+
+    def _mel(self, samples) -> torch.Tensor:
+        return whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(self._normalize_peak(samples)),
+            n_mels=self.model.dims.n_mels,
+        )
+
+    @staticmethod
+    def _no_speech(item) -> bool:
+        """Criterio de model.transcribe para descartar una ventana como silencio."""
+        return item.no_speech_prob > NO_SPEECH_THRESHOLD and item.avg_logprob < LOGPROB_THRESHOLD
+
+    def _decoded_result(self, item, buffer: AudioBuffer, language: str, profile: WhisperProfile, batch_size: int):
+        text = "" if self._no_speech(item) else item.text
         return TranscriptResult(
-            text="",
-            confidence=0.0,
-            language=normalized_lang,
+            text=self._clean_text(text),
+            confidence=float(np.exp(item.avg_logprob)),
+            language=language,
             timestamp=datetime.utcnow(),
-            provider="whisper",
-            original_format="wav",
-            raw={"error": error_detail},
+            provider=self.provider_name,
+            original_format=buffer.source_format or "wav",
+            raw={
+                "text": text,
+                "no_speech": self._no_speech(item),
+                "avg_logprob": item.avg_logprob,
+                "no_speech_prob": item.no_speech_prob,
+                "compression_ratio": item.compression_ratio,
+                "batch_size": batch_size,
+                "profile": profile.to_dict(),
+            },
+        )
+
+    def transcribe_batch(
+        self, buffers: List[AudioBuffer], language: str, profile: WhisperProfile = None
+    ) -> List[TranscriptResult]:
+        """
+        Transcribe varios audios con una sola pasada del modelo.
+
+        Los audios de hasta 30 s se apilan como un lote de espectrogramas
+        log-mel y se decodifican juntos con whisper.decode (a través del
+        planificador de micro-lotes si está activo, de modo que se agrupan
+        también con otras peticiones); los más largos siguen el camino de
+        model.transcribe.
+        """
+        normalized_lang = LanguageMapper.for_whisper(language)
+        profile = profile or default_profile(self.model_size)
+        results = [None] * len(buffers)
+
+        short = [i for i, b in enumerate(buffers) if len(b.samples) <= whisper.audio.N_SAMPLES]
+        for i, buffer in enumerate(buffers):
+            if i not in short:
+                results[i] = self._transcribe_full(buffer, normalized_lang, profile)
+
+        if not short:
+            return results
+
+        options = whisper.DecodingOptions(
+            language=normalized_lang,
+            temperature=0.0,
+            beam_size=profile.beam_size,
+            patience=profile.patience,
+            without_timestamps=False,
+            fp16=False,
         )
+
+        try:
+            started = time.perf_counter()
+            if self._batching():
+                futures = [self.scheduler.submit(self._mel(buffers[i].samples), options) for i in short]
+                try:
+                    decoded = [future.result(timeout=self.scheduler.result_timeout) for future in futures]
+                finally:
+                    for future in futures:
+                        future.cancel()
+            else:
+                mel = torch.stack([self._mel(buffers[i].samples) for i in short]).to(self.model.device)
+                decoded = [(item, len(short)) for item in whisper.decode(self.model, mel, options)]
+            get_tracker().record(
+                profile, time.perf_counter() - started, sum(buffers[i].duration for i in short), self.provider_name
+            )
+
+            for i, (item, batch_size) in zip(short, decoded):
+                results[i] = self._decoded_result(item, buffers[i], normalized_lang, profile, batch_size)
+
+        except Exception as e:
+            error_detail = f"Error durante la transcripción en lote: {str(e) or type(e).__name__}"
+            print(f"[WhisperAdapter] {error_detail}")
+            for i in short:
+                results[i] = self._error_result(normalized_lang, error_detail)
+
+        return results
+
+    def transcribe(self, wav_path: Path, language: str) -> TranscriptResult:
+        """
+        Transcribe un archivo de audio usando Whisper.
+        Si ocurre un error, devuelve un TranscriptResult con el detalle.
+        """
+        try:
+            y, sr = librosa.load(str(wav_path), sr=16000)
+        except Exception as e:
+            error_detail = f"Error al preparar audio: {e}"
+            print(f"[WhisperAdapter] {error_detail}")
+            return self._error_result(LanguageMapper.for_whisper(language), error_detail)
+
+        return self.transcribe_buffer(AudioBuffer(samples=y, sample_rate=sr, source_path=wav_path), language)
@@ -0,0 +1,148 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import torch
+import whisper
+
+
+class WhisperBatchScheduler:
+    """
+    Planificador de micro-lotes frente a un modelo Whisper compartido.
+
+    Las peticiones concurrentes entregan su espectrograma log-mel de 30 s y
+    reciben un Future. Un hilo dedicado toma la primera petición, espera
+    como máximo `max_wait_ms` a que lleguen más (hasta `max_batch`), agrupa
+    las que comparten opciones de decodificación y ejecuta codificador y
+    decodificador una sola vez por grupo con whisper.decode. Así el modelo
+    nunca se usa desde dos hilos a la vez y la CPU trabaja con lotes en
+    lugar de pasadas de tamaño 1.
+
+    Después de close() el planificador rechaza nuevas peticiones con
+    RuntimeError (las ya encoladas se procesan), de modo que ningún Future
+    queda sin resolverse; result_timeout es el plazo que los llamadores
+    deben usar al esperar cada Future.
+
+    Métodos:
+        submit(mel, options):
+            Encola un espectrograma y devuelve un Future con (resultado, tamaño del lote).
+        stats():
+            Devuelve los contadores de lotes y peticiones procesadas.
+        close():
+            Detiene el hilo del planificador.
+    """
+
+    def __init__(self, model, max_batch: int = 8, max_wait_ms: float = 10.0, result_timeout_s: float = 300.0):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.result_timeout = result_timeout_s
+        self.closed = False
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._counters = {"batches": 0, "items": 0, "max_batch_seen": 0}
+
+    @classmethod
+    def from_env(cls, model) -> "WhisperBatchScheduler":
+        """
+        Crea el planificador a partir de STT_WHISPER_MAX_BATCH, STT_WHISPER_MAX_WAIT_MS
+        y STT_WHISPER_BATCH_TIMEOUT_S.
+        """
+        return cls(
+            model,
+            max_batch=int(os.getenv("STT_WHISPER_MAX_BATCH", "8")),
+            max_wait_ms=float(os.getenv("STT_WHISPER_MAX_WAIT_MS", "10")),
+            result_timeout_s=float(os.getenv("STT_WHISPER_BATCH_TIMEOUT_S", "300")),
+        )
+
+    def submit(self, mel: torch.Tensor, options) -> Future:
+        """
+        Encola un espectrograma log-mel (n_mels x 3000) para decodificarlo en lote.
+
+        Argumentos:
+            mel: Espectrograma de una ventana de 30 s.
+            options: whisper.DecodingOptions de la petición.
+
+        Retorna:
+            Future: Se resuelve con (whisper.DecodingResult, tamaño del lote).
+
+        Lanza:
+            RuntimeError: Si el planificador ya se cerró.
+        """
+        future = Future()
+        with self._start_lock:
+            if self.closed:
+                raise RuntimeError("El planificador de lotes de Whisper está cerrado.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+                self._thread.start()
+            self._queue.put((mel, options, future))
+        return future
+
+    def _collect(self):
+        """Toma la primera petición y espera brevemente a que lleguen más."""
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            groups = {}
+            for mel, options, future in batch:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(options, []).append((mel, future))
+
+            for options, items in groups.items():
+                try:
+                    mel = torch.stack([m for m, _ in items]).to(self.model.device)
+                    decoded = whisper.decode(self.model, mel, options)
+                except Exception as e:
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+
+                self._counters["batches"] += 1
+                self._counters["items"] += len(items)
+                self._counters["max_batch_seen"] = max(self._counters["max_batch_seen"], len(items))
+                for (_, future), result in zip(items, decoded):
+                    future.set_result((result, len(items)))
+
+    def stats(self) -> dict:
+        batches = self._counters["batches"]
+        return dict(
+            self._counters,
+            mean_batch=round(self._counters["items"] / batches, 2) if batches else 0.0,
+            queued=self._queue.qsize(),
+        )
+
+    def close(self):
+        """Rechaza nuevas peticiones y detiene el hilo después de los lotes pendientes."""
+        with self._start_lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self._thread is not None:
+                self._queue.put(None)
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+import torch
+import whisper
+from whisper.model import ModelDimensions, Whisper
+from adapters.stt.whisper_adapter import WhisperAdapter
+
+
+class WhisperInt8Adapter(WhisperAdapter):
+    """
+    Adaptador Whisper para CPU con las capas lineales cuantizadas a int8
+    (cuantización dinámica de PyTorch).
+
+    La primera vez carga el modelo fp32, lo cuantiza y guarda los pesos
+    cuantizados en STT_WHISPER_INT8_CACHE_DIR; los arranques siguientes
+    construyen la arquitectura cuantizada y cargan esos pesos directamente,
+    sin leer el checkpoint fp32.
+
+    El directorio de caché es escribible por el servicio, así que el archivo
+    se carga con torch.load(weights_only=True): solo tensores (incluidos los
+    cuantizados), dtypes y tipos básicos, nunca objetos arbitrarios. El
+    archivo se verifica con esa misma carga antes de publicarlo y se escribe
+    en un temporal único por escritor, de modo que dos procesos que
+    cuantizan a la vez no se pisan.
+
+    La transcripción (perfiles, micro-lotes, normalización de idioma) es la
+    misma de WhisperAdapter; los resultados se reportan con provider
+    'whisper-int8'.
+    """
+
+    provider_name = "whisper-int8"
+
+    @staticmethod
+    def _cache_path(model_size: str) -> Path:
+        cache_dir = Path(os.getenv("STT_WHISPER_INT8_CACHE_DIR", "./tmp/models"))
+        return cache_dir / f"whisper-{model_size}-int8-torch{torch.__version__.split('+')[0]}.pt"
+
+    @staticmethod
+    def _quantize(model: Whisper) -> Whisper:
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    @staticmethod
+    def _set_alignment_heads(model: Whisper, model_size: str):
+        heads = getattr(whisper, "_ALIGNMENT_HEADS", {}).get(model_size)
+        if heads is not None:
+            model.set_alignment_heads(heads)
+
+    def _load_model(self, model_size: str):
+        """Carga el modelo int8 desde la caché en disco o lo cuantiza y lo guarda."""
+        cache_path = self._cache_path(model_size)
+        start = time.perf_counter()
+
+        if cache_path.exists():
+            try:
+                checkpoint = torch.load(cache_path, map_location="cpu", weights_only=True)
+                model = self._quantize(Whisper(ModelDimensions(**checkpoint["dims"])))
+                model.load_state_dict(checkpoint["state_dict"])
+                self._set_alignment_heads(model, model_size)
+                print(
+                    f"[WhisperInt8Adapter] Pesos int8 cargados desde caché: {cache_path.name} "
+                    f"({(time.perf_counter() - start) * 1000:.0f} ms)"
+                )
+                return model.eval()
+            except Exception as e:
+                print(f"[WhisperInt8Adapter] Caché int8 inválida, se regenera: {e}")
+
+        fp32 = whisper.load_model(model_size, device="cpu")
+        model = self._quantize(fp32).eval()
+
+        self._save_cache(cache_path, {"dims": asdict(fp32.dims), "state_dict": model.state_dict()})
+        print(
+            f"[WhisperInt8Adapter] Modelo {model_size} cuantizado a int8 "
+            f"({(time.perf_counter() - start) * 1000:.0f} ms)"
+        )
+        return model
+
+    @staticmethod
+    def _save_cache(cache_path: Path, checkpoint: dict):
+        """
+        Escribe el checkpoint en un temporal único del mismo directorio, comprueba
+        que se puede leer con weights_only=True y lo publica con os.replace.
+        Si algo falla el modelo se sigue usando, solo que sin caché.
+        """
+        tmp_path = None
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=cache_path.parent, prefix=f"{cache_path.stem}-", suffix=".tmp", delete=False
+            ) as handle:
+                tmp_path = Path(handle.name)
+                torch.save(checkpoint, handle)
+            torch.load(tmp_path, map_location="cpu", weights_only=True)
+            os.replace(tmp_path, cache_path)
+            print(f"[WhisperInt8Adapter] Pesos int8 guardados en caché: {cache_path.name}")
+        except Exception as e:
+            print(f"[WhisperInt8Adapter] No se pudo guardar la caché int8: {e}")
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+from domain.entities import AudioBuffer, TranscriptResult
+
+
+@dataclass(frozen=True)
+class WhisperProfile:
+    """
+    Perfil de decodificación de Whisper.
+
+    Atributos:
+        name: Nombre del perfil (p. ej. 'small-greedy').
+        model_size: Tamaño del modelo Whisper.
+        beam_size: Ancho del beam search; None para decodificación greedy.
+        best_of: Candidatos muestreados con temperatura > 0 (None en greedy).
+        patience: Paciencia del beam search (None en greedy).
+        prior_rtf: Factor de tiempo real esperado en CPU antes de tener mediciones.
+    """
+    name: str
+    model_size: str
+    beam_size: Optional[int] = None
+    best_of: Optional[int] = None
+    patience: Optional[float] = None
+    prior_rtf: float = 1.0
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "model_size": self.model_size,
+            "beam_size": self.beam_size,
+            "best_of": self.best_of,
+            "patience": self.patience,
+        }
+
+
+# Ordenados del más rápido al más preciso.
+PROFILES = [
+    WhisperProfile("tiny-greedy", "tiny", prior_rtf=0.05),
+    WhisperProfile("base-greedy", "base", prior_rtf=0.08),
+    WhisperProfile("small-greedy", "small", prior_rtf=0.25),
+    WhisperProfile("small-beam", "small", beam_size=5, best_of=5, patience=1.0, prior_rtf=0.5),
+    WhisperProfile("medium-greedy", "medium", prior_rtf=0.7),
+    WhisperProfile("medium-beam", "medium", beam_size=5, best_of=5, patience=1.0, prior_rtf=1.5),
+    WhisperProfile("large-greedy", "large", prior_rtf=1.4),
+    WhisperProfile("large-beam", "large", beam_size=5, best_of=5, patience=1.0, prior_rtf=3.0),
+]
+PROFILES_BY_NAME = {profile.name: profile for profile in PROFILES}
+
+# Con audios muy cortos domina el costo fijo; se mide el RTF con al menos 1 s.
+MIN_RTF_SECONDS = 1.0
+
+
+def default_profile(model_size: str) -> WhisperProfile:
+    """Perfil histórico del servicio para un tamaño: beam 5, best_of 5, patience 1.0."""
+    return PROFILES_BY_NAME.get(f"{model_size}-beam") or WhisperProfile(
+        f"{model_size}-beam", model_size, beam_size=5, best_of=5, patience=1.0
+    )
+
+
+class RtfTracker:
+    """
+    Historial del factor de tiempo real (tiempo de cómputo / duración del
+    audio) medido para cada motor y perfil, como promedio móvil exponencial.
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._rtf = {}
+        self._samples = {}
+
+    def record(self, profile: WhisperProfile, elapsed_s: float, duration_s: float, engine: str = "whisper"):
+        """Registra una transcripción terminada."""
+        rtf = elapsed_s / max(duration_s, MIN_RTF_SECONDS)
+        key = f"{engine}:{profile.name}"
+        with self._lock:
+            previous = self._rtf.get(key)
+            self._rtf[key] = rtf if previous is None else (1 - self.alpha) * previous + self.alpha * rtf
+            self._samples[key] = self._samples.get(key, 0) + 1
+
+    def rtf(self, profile: WhisperProfile, engine: str = "whisper") -> float:
+        """RTF medido del perfil, o su valor a priori si aún no hay mediciones."""
+        with self._lock:
+            return self._rtf.get(f"{engine}:{profile.name}", profile.prior_rtf)
+
+    def predict_ms(self, profile: WhisperProfile, duration_s: float, engine: str = "whisper") -> float:
+        return self.rtf(profile, engine) * max(duration_s, MIN_RTF_SECONDS) * 1000
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                key: {"rtf": round(rtf, 4), "samples": self._samples.get(key, 0)}
+                for key, rtf in self._rtf.items()
+            }
+
+
+class ProfileSelector:
+    """
+    Elige el perfil Whisper más preciso que, según el historial de RTF,
+    termina dentro del presupuesto de latencia.
+
+    Solo considera los tamaños de modelo habilitados (por defecto los de
+    WHISPER_MODEL_SIZES, para no cargar modelos fuera del presupuesto de memoria).
+    """
+
+    def __init__(self, tracker: RtfTracker, allowed_sizes: List[str]):
+        self.tracker = tracker
+        self.allowed_sizes = [s.strip().lower() for s in allowed_sizes if s.strip()]
+
+    def candidates(self, model_size: str = None) -> List[WhisperProfile]:
+        sizes = [model_size.strip().lower()] if model_size else self.allowed_sizes
+        return [p for p in PROFILES if p.model_size in sizes] or [default_profile(sizes[0])]
+
+    def select(self, duration_s: float, max_latency_ms: float, model_size: str = None, engine: str = "whisper"):
+        """
+        Argumentos:
+            duration_s: Duración del audio decodificado.
+            max_latency_ms: Presupuesto de latencia para la transcripción.
+            model_size: Restringe la elección a un tamaño de modelo (opcional).
+            engine: Motor Whisper cuyo historial se consulta ('whisper' o 'whisper-int8').
+
+        Retorna:
+            tuple: (perfil, latencia estimada en ms). Si ninguno cabe, el más rápido.
+        """
+        candidates = self.candidates(model_size)
+        for profile in reversed(candidates):
+            predicted = self.tracker.predict_ms(profile, duration_s, engine)
+            if predicted <= max_latency_ms:
+                return profile, predicted
+        fastest = candidates[0]
+        return fastest, self.tracker.predict_ms(fastest, duration_s, engine)
+
+
+_TRACKER = RtfTracker()
+_SELECTOR = None
+_SELECTOR_LOCK = threading.Lock()
+
+
+def get_tracker() -> RtfTracker:
+    """Historial de RTF compartido por el proceso."""
+    return _TRACKER
+
+
+def get_selector() -> ProfileSelector:
+    """
+    Selector compartido por el proceso; los tamaños habilitados se leen de
+    WHISPER_PROFILE_SIZES o, si no existe, de WHISPER_MODEL_SIZES.
+    """
+    global _SELECTOR
+    with _SELECTOR_LOCK:
+        if _SELECTOR is None:
+            sizes = os.getenv("WHISPER_PROFILE_SIZES") or os.getenv("WHISPER_MODEL_SIZES", "medium")
+            _SELECTOR = ProfileSelector(_TRACKER, sizes.split(","))
+        return _SELECTOR
+
+
+class LatencyBudgetTranscriber:
+    """
+    Transcriptor que aplica un presupuesto de latencia a Whisper.
+
+    Recibe el audio ya decodificado, así que conoce su duración real: elige
+    el perfil con ProfileSelector, toma el modelo correspondiente del
+    EngineRegistry y reporta el perfil elegido en raw['profile'].
+
+    Métodos:
+        transcribe_buffer(buffer, language):
+            Transcribe un audio con el perfil que cabe en el presupuesto.
+        transcribe_batch(buffers, language):
+            Igual, eligiendo el perfil según la duración total del lote.
+    """
+
+    def __init__(
+        self,
+        registry,
+        max_latency_ms: float,
+        model_size: str = None,
+        selector: ProfileSelector = None,
+        engine: str = "whisper",
+    ):
+        self.registry = registry
+        self.max_latency_ms = max_latency_ms
+        self.model_size = model_size
+        self.selector = selector or get_selector()
+        self.engine = engine
+
+    def _report(self, profile: WhisperProfile, predicted_ms: float, started: float) -> dict:
+        return dict(
+            profile.to_dict(),
+            predicted_ms=round(predicted_ms, 1),
+            budget_ms=self.max_latency_ms,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+
+    def transcribe_buffer(self, buffer: AudioBuffer, language: str) -> TranscriptResult:
+        profile, predicted = self.selector.select(buffer.duration, self.max_latency_ms, self.model_size, self.engine)
+        print(
+            f"[LatencyBudget] {buffer.duration:.1f} s de audio, presupuesto {self.max_latency_ms:.0f} ms "
+            f"-> perfil {profile.name} (estimado {predicted:.0f} ms)"
+        )
+        started = time.perf_counter()
+        with self.registry.lease(self.engine, profile.model_size) as adapter:
+            result = adapter.transcribe_buffer(buffer, language, profile=profile)
+        result.raw = dict(result.raw or {}, profile=self._report(profile, predicted, started))
+        return result
+
+    def transcribe_batch(self, buffers: List[AudioBuffer], language: str) -> List[TranscriptResult]:
+        total = sum(buffer.duration for buffer in buffers)
+        profile, predicted = self.selector.select(total, self.max_latency_ms, self.model_size, self.engine)
+        print(
+            f"[LatencyBudget] Lote de {len(buffers)} audios ({total:.1f} s), presupuesto "
+            f"{self.max_latency_ms:.0f} ms -> perfil {profile.name} (estimado {predicted:.0f} ms)"
+        )
+        started = time.perf_counter()
+        with self.registry.lease(self.engine, profile.model_size) as adapter:
+            results = adapter.transcribe_batch(buffers, language, profile=profile)
+        report = self._report(profile, predicted, started)
+        for result in results:
+            result.raw = dict(result.raw or {}, profile=report)
+        return results
@@ -0,0 +1,154 @@
+import math
+import os
+from typing import List
+import numpy as np
+from domain.entities import AudioBuffer, SpeechSegment
+from domain.ports import SegmenterPort
+
+
+# Duración máxima por tramo según el motor: Whisper trabaja en ventanas de
+# 30 s; recognize de Google y el endpoint REST corto de Azure cortan ~60 s.
+ENGINE_MAX_SEGMENT_S = {"whisper": 30.0, "google": 55.0, "azure": 55.0}
+
+
+class EnergyVAD(SegmenterPort):
+    """
+    Detector de actividad de voz basado en energía por trama.
+
+    Calcula la energía en dB de tramas cortas, fija el umbral de voz sobre
+    el piso de ruido estimado, cierra los silencios breves, descarta los
+    ruidos aislados y agrupa los tramos con voz en segmentos que no superan
+    la duración máxima del motor. Los tramos demasiado largos se cortan en
+    la trama más silenciosa de la segunda mitad de la ventana. Con
+    max_segment_s=math.inf no corta: solo delimita la voz y descarta el
+    audio sin voz.
+
+    Métodos:
+        split(buffer):
+            Devuelve los tramos con voz (lista vacía si el audio es silencio).
+    """
+
+    def __init__(
+        self,
+        max_segment_s: float = 30.0,
+        frame_ms: float = 30.0,
+        min_silence_ms: float = 400.0,
+        min_speech_ms: float = 200.0,
+        pad_ms: float = 150.0,
+        margin_db: float = 10.0,
+        dynamic_range_db: float = 45.0,
+        floor_db: float = -60.0,
+    ):
+        self.max_segment_s = max_segment_s
+        self.frame_ms = frame_ms
+        self.min_silence_ms = min_silence_ms
+        self.min_speech_ms = min_speech_ms
+        self.pad_ms = pad_ms
+        self.margin_db = margin_db
+        self.dynamic_range_db = dynamic_range_db
+        self.floor_db = floor_db
+
+    @classmethod
+    def from_env(cls, engine: str = "whisper", max_segment_s: float = None) -> "EnergyVAD":
+        """
+        Crea el detector con la duración máxima indicada, o la del motor (o
+        STT_VAD_MAX_SEGMENT_S), y los parámetros STT_VAD_MIN_SILENCE_MS y
+        STT_VAD_MARGIN_DB.
+        """
+        engine = (engine or "").lower()
+        if max_segment_s is None:
+            default_max = ENGINE_MAX_SEGMENT_S.get(engine, ENGINE_MAX_SEGMENT_S["whisper"])
+            max_segment_s = float(os.getenv("STT_VAD_MAX_SEGMENT_S", str(default_max)))
+        return cls(
+            max_segment_s=max_segment_s,
+            min_silence_ms=float(os.getenv("STT_VAD_MIN_SILENCE_MS", "400")),
+            margin_db=float(os.getenv("STT_VAD_MARGIN_DB", "10")),
+        )
+
+    def _frame_energy_db(self, y: np.ndarray, frame: int) -> np.ndarray:
+        n_frames = len(y) // frame
+        frames = y[:n_frames * frame].reshape(n_frames, frame)
+        energy = np.einsum("ij,ij->i", frames, frames) / frame
+        return 10 * np.log10(energy + 1e-10)
+
+    @staticmethod
+    def _runs(mask: np.ndarray) -> List[List[int]]:
+        """Devuelve los intervalos [inicio, fin) donde la máscara es verdadera."""
+        edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        return [list(r) for r in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))]
+
+    def _split_long(self, start: int, end: int, energy_db: np.ndarray, max_frames: int) -> List[List[int]]:
+        """Corta un tramo largo en la trama más silenciosa de cada ventana."""
+        pieces = []
+        while end - start > max_frames:
+            lo = start + max_frames // 2
+            cut = lo + int(np.argmin(energy_db[lo:start + max_frames]))
+            pieces.append([start, cut])
+            start = cut
+        pieces.append([start, end])
+        return pieces
+
+    def split(self, buffer: AudioBuffer) -> List[SpeechSegment]:
+        """
+        Divide el audio en tramos con voz de duración acotada.
+
+        Argumentos:
+            buffer: Audio mono a segmentar.
+
+        Retorna:
+            List[SpeechSegment]: Tramos en orden temporal; vacía si no hay voz.
+        """
+        sr = buffer.sample_rate
+        frame = max(1, int(sr * self.frame_ms / 1000))
+        energy_db = self._frame_energy_db(buffer.samples, frame)
+        if len(energy_db) == 0:
+            return []
+        # El piso es absoluto: se mide sobre el nivel que tendría el audio con
+        # la ganancia que el decodificador dejó indicada en metadata['gain'].
+        gain = buffer.metadata.get("gain", 1.0)
+        if gain > 0 and gain != 1.0:
+            energy_db = energy_db + 20 * np.log10(gain)
+
+        noise_db = float(np.percentile(energy_db, 10))
+        threshold = max(noise_db + self.margin_db, float(energy_db.max()) - self.dynamic_range_db, self.floor_db)
+        speech = energy_db > threshold
+
+        # Rellena silencios breves dentro de la voz y elimina ruidos aislados.
+        min_gap = int(self.min_silence_ms / self.frame_ms)
+        for start, end in self._runs(~speech):
+            if start > 0 and end < len(speech) and end - start < min_gap:
+                speech[start:end] = True
+        min_run = max(1, int(self.min_speech_ms / self.frame_ms))
+        regions = [r for r in self._runs(speech) if r[1] - r[0] >= min_run]
+        if not regions:
+            return []
+
+        pad = int(self.pad_ms / self.frame_ms)
+        if math.isinf(self.max_segment_s):
+            max_frames = len(energy_db)
+        else:
+            max_frames = max(1, int(self.max_segment_s * 1000 / self.frame_ms))
+        for region in regions:
+            region[0], region[1] = max(0, region[0] - pad), min(len(speech), region[1] + pad)
+
+        # Agrupa tramos consecutivos mientras quepan en la duración máxima.
+        merged = [regions[0]]
+        for start, end in regions[1:]:
+            if end - merged[-1][0] <= max_frames:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([max(start, merged[-1][1]), end])
+
+        pieces = []
+        for start, end in merged:
+            pieces.extend(self._split_long(start, end, energy_db, max_frames))
+
+        seconds = frame / sr
+        total = buffer.duration
+        return [
+            SpeechSegment(
+                start=round(float(start * seconds), 3),
+                end=round(float(total if end >= len(energy_db) else end * seconds), 3),
+            )
+            for start, end in pieces
+        ]
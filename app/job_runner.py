@@ -0,0 +1,210 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import requests
+from adapters.jobs.sqlite_job_queue import SqliteJobQueue, make_owner
+from adapters.out.json_adapter import JsonResponseAdapter
+from app.pipeline import run_transcription
+from app.worker_pool import TranscriptionPool, PoolSaturatedError
+
+
+class JobRunner:
+    """
+    Drena la cola persistente de trabajos hacia el pool de transcripción.
+
+    Cada runner toma un trabajo de la cola, lo ejecuta en el
+    TranscriptionPool, guarda el resultado y, si el trabajo trae
+    callback_url, entrega el resultado por webhook con reintentos.
+
+    Las entregas corren en un pool de hilos propio (STT_JOB_WEBHOOK_WORKERS)
+    y no en el runner: un webhook caído, con sus reintentos y su backoff, no
+    retiene el turno del runner mientras hay trabajos en cola. El estado de
+    la entrega queda en la fila del trabajo (callback_status): 'pending'
+    mientras se intenta y luego 'delivered (...)' o 'failed (...)'.
+
+    Los trabajos se reclaman a nombre de este proceso (`owner`). Cada
+    STT_JOB_HEARTBEAT_S segundos se renueva su latido y se recuperan los
+    trabajos de procesos que murieron, de modo que varios workers de
+    uvicorn pueden compartir la cola sin ejecutar dos veces un trabajo.
+
+    Métodos:
+        start():
+            Recupera trabajos de procesos muertos y lanza los runners.
+        notify():
+            Despierta a los runners cuando llega un trabajo nuevo.
+        stop():
+            Detiene los runners.
+    """
+
+    def __init__(self, queue: SqliteJobQueue, pool: TranscriptionPool, runners: int = 2, poll_interval: float = 1.0):
+        self.queue = queue
+        self.pool = pool
+        self.runners = max(1, runners)
+        self.poll_interval = poll_interval
+        self.callback_retries = int(os.getenv("STT_JOB_CALLBACK_RETRIES", "3"))
+        self.callback_timeout = float(os.getenv("STT_JOB_CALLBACK_TIMEOUT", "10"))
+        self.heartbeat_interval = float(os.getenv("STT_JOB_HEARTBEAT_S", "15"))
+        self.webhook_workers = max(1, int(os.getenv("STT_JOB_WEBHOOK_WORKERS", "4")))
+        self.owner = make_owner()
+
+        self._wakeup = None
+        self._tasks = []
+        self._webhooks = None
+        self._deliveries = set()
+        self._deliveries_lock = threading.Lock()
+
+    @staticmethod
+    async def _in_thread(fn, *args):
+        """Ejecuta una llamada bloqueante en el ejecutor por defecto del event loop."""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+    def start(self):
+        """Recupera los trabajos de procesos muertos y lanza los runners en el event loop."""
+        self._wakeup = asyncio.Event()
+        self._webhooks = ThreadPoolExecutor(max_workers=self.webhook_workers, thread_name_prefix="stt-webhook")
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.runners)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def _recover(self):
+        """Reencola los trabajos huérfanos y notifica los que agotaron sus intentos."""
+        recovered = await self._in_thread(self.queue.requeue_stale, self.owner)
+        if recovered["requeued"]:
+            print(f"[JobRunner] {len(recovered['requeued'])} trabajos interrumpidos devueltos a la cola.")
+            self.notify()
+        for job_id in recovered["failed"]:
+            job = await self._in_thread(self.queue.get, job_id)
+            print(f"[JobRunner] Trabajo {job_id} marcado como fallido: {job['error']}")
+            Path(job["audio_path"]).unlink(missing_ok=True)
+            await self._deliver(job, {"job_id": job_id, "status": "failed", "error": job["error"]})
+
+    async def _heartbeat(self):
+        """Renueva el latido de los trabajos propios y recupera los de procesos muertos."""
+        while True:
+            try:
+                await self._recover()
+                await self._in_thread(self.queue.heartbeat, self.owner)
+            except Exception as e:
+                print(f"[JobRunner] Error en el latido de la cola: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def notify(self):
+        """Despierta a los runners cuando se encola un trabajo nuevo."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self):
+        """
+        Cancela los runners; otro proceso reencola los trabajos en curso cuando
+        caduca su latido. Las entregas que aún no empezaron se descartan y
+        quedan 'pending'; las que están en curso terminan en segundo plano.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._webhooks is not None:
+            with self._deliveries_lock:
+                pending = list(self._deliveries)
+            for future in pending:
+                future.cancel()
+            self._webhooks.shutdown(wait=False)
+            self._webhooks = None
+
+    async def _run(self):
+        while True:
+            job = await self._in_thread(self.queue.claim, self.owner)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(job)
+
+    async def _process(self, job: dict):
+        params = job["params"]
+        audio_path = Path(job["audio_path"])
+
+        while True:
+            try:
+                result, queue_stats = await self.pool.submit(
+                    run_transcription,
+                    audio_path,
+                    params["provider"],
+                    params["mime_type"],
+                    params["lang"],
+                    params["stt_engine"],
+                    params.get("model_size"),
+                )
+                break
+            except PoolSaturatedError as e:
+                await asyncio.sleep(min(e.retry_after, self.poll_interval * 5))
+            except Exception as e:
+                print(f"[JobRunner] Error procesando trabajo {job['job_id']}: {e}")
+                await self._in_thread(self.queue.fail, job["job_id"], str(e))
+                audio_path.unlink(missing_ok=True)
+                await self._deliver(job, {"job_id": job["job_id"], "status": "failed", "error": str(e)})
+                return
+
+        payload = JsonResponseAdapter.serialize(result, mode="full")
+        payload["queue"] = queue_stats
+        await self._in_thread(self.queue.complete, job["job_id"], payload)
+
+        audio_path.unlink(missing_ok=True)
+
+        print(f"[JobRunner] Trabajo completado: {job['job_id']}")
+        await self._deliver(job, {"job_id": job["job_id"], "status": "done", "result": payload})
+
+    async def _deliver(self, job: dict, body: dict):
+        """
+        Marca la entrega como 'pending' y la programa en el pool de webhooks;
+        vuelve sin esperar la respuesta del callback_url.
+        """
+        if not job.get("callback_url") or self._webhooks is None:
+            return
+
+        await self._in_thread(self.queue.mark_callback, job["job_id"], "pending")
+        future = self._webhooks.submit(self._deliver_callback, job["job_id"], job["callback_url"], body)
+        with self._deliveries_lock:
+            self._deliveries.add(future)
+        future.add_done_callback(self._forget_delivery)
+
+    def _forget_delivery(self, future):
+        with self._deliveries_lock:
+            self._deliveries.discard(future)
+
+    def _deliver_callback(self, job_id: str, url: str, body: dict):
+        """Entrega el webhook con reintentos y registra su estado en la fila del trabajo."""
+        try:
+            status = self._post_callback(url, body)
+            self.queue.mark_callback(job_id, status)
+        except Exception as e:
+            print(f"[JobRunner] Error entregando el webhook del trabajo {job_id}: {e}")
+
+    def _post_callback(self, url: str, body: dict) -> str:
+        last_error = ""
+        for attempt in range(self.callback_retries):
+            try:
+                response = requests.post(
+                    url,
+                    data=JsonResponseAdapter.to_json(body),
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.callback_timeout,
+                )
+                if response.status_code < 500:
+                    return f"delivered ({response.status_code})"
+                last_error = f"HTTP {response.status_code}"
+            except requests.exceptions.RequestException as e:
+                last_error = str(e)
+
+            print(f"[JobRunner] Fallo entregando webhook a {url} (intento {attempt + 1}): {last_error}")
+            time.sleep(2 ** attempt)
+
+        return f"failed ({last_error})"
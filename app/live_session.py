@@ -0,0 +1,126 @@
+import os
+import numpy as np
+from domain.entities import AudioBuffer
+from adapters.vad.energy_vad import EnergyVAD
+
+
+SAMPLE_RATE = 16000
+
+
+class LiveTranscriptionSession:
+    """
+    Estado de una sesión de transcripción en vivo (una por conexión WebSocket).
+
+    Mantiene una ventana deslizante de audio 16 kHz en un arreglo de tamaño
+    fijo, de modo que la memoria por conexión está acotada:
+    - Cada intervalo de emisión se transcribe la ventana actual como
+      hipótesis parcial.
+    - Cuando el VAD detecta una pausa al final de la ventana, o la ventana
+      alcanza su duración máxima, el tramo se transcribe como hipótesis
+      final y se descarta de la ventana.
+    - Si el motor no alcanza al audio entrante y la ventana se llena, las
+      tramas nuevas se descartan y se contabilizan.
+
+    Métodos:
+        append(samples):
+            Agrega audio decodificado a la ventana.
+        next_step(closing):
+            Decide qué transcribir ahora: ('partial'|'final', muestras, inicio, fin) o None.
+        commit(samples_used):
+            Descarta de la ventana el tramo ya finalizado.
+    """
+
+    def __init__(
+        self,
+        max_window_s: float = 20.0,
+        min_partial_s: float = 0.5,
+        end_silence_s: float = 0.6,
+    ):
+        self.max_window = int(max_window_s * SAMPLE_RATE)
+        self.min_partial = int(min_partial_s * SAMPLE_RATE)
+        self.end_silence_s = end_silence_s
+        self.vad = EnergyVAD(max_segment_s=max_window_s)
+
+        # El doble de la ventana deja margen mientras el motor procesa.
+        self._window = np.zeros(2 * self.max_window, dtype=np.float32)
+        self._length = 0
+        self._offset = 0
+        self._last_partial_length = 0
+        self.dropped_samples = 0
+
+    @classmethod
+    def from_env(cls) -> "LiveTranscriptionSession":
+        """Crea la sesión a partir de STT_WS_MAX_WINDOW_S y STT_WS_END_SILENCE_MS."""
+        return cls(
+            max_window_s=float(os.getenv("STT_WS_MAX_WINDOW_S", "20")),
+            end_silence_s=float(os.getenv("STT_WS_END_SILENCE_MS", "600")) / 1000,
+        )
+
+    @property
+    def buffered_seconds(self) -> float:
+        return self._length / SAMPLE_RATE
+
+    def append(self, samples: np.ndarray):
+        """Agrega muestras a la ventana; lo que no cabe se descarta y se contabiliza."""
+        room = len(self._window) - self._length
+        accepted = min(room, len(samples))
+        self._window[self._length:self._length + accepted] = samples[:accepted]
+        self._length += accepted
+        self.dropped_samples += len(samples) - accepted
+
+    def _span(self, end: int):
+        return self._offset / SAMPLE_RATE, (self._offset + end) / SAMPLE_RATE
+
+    def next_step(self, closing: bool = False):
+        """
+        Decide el siguiente trabajo de transcripción.
+
+        Argumentos:
+            closing: True cuando el cliente terminó de enviar audio.
+
+        Retorna:
+            tuple | None: (tipo, muestras, inicio_s, fin_s) con una copia de las
+            muestras a transcribir, o None si no hay nada nuevo.
+        """
+        length = self._length
+        if length == 0:
+            return None
+
+        view = self._window[:length]
+        segments = self.vad.split(AudioBuffer(samples=view))
+
+        if not segments:
+            # Solo silencio: se descarta conservando una cola corta por si la voz empieza ahí.
+            keep = int(self.end_silence_s * SAMPLE_RATE)
+            if closing or length > keep:
+                self.commit(length if closing else length - keep)
+            return None
+
+        last_end = int(segments[-1].end * SAMPLE_RATE)
+        paused = length - last_end >= int(self.end_silence_s * SAMPLE_RATE)
+
+        if closing or paused:
+            cut = length
+        elif length >= self.max_window:
+            # Ventana llena: corta al final del penúltimo tramo con voz o, si no hay, al máximo.
+            cut = int(segments[-2].end * SAMPLE_RATE) if len(segments) > 1 else self.max_window
+        else:
+            cut = 0
+
+        if cut:
+            start, end = self._span(cut)
+            return "final", view[:cut].copy(), start, end
+
+        if length - self._last_partial_length < self.min_partial:
+            return None
+        self._last_partial_length = length
+        start, end = self._span(length)
+        return "partial", view.copy(), start, end
+
+    def commit(self, samples_used: int):
+        """Elimina de la ventana las primeras `samples_used` muestras."""
+        remaining = self._length - samples_used
+        self._window[:remaining] = self._window[samples_used:self._length]
+        self._length = remaining
+        self._offset += samples_used
+        self._last_partial_length = 0
@@ -1,18 +1,82 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import List
 from dotenv import load_dotenv
-from fastapi import FastAPI, UploadFile, Form, HTTPException, Query
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 from dataclasses import asdict
 from datetime import datetime
-from domain.entities import AudioMeta
-from domain.service import SttService
-from adapters.decoder.factory import DecoderFactory
-from adapters.denoise.noisereduce_adapter import NoiseReduceAdapter
-from adapters.stt.stt_factory import STTFactory
+from adapters.stt.engine_registry import get_registry
+from adapters.stt.whisper_profiles import get_tracker
+from adapters.stt.hedging import get_latency_tracker
+from adapters.stt.engine_router import get_router
 from adapters.input.input_manager import InputManager
+from adapters.input.remote_client import get_remote_client
 from adapters.out.json_adapter import JsonResponseAdapter
+from adapters.cache.transcript_cache import TranscriptCache
+from adapters.denoise.quality_gate import DenoiseGate
+from adapters.decoder.stream_decoder import StreamFrameDecoder
+from domain.utils.lang_mapper import LanguageMapper
+from app.live_session import LiveTranscriptionSession, SAMPLE_RATE
+from app.resources import get_resource_manager
+from app.pipeline import run_transcription, run_batch_transcription, run_window_transcription
+from app.worker_pool import TranscriptionPool, PoolSaturatedError, PoolNotStartedError
+from app.job_runner import JobRunner
+from adapters.jobs.sqlite_job_queue import SqliteJobQueue
 
 load_dotenv()
 SAVE_INPUT_FILES = False
-app = FastAPI(title="Tracky STT API")
+JOBS_SPOOL_DIR = os.getenv("STT_JOBS_SPOOL_DIR", "./tmp/jobs")
+BATCH_SIZE = int(os.getenv("STT_BATCH_SIZE", "8"))
+WS_EMIT_MS = int(os.getenv("STT_WS_EMIT_MS", "750"))
+POOL = TranscriptionPool.from_env()
+CACHE = TranscriptCache.from_env()
+JOB_QUEUE = SqliteJobQueue.from_env()
+JOB_RUNNER = JobRunner(JOB_QUEUE, POOL, runners=int(os.getenv("STT_JOB_RUNNERS", str(POOL.max_workers))))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicia el pool de trabajo y precarga/calienta los motores STT en segundo
+    plano, de modo que el servicio acepte conexiones mientras se preparan.
+    Antes reparte los hilos de torch, BLAS y numba entre los workers.
+    """
+    get_resource_manager().apply()
+    POOL.start()
+    JOB_RUNNER.start()
+    yield
+    await JOB_RUNNER.stop()
+    POOL.shutdown()
+    await get_remote_client().aclose()
+
+
+app = FastAPI(title="Tracky STT API", lifespan=lifespan)
+
+
+def _cache_key(
+    input_data: dict, provider: str, stt_engine: str, model_size: str, lang: str, cache: str, **settings
+):
+    """
+    Calcula la clave de caché a partir del hash calculado durante la ingesta,
+    o None si la petición pide cache=bypass. Los parámetros adicionales que
+    cambian el resultado (p. ej. max_latency_ms) forman parte de la clave,
+    igual que el proveedor, el tipo MIME y la política de limpieza de
+    DenoiseGate para ese proveedor (STT_DENOISE_POLICY).
+    """
+    if (cache or "").strip().lower() == "bypass":
+        return None
+    settings["denoise"] = DenoiseGate.from_env(stt_engine).policy(provider)
+    return TranscriptCache.key(
+        input_data["sha256"],
+        stt_engine,
+        model_size or get_registry().default_whisper_size,
+        lang,
+        {k: v for k, v in settings.items() if v is not None},
+        provider=provider,
+        mime_type=input_data["mime_type"],
+    )
 
 
 @app.post("/transcribe")
@@ -23,41 +87,356 @@ async def transcribe(
     provider: str = Form("unknown"),
     lang: str = Form("es-MX"),
     stt_engine: str = Form("google"),
-    mode: str = Query("compact", description="Modo de salida: compact o full")
+    model_size: str = Form(None),
+    max_latency_ms: int = Form(None),
+    hedge_engine: str = Form(None),
+    mode: str = Query("compact", description="Modo de salida: compact o full"),
+    cache: str = Query("use", description="Uso de la caché de transcripciones: use o bypass"),
 ):
     """
     Endpoint principal de transcripción.
     Recibe audio desde múltiples fuentes (archivo, URL o Base64),
     detecta automáticamente el formato y devuelve el resultado normalizado.
+
+    El pipeline se ejecuta en el pool de trabajo; si la cola está llena
+    se responde 429 con la cabecera Retry-After. Los audios idénticos ya
+    transcritos se sirven desde la caché salvo que se pida cache=bypass.
+    Con max_latency_ms, Whisper usa el perfil más preciso que cabe en el
+    presupuesto según su historial de RTF (reportado en raw['profile']).
+    Con hedge_engine, si stt_engine supera su p95 de latencia se lanza la
+    misma petición a ese motor y gana la primera respuesta (raw['hedge']).
+    Con stt_engine=auto el EngineRouter elige el motor sano más barato que
+    cumple el objetivo de latencia (max_latency_ms); la decisión va en raw['router'].
     """
     input_manager = InputManager(tmp_dir="./tmp", save_files=SAVE_INPUT_FILES)
 
     try:
-        input_data = input_manager.process_input(
+        input_data = await input_manager.process_input(
             file=file, audio_url=audio_url, audio_base64=audio_base64
         )
     except HTTPException as e:
+        if e.status_code == 413:
+            return JSONResponse(status_code=413, content={"error": e.detail})
         return {"error": e.detail}
 
-    decoder = DecoderFactory.get(
-        provider=provider,
-        file_path=input_data["path"],
-        mime_type=input_data["mime_type"]
+    key = _cache_key(
+        input_data,
+        provider,
+        stt_engine,
+        model_size,
+        lang,
+        cache,
+        max_latency_ms=max_latency_ms,
+        hedge_engine=hedge_engine,
     )
+    cached = CACHE.get(key) if key else None
+    if cached is not None:
+        input_manager.cleanup(input_data["path"])
+        response = JsonResponseAdapter.serialize(cached, mode=mode)
+        response["cache"] = "hit"
+        return response
 
-    denoiser = NoiseReduceAdapter()
-    stt_adapter = STTFactory.get(stt_engine)
+    try:
+        result, queue_stats = await POOL.submit(
+            run_transcription,
+            input_data["path"],
+            provider,
+            input_data["mime_type"],
+            lang,
+            stt_engine,
+            model_size,
+            max_latency_ms,
+            hedge_engine,
+        )
+    except PoolSaturatedError as e:
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)},
+            content={"error": str(e), "queue": {"depth": POOL.depth, "workers": POOL.max_workers}},
+        )
+    except RuntimeError as e:
+        return JSONResponse(status_code=503, headers={"Retry-After": str(POOL.retry_after)}, content={"error": str(e)})
+    finally:
+        input_manager.cleanup(input_data["path"])
 
-    service = SttService(decoder, denoiser, stt_adapter)
-    meta = AudioMeta(
-        provider=provider,
-        content_type=input_data["mime_type"],
-        lang=lang
-    )
+    if key:
+        CACHE.put(key, result)
+
+    response = JsonResponseAdapter.serialize(result, mode=mode)
+    response["queue"] = queue_stats
+    response["cache"] = "miss" if key else "bypass"
+    return response
+
+
+@app.post("/transcribe/batch")
+async def transcribe_batch(
+    files: List[UploadFile] = File(None),
+    audio_urls: List[str] = Form(None),
+    audio_base64_items: List[str] = Form(None),
+    provider: str = Form("unknown"),
+    lang: str = Form("es-MX"),
+    stt_engine: str = Form("google"),
+    model_size: str = Form(None),
+    mode: str = Query("compact", description="Modo de salida: compact o full"),
+    stream: bool = Query(False, description="Entregar resultados como NDJSON a medida que terminan"),
+    cache: str = Query("use", description="Uso de la caché de transcripciones: use o bypass"),
+):
+    """
+    Endpoint de transcripción por lotes.
+    Recibe varios archivos, URLs o cadenas Base64 en una sola petición,
+    los divide en lotes de STT_BATCH_SIZE que se preparan en paralelo y se
+    envían juntos al motor, y devuelve un resultado por elemento.
+    """
+    input_manager = InputManager(tmp_dir="./tmp", save_files=SAVE_INPUT_FILES)
+
+    sources = [("file", {"file": f}, f.filename) for f in files or []]
+    sources += [("url", {"audio_url": url}, url) for url in audio_urls or []]
+    sources += [("base64", {"audio_base64": b64}, f"base64_{i}") for i, b64 in enumerate(audio_base64_items or [])]
+
+    if not sources:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "Debe enviarse al menos un archivo, URL o Base64 de audio."},
+        )
+
+    ready_items, lines = [], []
+    for index, (source, kwargs, name) in enumerate(sources):
+        entry = {"index": index, "source": source, "name": name}
+        try:
+            data = await input_manager.process_input(**kwargs)
+        except HTTPException as e:
+            lines.append(dict(entry, error=e.detail))
+            continue
+
+        data["cache_key"] = _cache_key(data, provider, stt_engine, model_size, lang, cache)
+        cached = CACHE.get(data["cache_key"]) if data["cache_key"] else None
+        if cached is not None:
+            input_manager.cleanup(data["path"])
+            lines.append(dict(entry, cache="hit", **JsonResponseAdapter.serialize(cached, mode=mode)))
+        else:
+            ready_items.append((entry, data))
+
+    async def run_chunk(chunk):
+        items = [
+            {"path": data["path"], "provider": provider, "mime_type": data["mime_type"]}
+            for _, data in chunk
+        ]
+        try:
+            results, queue_stats = await POOL.submit(
+                run_batch_transcription, items, lang, stt_engine, model_size
+            )
+        except (PoolSaturatedError, RuntimeError) as e:
+            retry_after = getattr(e, "retry_after", POOL.retry_after)
+            return [dict(entry, error=str(e), retry_after=retry_after) for entry, _ in chunk]
+        finally:
+            for _, data in chunk:
+                input_manager.cleanup(data["path"])
+
+        chunk_lines = []
+        for (entry, data), result in zip(chunk, results):
+            if data["cache_key"]:
+                CACHE.put(data["cache_key"], result)
+            item = dict(entry, **JsonResponseAdapter.serialize(result, mode=mode))
+            item["queue"] = queue_stats
+            item["cache"] = "miss" if data["cache_key"] else "bypass"
+            chunk_lines.append(item)
+        return chunk_lines
+
+    chunks = [ready_items[i:i + BATCH_SIZE] for i in range(0, len(ready_items), BATCH_SIZE)]
+
+    if stream:
+        async def ndjson():
+            for line in lines:
+                yield JsonResponseAdapter.to_json(line) + "\n"
+            for finished in asyncio.as_completed([run_chunk(chunk) for chunk in chunks]):
+                for line in await finished:
+                    yield JsonResponseAdapter.to_json(line) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    for chunk_lines in await asyncio.gather(*[run_chunk(chunk) for chunk in chunks]):
+        lines.extend(chunk_lines)
+    lines.sort(key=lambda line: line["index"])
+    return {"count": len(lines), "results": lines}
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = None,
+    audio_url: str = Form(None),
+    audio_base64: str = Form(None),
+    provider: str = Form("unknown"),
+    lang: str = Form("es-MX"),
+    stt_engine: str = Form("google"),
+    model_size: str = Form(None),
+    callback_url: str = Form(None),
+):
+    """
+    Encola una transcripción asíncrona y devuelve su identificador de inmediato.
+    El audio se guarda en disco y el trabajo en la cola persistente, por lo que
+    sobrevive a reinicios. Si se envía callback_url, el resultado se entrega por webhook.
+    """
+    input_manager = InputManager(tmp_dir=JOBS_SPOOL_DIR, save_files=True)
+
+    try:
+        input_data = await input_manager.process_input(
+            file=file, audio_url=audio_url, audio_base64=audio_base64
+        )
+    except HTTPException as e:
+        return JSONResponse(status_code=e.status_code, content={"error": e.detail})
+
+    params = {
+        "provider": provider,
+        "mime_type": input_data["mime_type"],
+        "lang": lang,
+        "stt_engine": stt_engine,
+        "model_size": model_size,
+    }
+    job_id = JOB_QUEUE.enqueue(params, input_data["path"], callback_url)
+    JOB_RUNNER.notify()
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    mode: str = Query("compact", description="Modo de salida: compact o full")
+):
+    """
+    Consulta el estado de un trabajo asíncrono y, si terminó, su resultado.
+    """
+    job = JOB_QUEUE.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Trabajo no encontrado: {job_id}"})
 
-    result = service.run(input_data["path"], meta)
-    input_manager.cleanup(input_data["path"])
-    return JsonResponseAdapter.serialize(result, mode=mode)
+    if job["result"] and mode.lower() == "compact":
+        job["result"].pop("raw", None)
+
+    job.pop("audio_path", None)
+    return job
+
+
+@app.websocket("/ws/transcribe")
+async def ws_transcribe(
+    websocket: WebSocket,
+    lang: str = "es",
+    stt_engine: str = "whisper",
+    model_size: str = None,
+    audio_format: str = Query("pcm16", alias="format"),
+    sample_rate: int = SAMPLE_RATE,
+    emit_ms: int = None,
+):
+    """
+    Transcripción en vivo por WebSocket.
+
+    El cliente envía tramas binarias (PCM pcm16/f32 mono a `sample_rate`, o
+    paquetes Opus crudos con format=opus) y un mensaje de texto "end" al
+    terminar. El servidor responde con mensajes JSON:
+    - {"type": "partial", ...}: hipótesis de la ventana actual, cada `emit_ms`.
+    - {"type": "final", ...}: tramo cerrado por una pausa o por la ventana máxima.
+    - {"type": "done"}: fin de la sesión.
+    - {"type": "error", ...}: una trama que no se pudo decodificar (se
+      descarta y la sesión sigue) o un fallo del servidor (se cierra con 1011).
+
+    Las transcripciones pasan por el pool de trabajo y usan el modelo
+    compartido del EngineRegistry.
+    """
+    await websocket.accept()
+    try:
+        decoder = StreamFrameDecoder(audio_format, sample_rate)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1003)
+        return
+
+    session = LiveTranscriptionSession.from_env()
+    interval = (emit_ms or WS_EMIT_MS) / 1000
+    language = LanguageMapper.for_whisper(lang)
+    closing = asyncio.Event()
+
+    await websocket.send_json({
+        "type": "ready",
+        "sample_rate": SAMPLE_RATE,
+        "emit_ms": int(interval * 1000),
+        "max_window_s": session.max_window / SAMPLE_RATE,
+    })
+
+    async def receive():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    try:
+                        samples = decoder.feed(message["bytes"])
+                    except Exception as e:
+                        print(f"[WebSocket] Trama descartada ({audio_format}): {e}")
+                        await websocket.send_json({"type": "error", "error": f"Trama inválida: {e}"})
+                        continue
+                    session.append(samples)
+                elif (message.get("text") or "").strip().lower() == "end":
+                    break
+        finally:
+            session.append(decoder.flush())
+            closing.set()
+
+    async def emit():
+        while True:
+            try:
+                await asyncio.wait_for(closing.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            done = closing.is_set()
+
+            while True:
+                step = session.next_step(closing=done)
+                if step is None:
+                    break
+                kind, samples, start, end = step
+                try:
+                    result, _ = await POOL.submit(run_window_transcription, samples, lang, stt_engine, model_size)
+                except PoolSaturatedError as e:
+                    if kind == "partial":
+                        break
+                    await asyncio.sleep(e.retry_after)
+                    continue
+
+                if kind == "final":
+                    session.commit(len(samples))
+
+                message = {
+                    "type": kind,
+                    "text": result.text,
+                    "start": round(start, 3),
+                    "end": round(end, 3),
+                    "language": language,
+                }
+                if kind == "final":
+                    message["confidence"] = result.confidence
+                if result.raw and result.raw.get("error"):
+                    message["error"] = result.raw["error"]
+                if session.dropped_samples:
+                    message["dropped_s"] = round(session.dropped_samples / SAMPLE_RATE, 3)
+                await websocket.send_json(message)
+
+                if kind == "partial":
+                    break
+
+            if done:
+                await websocket.send_json({"type": "done"})
+                return
+
+    try:
+        await asyncio.gather(receive(), emit())
+        await websocket.close()
+    except PoolNotStartedError as e:
+        print(f"[WebSocket] Sesión en vivo cancelada: {e}")
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1011)
+    except (WebSocketDisconnect, RuntimeError):
+        # Starlette lanza RuntimeError al enviar por un socket que el cliente ya cerró.
+        print("[WebSocket] Cliente desconectado durante la sesión en vivo.")
 
 
 @app.get("/health")
@@ -68,7 +447,22 @@ async def health():
     return {
         "status": "ok",
         "service": "Tracky STT",
-        "uptime": datetime.utcnow().isoformat()
+        "uptime": datetime.utcnow().isoformat(),
+        "cache": CACHE.stats(),
+        "whisper_rtf": get_tracker().snapshot(),
+        "engine_latency": get_latency_tracker().snapshot(),
+        "router": get_router().status(),
+        "threads": get_resource_manager().status(),
     }
 
 
+@app.get("/ready")
+async def ready():
+    """
+    Endpoint de disponibilidad.
+    Responde 200 solo cuando todos los motores configurados se cargaron y
+    su inferencia de calentamiento respondió sin error (en modo procesos,
+    en todos los procesos); en otro caso responde 503.
+    """
+    status = get_registry().status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
@@ -0,0 +1,184 @@
+import math
+import os
+from pathlib import Path
+from typing import List
+from domain.entities import AudioBuffer, AudioMeta, TranscriptResult
+from domain.service import SttService
+from adapters.decoder.factory import DecoderFactory
+from adapters.denoise.noisereduce_adapter import NoiseReduceAdapter
+from adapters.denoise.quality_gate import DenoiseGate
+from adapters.stt.stt_factory import STTFactory
+from adapters.stt.engine_registry import WHISPER_ENGINES, CLOUD_ENGINES, get_registry
+from adapters.stt.whisper_profiles import LatencyBudgetTranscriber
+from adapters.stt.hedging import HedgedTranscriber
+from adapters.vad.energy_vad import ENGINE_MAX_SEGMENT_S, EnergyVAD
+
+
+# Motores con modos propios para audio largo: el VAD no los corta por defecto.
+LONG_AUDIO_ENGINES = ("google",)
+
+
+def _segmenter(stt_engine: str, hedge_engine: str = None) -> EnergyVAD:
+    """
+    Devuelve el VAD de la petición.
+
+    Todos los motores pasan por el VAD, así que el audio sin voz se descarta
+    antes de cualquier llamada. Los motores sin modo para audio largo
+    (Whisper, con su ventana de 30 s, y Azure, cuyo endpoint REST corto
+    rechaza o trunca audio de más de ~60 s) reciben el audio cortado en los
+    silencios, en tramos de hasta la duración máxima del motor. Google tiene
+    modos para audio largo (streaming, long_running): por defecto el VAD no
+    lo corta y, si hay voz, le llega el audio completo. STT_VAD=1 corta
+    también para Google.
+
+    Con motor de respaldo (hedging) se corta si alguno de los dos lo
+    necesita, con la duración máxima más corta de ambos.
+    """
+    engines = [e.strip().lower() for e in (stt_engine or "whisper", hedge_engine) if e and e.strip()]
+    split = os.getenv("STT_VAD", "") == "1" or any(e not in LONG_AUDIO_ENGINES for e in engines)
+    if not split:
+        return EnergyVAD.from_env(engines[0], max_segment_s=math.inf)
+    shortest = min(engines, key=lambda e: ENGINE_MAX_SEGMENT_S.get(e, ENGINE_MAX_SEGMENT_S["whisper"]))
+    return EnergyVAD.from_env(shortest)
+
+
+def run_transcription(
+    path: Path,
+    provider: str,
+    mime_type: str,
+    lang: str,
+    stt_engine: str,
+    model_size: str = None,
+    max_latency_ms: float = None,
+    hedge_engine: str = None,
+) -> TranscriptResult:
+    """
+    Ejecuta el pipeline completo (decodificación, limpieza y transcripción)
+    para un archivo ya recibido. La limpieza la decide DenoiseGate según
+    la calidad del audio, el motor y el proveedor. El audio sin voz se
+    descarta sin llamar al motor; con Whisper, Azure y el motor automático
+    se corta además en los silencios y los tramos se transcriben en
+    paralelo (STT_SEGMENT_WORKERS); ver _segmenter.
+
+    Es una función de módulo para poder ejecutarse tanto en hilos como
+    en procesos del pool de trabajo; cada proceso usa su propio EngineRegistry.
+
+    Argumentos:
+        path: Ruta del archivo de audio recibido.
+        provider: Proveedor o fuente del audio.
+        mime_type: Tipo MIME detectado en la entrada.
+        lang: Código de idioma solicitado.
+        stt_engine: Motor STT a utilizar.
+        model_size: Tamaño del modelo Whisper (opcional).
+        max_latency_ms: Presupuesto de latencia para Whisper (opcional; por
+            defecto STT_WHISPER_MAX_LATENCY_MS). Con presupuesto, el perfil de
+            decodificación se elige según la duración del audio decodificado.
+        hedge_engine: Motor de respaldo para peticiones cubiertas (opcional; por
+            defecto STT_HEDGE_ENGINE). Si el motor principal supera su p95 de
+            latencia se lanza la misma petición al respaldo y gana la primera
+            respuesta aceptable (reportado en raw['hedge']).
+
+    Retorna:
+        TranscriptResult: Resultado de la transcripción.
+    """
+    decoder = DecoderFactory.get(provider=provider, file_path=path, mime_type=mime_type)
+    denoiser = NoiseReduceAdapter()
+    meta = AudioMeta(provider=provider, content_type=mime_type, lang=lang)
+
+    def build_service(stt_adapter, segmenter: EnergyVAD = None) -> SttService:
+        return SttService(
+            decoder,
+            denoiser,
+            stt_adapter,
+            DenoiseGate.from_env(stt_engine),
+            segmenter=segmenter or _segmenter(stt_engine),
+            segment_workers=int(os.getenv("STT_SEGMENT_WORKERS", "4")),
+        )
+
+    max_latency_ms = max_latency_ms or float(os.getenv("STT_WHISPER_MAX_LATENCY_MS", "0"))
+    engine_name = (stt_engine or "whisper").strip().lower()
+    if engine_name == "auto":
+        # El router elige el motor por petición con max_latency_ms como objetivo.
+        with STTFactory.lease(engine_name, model_size, target_ms=max_latency_ms or None) as stt_adapter:
+            return build_service(stt_adapter).run(path, meta)
+
+    if max_latency_ms and engine_name not in CLOUD_ENGINES:
+        engine_name = engine_name if engine_name in WHISPER_ENGINES else "whisper"
+        budgeted = LatencyBudgetTranscriber(get_registry(), max_latency_ms, model_size, engine=engine_name)
+        return build_service(budgeted).run(path, meta)
+
+    hedge_engine = (hedge_engine or os.getenv("STT_HEDGE_ENGINE", "")).strip().lower()
+    if hedge_engine and hedge_engine != engine_name:
+        # STTFactory.lease hace pasar a los motores en la nube por el EngineRouter.
+        hedged = HedgedTranscriber(STTFactory, engine_name, hedge_engine, model_size)
+        return build_service(hedged, _segmenter(engine_name, hedge_engine)).run(path, meta)
+
+    with STTFactory.lease(stt_engine, model_size) as stt_adapter:
+        return build_service(stt_adapter).run(path, meta)
+
+
+def run_batch_transcription(
+    items: List[dict],
+    lang: str,
+    stt_engine: str,
+    model_size: str = None,
+) -> List[TranscriptResult]:
+    """
+    Ejecuta el pipeline para un lote de archivos ya recibidos.
+
+    Decodifica y limpia los audios en paralelo (STT_BATCH_PREP_WORKERS hilos)
+    y los envía juntos al motor, amortizando la llamada al modelo.
+
+    Argumentos:
+        items: Lista de diccionarios con 'path', 'provider' y 'mime_type'.
+        lang: Código de idioma solicitado.
+        stt_engine: Motor STT a utilizar.
+        model_size: Tamaño del modelo Whisper (opcional).
+
+    Retorna:
+        List[TranscriptResult]: Resultados en el mismo orden que items.
+    """
+    denoiser = NoiseReduceAdapter()
+    batch = [
+        (
+            DecoderFactory.get(provider=item["provider"], file_path=item["path"], mime_type=item["mime_type"]),
+            item["path"],
+            AudioMeta(provider=item["provider"], content_type=item["mime_type"], lang=lang),
+        )
+        for item in items
+    ]
+
+    with STTFactory.lease(stt_engine, model_size) as stt_adapter:
+        service = SttService(None, denoiser, stt_adapter, DenoiseGate.from_env(stt_engine))
+        return service.run_batch(batch, max_workers=int(os.getenv("STT_BATCH_PREP_WORKERS", "4")))
+
+
+def run_window_transcription(
+    samples,
+    lang: str,
+    stt_engine: str = "whisper",
+    model_size: str = None,
+) -> TranscriptResult:
+    """
+    Transcribe una ventana de audio en vivo (float32 mono 16 kHz) con el
+    motor compartido del EngineRegistry.
+
+    Las ventanas duran como máximo 30 s, así que con Whisper se usa una sola
+    pasada de whisper.decode (transcribe_batch) en lugar del bucle de
+    ventanas de transcribe; el idioma se normaliza con LanguageMapper dentro
+    del adaptador.
+
+    Argumentos:
+        samples: Muestras de la ventana.
+        lang: Código de idioma solicitado.
+        stt_engine: Motor STT a utilizar.
+        model_size: Tamaño del modelo Whisper (opcional).
+
+    Retorna:
+        TranscriptResult: Hipótesis para la ventana.
+    """
+    buffer = AudioBuffer(samples=samples, source_format="stream")
+    with STTFactory.lease(stt_engine, model_size) as stt_adapter:
+        if hasattr(stt_adapter, "transcribe_batch"):
+            return stt_adapter.transcribe_batch([buffer], language=lang)[0]
+        return stt_adapter.transcribe_buffer(buffer, language=lang)
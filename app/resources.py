@@ -0,0 +1,286 @@
+import math
+import os
+import sys
+import threading
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+PROC_CGROUP = Path("/proc/self/cgroup")
+
+# Variables que leen los runtimes nativos al cargarse (OpenMP, MKL, OpenBLAS, numba).
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMBA_NUM_THREADS")
+
+
+def _affinity_cpus() -> int:
+    """Núcleos en los que el proceso puede ejecutarse (afinidad / cpuset)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def _own_cgroups(proc_cgroup: Path = PROC_CGROUP) -> dict:
+    """
+    Rutas del cgroup del proceso según /proc/self/cgroup: la de la jerarquía
+    unificada (v2, línea "0::<ruta>") y la del controlador cpu de v1.
+
+    Retorna:
+        dict: {"v2": ruta, "cpu": ruta}; "/" si el archivo no existe o no la trae.
+    """
+    paths = {"v2": "/", "cpu": "/"}
+    try:
+        lines = proc_cgroup.read_text().splitlines()
+    except OSError:
+        return paths
+    for line in lines:
+        hierarchy, _, rest = line.partition(":")
+        controllers, _, path = rest.partition(":")
+        if hierarchy == "0" and not controllers:
+            paths["v2"] = path or "/"
+        elif "cpu" in controllers.split(","):
+            paths["cpu"] = path or "/"
+    return paths
+
+
+def _levels(mount: Path, path: str) -> list:
+    """Directorios del cgroup desde el del proceso hasta la raíz del montaje, los que existan."""
+    parts = [p for p in path.strip("/").split("/") if p]
+    levels = [mount.joinpath(*parts[:i]) for i in range(len(parts), -1, -1)]
+    return [level for level in levels if level.is_dir()]
+
+
+def _cgroup_quota(root: Path = CGROUP_ROOT, proc_cgroup: Path = PROC_CGROUP):
+    """
+    Lee la cuota de CPU del cgroup del proceso.
+
+    El cgroup propio se resuelve con /proc/self/cgroup y se recorre la
+    jerarquía hasta la raíz del montaje: la cuota efectiva es la menor de
+    todos los niveles, porque un padre limita a todos sus hijos. Los niveles
+    que no existen bajo el montaje (p. ej. un contenedor que solo ve su
+    propio cgroup en la raíz) se omiten.
+
+    Retorna:
+        float | None: Núcleos equivalentes permitidos (cuota / periodo), o None sin límite.
+    """
+    own = _own_cgroups(proc_cgroup)
+    quotas, found = [], False
+    for level in _levels(root, own["v2"]):
+        try:
+            # cgroup v2: "max 100000" o "<cuota> <periodo>".
+            quota, period = (level / "cpu.max").read_text().split()[:2]
+        except (OSError, ValueError):
+            continue
+        found = True
+        if quota != "max":
+            quotas.append(int(quota) / int(period))
+    if found:
+        return min(quotas) if quotas else None
+
+    for level in _levels(root / "cpu", own["cpu"]):
+        try:
+            # cgroup v1: cuota -1 significa sin límite.
+            quota = int((level / "cpu.cfs_quota_us").read_text())
+            period = int((level / "cpu.cfs_period_us").read_text())
+        except (OSError, ValueError):
+            continue
+        if quota > 0 and period > 0:
+            quotas.append(quota / period)
+    return min(quotas) if quotas else None
+
+
+@dataclass
+class ThreadBudget:
+    """
+    Reparto de hilos de cómputo del proceso.
+
+    Atributos:
+        affinity_cpus: Núcleos visibles por afinidad.
+        cgroup_quota: Núcleos equivalentes de la cuota del cgroup (None sin límite).
+        effective_cpus: Núcleos usables por todos los procesos del servicio.
+        processes: Procesos uvicorn que comparten la máquina.
+        slots: Transcripciones simultáneas por proceso (workers del pool).
+        intra_op: Hilos por transcripción para torch, BLAS y numba.
+        inter_op: Hilos inter-op de torch.
+        applied: Librerías a las que se aplicó el límite y su resultado.
+    """
+    affinity_cpus: int
+    cgroup_quota: float
+    effective_cpus: int
+    processes: int
+    slots: int
+    intra_op: int
+    inter_op: int
+    applied: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ResourceManager:
+    """
+    Reparte los núcleos disponibles entre torch (Whisper), BLAS de NumPy/SciPy
+    (lfilter, noisereduce) y numba (librosa), para que varios procesos
+    uvicorn y los workers del pool no creen cada uno un hilo por núcleo.
+
+    Los núcleos efectivos son el mínimo entre la afinidad del proceso y la
+    cuota de CPU de su cgroup (la menor de la jerarquía); se dividen entre procesos x workers del pool y
+    cada transcripción recibe ese número de hilos intra-op.
+
+    Métodos:
+        plan():
+            Calcula el reparto sin aplicarlo.
+        apply():
+            Aplica el reparto a las librerías cargadas y lo memoriza.
+        status():
+            Devuelve el reparto efectivo para /health.
+    """
+
+    def __init__(
+        self,
+        processes: int = 1,
+        slots: int = 2,
+        cpu_limit: float = None,
+        inter_op: int = 1,
+        enabled: bool = True,
+        cgroup_root: Path = CGROUP_ROOT,
+        proc_cgroup: Path = PROC_CGROUP,
+    ):
+        self.processes = max(1, processes)
+        self.slots = max(1, slots)
+        self.cpu_limit = cpu_limit
+        self.inter_op = max(1, inter_op)
+        self.enabled = enabled
+        self.cgroup_root = Path(cgroup_root)
+        self.proc_cgroup = Path(proc_cgroup)
+
+        self._budget = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResourceManager":
+        """
+        Construye el gestor a partir de WEB_CONCURRENCY (procesos uvicorn),
+        STT_POOL_WORKERS, STT_CPU_LIMIT (núcleos, opcional),
+        STT_TORCH_INTEROP_THREADS y STT_THREAD_BUDGET ('auto' u 'off').
+        """
+        cpu_limit = os.getenv("STT_CPU_LIMIT")
+        return cls(
+            processes=int(os.getenv("WEB_CONCURRENCY", "1")),
+            slots=int(os.getenv("STT_POOL_WORKERS", "2")),
+            cpu_limit=float(cpu_limit) if cpu_limit else None,
+            inter_op=int(os.getenv("STT_TORCH_INTEROP_THREADS", "1")),
+            enabled=os.getenv("STT_THREAD_BUDGET", "auto").strip().lower() != "off",
+        )
+
+    def plan(self) -> ThreadBudget:
+        affinity = _affinity_cpus()
+        quota = _cgroup_quota(self.cgroup_root, self.proc_cgroup)
+        limits = [affinity]
+        if quota is not None:
+            limits.append(max(1, math.floor(quota)))
+        if self.cpu_limit:
+            limits.append(max(1, math.floor(self.cpu_limit)))
+        effective = min(limits)
+
+        intra_op = max(1, effective // (self.processes * self.slots))
+        return ThreadBudget(
+            affinity_cpus=affinity,
+            cgroup_quota=round(quota, 2) if quota is not None else None,
+            effective_cpus=effective,
+            processes=self.processes,
+            slots=self.slots,
+            intra_op=intra_op,
+            inter_op=min(self.inter_op, intra_op),
+        )
+
+    def apply(self) -> ThreadBudget:
+        """
+        Aplica el reparto. Las variables de entorno cubren a los procesos hijos
+        y a las librerías aún no importadas; las ya cargadas se limitan con
+        threadpoolctl, torch.set_num_threads y numba.set_num_threads.
+        """
+        budget = self.plan()
+        if not self.enabled:
+            budget.applied = {"disabled": True}
+            with self._lock:
+                self._budget = budget
+            return budget
+
+        for name in THREAD_ENV_VARS:
+            os.environ[name] = str(budget.intra_op)
+
+        budget.applied = {
+            "blas": self._apply_blas(budget.intra_op),
+            "torch": self._apply_torch(budget.intra_op, budget.inter_op),
+            "numba": self._apply_numba(budget.intra_op),
+        }
+        with self._lock:
+            self._budget = budget
+
+        print(
+            f"[ResourceManager] {budget.effective_cpus} núcleos efectivos "
+            f"(afinidad {budget.affinity_cpus}, cuota {budget.cgroup_quota}) / "
+            f"{budget.processes} procesos x {budget.slots} workers -> "
+            f"{budget.intra_op} hilos intra-op, {budget.inter_op} inter-op"
+        )
+        return budget
+
+    @staticmethod
+    def _apply_blas(threads: int) -> str:
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=threads)
+            return "ok"
+        except Exception as e:
+            return f"error: {e}"
+
+    @staticmethod
+    def _apply_torch(intra_op: int, inter_op: int) -> str:
+        # Solo si Whisper ya cargó torch; si no, OMP_NUM_THREADS aplica al importarlo.
+        torch = sys.modules.get("torch")
+        if torch is None:
+            return "env"
+        try:
+            torch.set_num_threads(intra_op)
+        except Exception as e:
+            return f"error: {e}"
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            # El pool inter-op ya arrancó; solo se pudo limitar intra-op.
+            return "intra-op only"
+        return "ok"
+
+    @staticmethod
+    def _apply_numba(threads: int) -> str:
+        numba = sys.modules.get("numba")
+        if numba is None:
+            return "env"
+        try:
+            numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+            return "ok"
+        except Exception as e:
+            return f"error: {e}"
+
+    def status(self) -> dict:
+        """Reparto efectivo aplicado, o el planificado si aún no se aplicó."""
+        with self._lock:
+            budget = self._budget
+        if budget is None:
+            return dict(self.plan().to_dict(), applied=None)
+        return budget.to_dict()
+
+
+_MANAGER = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_resource_manager() -> ResourceManager:
+    """Gestor de recursos compartido por el proceso."""
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            _MANAGER = ResourceManager.from_env()
+        return _MANAGER
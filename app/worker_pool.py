@@ -0,0 +1,172 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dotenv import load_dotenv
+from adapters.stt.engine_registry import get_registry
+from app.resources import get_resource_manager
+
+
+class PoolSaturatedError(Exception):
+    """Se lanza cuando la cola del pool de trabajo está llena."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("El servicio está saturado, intente de nuevo más tarde.")
+        self.retry_after = retry_after
+
+
+class PoolNotStartedError(RuntimeError):
+    """Se lanza cuando se envía una tarea antes de start() o después de shutdown()."""
+
+    def __init__(self):
+        super().__init__("El pool de trabajo no está iniciado.")
+
+
+def _init_process_worker():
+    """Inicializa un proceso de trabajo: carga configuración, limita hilos y precarga motores."""
+    load_dotenv()
+    get_resource_manager().apply()
+    registry = get_registry()
+    registry.preload()
+    registry.warmup()
+
+
+def _worker_status() -> dict:
+    """Devuelve el estado del EngineRegistry dentro de un proceso de trabajo."""
+    return get_registry().status()
+
+
+def _timed_call(fn, args, kwargs):
+    """Ejecuta la tarea registrando el instante (reloj de pared) en que empezó."""
+    started_at = time.time()
+    return started_at, fn(*args, **kwargs)
+
+
+class TranscriptionPool:
+    """
+    Pool de trabajo acotado para el pipeline de transcripción.
+
+    Saca del event loop el trabajo intensivo en CPU (decodificación,
+    reducción de ruido e inferencia) y aplica control de admisión:
+    cuando hay más tareas pendientes que workers + cola, rechaza de
+    inmediato con PoolSaturatedError en lugar de encolar sin límite.
+
+    Métodos:
+        start():
+            Crea el ejecutor y precarga los motores.
+        submit(fn, *args, **kwargs):
+            Ejecuta la tarea en el pool y devuelve (resultado, métricas de cola).
+        shutdown():
+            Detiene el ejecutor.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 2, max_queue: int = 8, retry_after: int = 5):
+        self.kind = (kind or "thread").strip().lower()
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+
+        self._executor = None
+        self._pending = 0
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TranscriptionPool":
+        """
+        Construye el pool a partir de las variables de entorno:
+        STT_POOL_KIND ('thread' o 'process'), STT_POOL_WORKERS,
+        STT_POOL_MAX_QUEUE y STT_POOL_RETRY_AFTER (segundos).
+        """
+        return cls(
+            kind=os.getenv("STT_POOL_KIND", "thread"),
+            max_workers=int(os.getenv("STT_POOL_WORKERS", "2")),
+            max_queue=int(os.getenv("STT_POOL_MAX_QUEUE", "8")),
+            retry_after=int(os.getenv("STT_POOL_RETRY_AFTER", "5")),
+        )
+
+    @property
+    def depth(self) -> int:
+        """Número de tareas esperando un worker libre."""
+        return max(0, self._pending - self.max_workers)
+
+    def start(self):
+        """Crea el ejecutor y lanza la precarga de motores en segundo plano."""
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_process_worker
+            )
+            threading.Thread(target=self._warm_processes, name="pool-warmup", daemon=True).start()
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="stt-worker"
+            )
+            get_registry().start()
+        print(f"[TranscriptionPool] Pool '{self.kind}' iniciado con {self.max_workers} workers y cola de {self.max_queue}.")
+
+    def _warm_processes(self):
+        """Arranca los procesos de trabajo y marca el registro local como listo."""
+        registry = get_registry()
+        futures = [self._executor.submit(_worker_status) for _ in range(self.max_workers)]
+        statuses = [f.result() for f in futures]
+        for status in statuses:
+            registry.errors.update(status["errors"])
+            registry.warmup_report.update(status["warmup"])
+        # Mismo criterio que en modo hilos, sobre el estado combinado de todos los procesos.
+        registry.ready = all(status["ready"] for status in statuses) and registry.warmed_up()
+
+    async def submit(self, fn, *args, **kwargs):
+        """
+        Ejecuta la tarea en el pool sin bloquear el event loop.
+
+        Retorna:
+            tuple: (resultado, {"depth", "wait_ms", "workers"}).
+
+        Lanza:
+            PoolSaturatedError: Si la cola está llena.
+            PoolNotStartedError: Si el pool no está iniciado.
+        """
+        if self._executor is None:
+            raise PoolNotStartedError()
+
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise PoolSaturatedError(self.retry_after)
+            depth = max(0, self._pending - self.max_workers + 1)
+            self._pending += 1
+
+        submitted_at = time.time()
+        future = None
+        try:
+            future = self._executor.submit(_timed_call, fn, args, kwargs)
+            with self._lock:
+                self._futures.add(future)
+            started_at, result = await asyncio.wrap_future(future)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._futures.discard(future)
+
+        stats = {
+            "depth": depth,
+            "wait_ms": round(max(0.0, started_at - submitted_at) * 1000, 1),
+            "workers": self.max_workers,
+        }
+        return result, stats
+
+    def shutdown(self):
+        """
+        Detiene el ejecutor y cancela las tareas que no han empezado.
+
+        Las tareas se cancelan una a una en lugar de usar
+        shutdown(cancel_futures=True), que no existe en Python 3.8.
+        """
+        if self._executor is not None:
+            with self._lock:
+                pending = list(self._futures)
+            cancelled = sum(1 for future in pending if future.cancel())
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            if cancelled:
+                print(f"[TranscriptionPool] {cancelled} tareas en cola canceladas al detener el pool.")
@@ -1,35 +1,130 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-import requests
+import asyncio
+import httpx
 import json
+import os
 
-app = FastAPI(title="Tracky Middleware Bot")
+TRACKY_STT_URL = os.getenv("TRACKY_STT_URL", "http://127.0.0.1:8000/transcribe")
+STT_CONCURRENCY = int(os.getenv("BOT_STT_CONCURRENCY", "4"))
+STT_TIMEOUT = float(os.getenv("BOT_STT_TIMEOUT", "120"))
+TRANSCRIPT_WEBHOOK = os.getenv("BOT_TRANSCRIPT_WEBHOOK")
+WEBHOOK_CONCURRENCY = int(os.getenv("BOT_WEBHOOK_CONCURRENCY", "4"))
+WEBHOOK_TIMEOUT = float(os.getenv("BOT_WEBHOOK_TIMEOUT", "10"))
 
-TRACKY_STT_URL = "http://127.0.0.1:8000/transcribe"
+_stt_client = None
+_webhook_client = None
+_semaphore = None
+_pending = set()
 
-@app.post("/api/messages")
-async def messages(request: Request):
-    body = await request.json()
-    print(f"[MiddlewareBot] Mensaje recibido:\n{json.dumps(body, indent=2)}")
 
-    attachments = body.get("attachments", [])
-    for att in attachments:
-        if att.get("contentType", "").startswith("audio/"):
-            audio_url = att.get("contentUrl")
-            print(f"[MiddlewareBot] Enviando audio a Tracky STT: {audio_url}")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Crea los clientes HTTP compartidos (pools de conexiones keep-alive) y el
+    límite de llamadas concurrentes a Tracky STT; al apagar espera las
+    transcripciones en curso.
+
+    Las llamadas a Tracky STT y las entregas al webhook usan clientes y
+    pools separados, de modo que un webhook lento no ocupa las conexiones
+    reservadas para transcribir (ni al revés).
+    """
+    global _stt_client, _webhook_client, _semaphore
+    _stt_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(STT_TIMEOUT, connect=5.0),
+        limits=httpx.Limits(max_connections=STT_CONCURRENCY, max_keepalive_connections=STT_CONCURRENCY),
+    )
+    _webhook_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(WEBHOOK_TIMEOUT, connect=5.0),
+        limits=httpx.Limits(max_connections=WEBHOOK_CONCURRENCY, max_keepalive_connections=WEBHOOK_CONCURRENCY),
+    )
+    _semaphore = asyncio.Semaphore(STT_CONCURRENCY)
+    yield
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+    await _stt_client.aclose()
+    await _webhook_client.aclose()
+
+
+app = FastAPI(title="Tracky Middleware Bot", lifespan=lifespan)
+
+
+async def transcribe_attachment(att: dict) -> dict:
+    """
+    Envía un adjunto de audio a Tracky STT respetando el límite de concurrencia.
+
+    httpx.Timeout limita cada fase (conexión, lectura, escritura) por
+    separado; el plazo total de la llamada, BOT_STT_TIMEOUT, lo impone
+    asyncio.wait_for desde que se obtiene el turno en el semáforo.
+    """
+    audio_url = att.get("contentUrl")
+    async with _semaphore:
+        print(f"[MiddlewareBot] Enviando audio a Tracky STT: {audio_url}")
+        response = await asyncio.wait_for(
+            _stt_client.post(
+                TRACKY_STT_URL,
+                data={
+                    "audio_url": audio_url,
+                    "provider": "teams",
+                    "lang": "es-MX",
+                    "stt_engine": "azure"
+                },
+                params={"mode": "full"}
+            ),
+            timeout=STT_TIMEOUT,
+        )
+        return {"audio_url": audio_url, "status_code": response.status_code, "transcript": response.json()}
 
+
+async def deliver_transcripts(body: dict, attachments: list):
+    """
+    Transcribe los adjuntos en paralelo y entrega cada transcripción en cuanto termina:
+    se registra en el log y, si BOT_TRANSCRIPT_WEBHOOK está definido, se reenvía allí.
+    """
+    for finished in asyncio.as_completed([transcribe_attachment(att) for att in attachments]):
+        try:
+            result = await finished
+            print(f"[MiddlewareBot] Transcripción recibida: {result['transcript']}")
+        except asyncio.TimeoutError:
+            print(f"[MiddlewareBot] Tracky STT no respondió en {STT_TIMEOUT:g} s.")
+            continue
+        except Exception as e:
+            print(f"[MiddlewareBot] Error comunicando con Tracky STT: {e}")
+            continue
+
+        if TRANSCRIPT_WEBHOOK:
             try:
-                response = requests.post(
-                    TRACKY_STT_URL,
-                    data={
-                        "audio_url": audio_url,
-                        "provider": "teams",
-                        "lang": "es-MX",
-                        "stt_engine": "azure"
-                    },
-                    params={"mode": "full"}
+                await asyncio.wait_for(
+                    _webhook_client.post(
+                        TRANSCRIPT_WEBHOOK,
+                        json={
+                            "activity_id": body.get("id"),
+                            "conversation": body.get("conversation"),
+                            **result,
+                        },
+                    ),
+                    timeout=WEBHOOK_TIMEOUT,
                 )
-                print(f"[MiddlewareBot] Transcripción recibida: {response.json()}")
             except Exception as e:
-                print(f"[MiddlewareBot] Error comunicando con Tracky STT: {e}")
+                print(f"[MiddlewareBot] Error entregando la transcripción: {e}")
+
+
+@app.post("/api/messages")
+async def messages(request: Request):
+    """
+    Recibe la actividad de Bot Framework y la confirma de inmediato; las
+    transcripciones de los adjuntos de audio se procesan en segundo plano.
+    """
+    body = await request.json()
+    print(f"[MiddlewareBot] Mensaje recibido:\n{json.dumps(body, indent=2)}")
+
+    attachments = [
+        att for att in body.get("attachments", [])
+        if att.get("contentType", "").startswith("audio/")
+    ]
+    if attachments:
+        task = asyncio.create_task(deliver_transcripts(body, attachments))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
 
-    return {"status": "received"}
+    return {"status": "received", "audio_attachments": len(attachments)}
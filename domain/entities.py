@@ -1,6 +1,8 @@
 from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path
 from typing import Optional, Any, Dict
+import numpy as np
 
 
 @dataclass
@@ -42,3 +44,48 @@ class TranscriptResult:
     provider: str
     original_format: str
     raw: Optional[Dict[str, Any]] = field(default=None)
+
+
+@dataclass
+class AudioBuffer:
+    """
+    Audio PCM decodificado en memoria, listo para el pipeline de Tracky STT.
+
+    Evita los viajes a disco entre decodificador, reductor de ruido y motor STT:
+    el audio se decodifica y remuestrea una sola vez y viaja como arreglo.
+
+    Atributos:
+        samples: Muestras float32 mono en el rango [-1, 1].
+        sample_rate: Frecuencia de muestreo en Hz (por defecto 16 kHz).
+        source_format: Formato del archivo de origen (wav, ogg, m4a...).
+        source_path: Ruta del archivo de origen, si existe.
+        metadata: Información adicional producida por las etapas del pipeline.
+    """
+    samples: np.ndarray
+    sample_rate: int = 16000
+    source_format: str = ""
+    source_path: Optional[Path] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        """Duración del audio en segundos."""
+        return len(self.samples) / float(self.sample_rate) if self.sample_rate else 0.0
+
+
+@dataclass
+class SpeechSegment:
+    """
+    Tramo con voz detectado dentro de un AudioBuffer.
+
+    Atributos:
+        start: Inicio del tramo en segundos, relativo al audio procesado.
+        end: Fin del tramo en segundos.
+    """
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        """Duración del tramo en segundos."""
+        return self.end - self.start
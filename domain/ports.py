@@ -1,6 +1,6 @@
-from typing import Protocol
+from typing import List, Protocol
 from pathlib import Path
-from domain.entities import TranscriptResult
+from domain.entities import AudioBuffer, SpeechSegment, TranscriptResult
 
 
 class AudioDecoderPort(Protocol):
@@ -8,9 +8,14 @@ class AudioDecoderPort(Protocol):
     Puerto (interfaz) para decodificadores de audio.
 
     Define el contrato que deben cumplir todos los decodificadores
-    para transformar cualquier formato de entrada a WAV mono 16 kHz.
+    para transformar cualquier formato de entrada a PCM mono 16 kHz,
+    ya sea en memoria (AudioBuffer) o como archivo WAV.
     """
 
+    def decode(self, src: Path) -> AudioBuffer:
+        """Decodifica un archivo de audio a PCM float32 mono 16 kHz en memoria."""
+        ...
+
     def to_wav_mono16k(self, src: Path) -> Path:
         """Convierte un archivo de audio al formato WAV mono 16 kHz."""
         ...
@@ -24,11 +29,32 @@ class NoiseReducerPort(Protocol):
     procesos de limpieza o reducción de ruido sobre el audio.
     """
 
+    def reduce_buffer(self, buffer: AudioBuffer) -> AudioBuffer:
+        """Reduce el ruido del audio en memoria."""
+        ...
+
+    def light_buffer(self, buffer: AudioBuffer) -> AudioBuffer:
+        """Aplica una limpieza ligera (filtrado y recorte) sin reducción espectral."""
+        ...
+
     def reduce(self, wav_path: Path) -> Path:
         """Reduce el ruido del archivo WAV especificado."""
         ...
 
 
+class SegmenterPort(Protocol):
+    """
+    Puerto (interfaz) para detectores de actividad de voz (VAD).
+
+    Define el contrato para dividir el audio en tramos con voz de
+    duración acotada, descartando el silencio.
+    """
+
+    def split(self, buffer: AudioBuffer) -> List[SpeechSegment]:
+        """Devuelve los tramos con voz del audio (lista vacía si solo hay silencio)."""
+        ...
+
+
 class TranscriberPort(Protocol):
     """
     Puerto (interfaz) para motores Speech-to-Text (STT).
@@ -37,6 +63,10 @@ class TranscriberPort(Protocol):
     asegurando compatibilidad con el dominio.
     """
 
+    def transcribe_buffer(self, buffer: AudioBuffer, language: str) -> TranscriptResult:
+        """Transcribe audio en memoria al texto correspondiente."""
+        ...
+
     def transcribe(self, wav_path: Path, language: str) -> TranscriptResult:
         """Transcribe un archivo de audio al texto correspondiente."""
         ...
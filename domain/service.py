@@ -1,7 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from domain.entities import AudioMeta, TranscriptResult
-from domain.ports import AudioDecoderPort, NoiseReducerPort, TranscriberPort
+from typing import List, Tuple, Union
+from domain.entities import AudioBuffer, AudioMeta, SpeechSegment, TranscriptResult
+from domain.ports import AudioDecoderPort, NoiseReducerPort, SegmenterPort, TranscriberPort
 
 
 class SttService:
@@ -9,33 +11,69 @@ class SttService:
     Caso de uso principal del sistema Tracky STT.
 
     Ejecuta el flujo de decodificación, limpieza y transcripción de audio
-    de forma agnóstica respecto al proveedor de STT.
+    de forma agnóstica respecto al proveedor de STT. El audio se decodifica
+    una sola vez y viaja en memoria (AudioBuffer) entre las etapas.
+    Si se indica una compuerta de calidad, esta decide por audio si la
+    limpieza se omite, es ligera o es completa, y el reporte se adjunta
+    en raw['pipeline'] del resultado.
+
+    Con un segmentador (VAD), el audio se divide en tramos con voz de
+    duración acotada: si no hay voz no se llama al motor, y los tramos se
+    transcriben en paralelo (o en lote si el motor lo soporta) y se unen
+    en un solo resultado con desplazamientos y confianza por tramo.
 
     Métodos:
         run(file_path, meta):
             Procesa el audio, lo transcribe y devuelve un TranscriptResult.
+        run_batch(items, max_workers):
+            Procesa varios audios: prepara en paralelo y transcribe en lote.
     """
 
-    def __init__(self, decoder: AudioDecoderPort, denoiser: NoiseReducerPort, stt: TranscriberPort):
+    def __init__(
+        self,
+        decoder: AudioDecoderPort,
+        denoiser: NoiseReducerPort,
+        stt: TranscriberPort,
+        quality_gate=None,
+        segmenter: SegmenterPort = None,
+        segment_workers: int = 4,
+    ):
         self.decoder = decoder
         self.denoiser = denoiser
         self.stt = stt
+        self.quality_gate = quality_gate
+        self.segmenter = segmenter
+        self.segment_workers = segment_workers
 
-    def run(self, file_path: Path, meta: AudioMeta) -> TranscriptResult:
-        """
-        Ejecuta el flujo completo de transcripción.
+    def _prepare(self, decoder: AudioDecoderPort, file_path: Path, meta: AudioMeta) -> Union[AudioBuffer, TranscriptResult]:
+        """Decodifica y limpia el audio; si falla la decodificación devuelve el error como resultado."""
+        try:
+            buffer = decoder.decode(file_path)
+        except Exception as e:
+            print(f"[SttService] Error decodificando {file_path.name}: {e}")
+            return TranscriptResult(
+                text="",
+                confidence=0.0,
+                language=meta.lang,
+                timestamp=datetime.utcnow(),
+                provider=meta.provider,
+                original_format=meta.content_type,
+                raw={"error": f"Error decodificando el audio: {e}"},
+            )
 
-        Argumentos:
-            file_path: Ruta del archivo de audio de entrada.
-            meta: Metadatos asociados al audio.
+        if self.quality_gate is not None:
+            return self.quality_gate.apply(self.denoiser, buffer, meta.provider)
+        return self.denoiser.reduce_buffer(buffer)
 
-        Retorna:
-            TranscriptResult: Resultado estructurado y agnóstico.
-        """
-        wav = self.decoder.to_wav_mono16k(file_path)
-        wav_clean = self.denoiser.reduce(wav)
-        result = self.stt.transcribe(wav_clean, language=meta.lang)
+    def _normalize(self, result, meta: AudioMeta, buffer: AudioBuffer = None) -> TranscriptResult:
+        """Convierte la salida del motor en un TranscriptResult."""
+        result = self._to_result(result, meta)
+        pipeline = buffer.metadata.get("pipeline") if buffer is not None else None
+        if pipeline:
+            result.raw = dict(result.raw or {}, pipeline=pipeline)
+        return result
 
+    def _to_result(self, result, meta: AudioMeta) -> TranscriptResult:
         if isinstance(result, TranscriptResult):
             return result
 
@@ -57,3 +95,187 @@ class SttService:
             original_format=meta.content_type,
             raw=raw,
         )
+
+    def run(self, file_path: Path, meta: AudioMeta) -> TranscriptResult:
+        """
+        Ejecuta el flujo completo de transcripción.
+
+        Argumentos:
+            file_path: Ruta del archivo de audio de entrada.
+            meta: Metadatos asociados al audio.
+
+        Retorna:
+            TranscriptResult: Resultado estructurado y agnóstico.
+        """
+        clean = self._prepare(self.decoder, file_path, meta)
+        if isinstance(clean, TranscriptResult):
+            return clean
+
+        if self.segmenter is not None:
+            return self._run_segments(clean, meta)
+
+        result = self.stt.transcribe_buffer(clean, language=meta.lang)
+        return self._normalize(result, meta, clean)
+
+    def _transcribe_many(self, buffers: List[AudioBuffer], lang: str) -> list:
+        """Transcribe varios audios en lote si el motor lo soporta, o en paralelo uno a uno."""
+        if hasattr(self.stt, "transcribe_batch"):
+            return self.stt.transcribe_batch(buffers, language=lang)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.segment_workers, len(buffers)))) as executor:
+            return list(executor.map(lambda buffer: self.stt.transcribe_buffer(buffer, language=lang), buffers))
+
+    def _run_segments(self, buffer: AudioBuffer, meta: AudioMeta) -> TranscriptResult:
+        """
+        Segmenta el audio con el VAD, transcribe los tramos y los une en un resultado.
+
+        Los tiempos de los tramos se reportan sobre el audio recibido: si la
+        limpieza recortó silencio al inicio (metadata['trim_offset']), ese
+        desplazamiento se suma a cada tramo.
+
+        Si hay un solo tramo y el audio completo cabe en la duración máxima
+        del segmentador, no hace falta cortarlo: se envía el buffer entero
+        con sus metadatos (incluido 'pipeline'), de modo que el motor recibe
+        el mismo audio que sin VAD y puede, por ejemplo, reenviar el Opus
+        original sin recodificarlo. Solo se ahorraría el silencio de los
+        bordes, que Whisper rellena igualmente hasta su ventana de 30 s.
+        """
+        segments = self.segmenter.split(buffer)
+        print(f"[SttService] VAD: {len(segments)} tramos con voz en {buffer.duration:.1f} s de audio.")
+
+        if not segments:
+            empty = TranscriptResult(
+                text="",
+                confidence=0.0,
+                language=meta.lang,
+                timestamp=datetime.utcnow(),
+                provider=meta.provider,
+                original_format=meta.content_type,
+                raw={"segments": [], "speech_seconds": 0.0},
+            )
+            return self._normalize(empty, meta, buffer)
+
+        sr = buffer.sample_rate
+        trim_offset = buffer.metadata.get("trim_offset", 0.0)
+        placed = [
+            SpeechSegment(start=round(trim_offset + segment.start, 3), end=round(trim_offset + segment.end, 3))
+            for segment in segments
+        ]
+        if len(segments) == 1 and buffer.duration <= getattr(self.segmenter, "max_segment_s", 0.0):
+            output = self.stt.transcribe_buffer(buffer, language=meta.lang)
+            return self._normalize(self._stitch([output], placed, meta), meta, buffer)
+
+        pieces = [
+            AudioBuffer(
+                samples=buffer.samples[int(segment.start * sr):int(segment.end * sr)],
+                sample_rate=sr,
+                source_format=buffer.source_format,
+                source_path=buffer.source_path,
+                metadata={"offset": origin.start, "gain": buffer.metadata.get("gain", 1.0)},
+            )
+            for segment, origin in zip(segments, placed)
+        ]
+        outputs = self._transcribe_many(pieces, meta.lang)
+        return self._normalize(self._stitch(outputs, placed, meta), meta, buffer)
+
+    def _stitch(self, outputs: list, segments: List[SpeechSegment], meta: AudioMeta) -> TranscriptResult:
+        """
+        Une los resultados por tramo en un solo TranscriptResult.
+
+        La confianza global es el promedio de los tramos ponderado por su
+        duración; los tramos con error se reportan pero no aportan texto.
+        """
+        results = [self._to_result(output, meta) for output in outputs]
+        entries, texts, errors = [], [], []
+        weighted, weight = 0.0, 0.0
+
+        for segment, result in zip(segments, results):
+            entry = {
+                "start": segment.start,
+                "end": segment.end,
+                "text": result.text,
+                "confidence": result.confidence,
+            }
+            error = (result.raw or {}).get("error")
+            if error:
+                entry["error"] = error
+                errors.append(error)
+            else:
+                if result.text:
+                    texts.append(result.text.strip())
+                weighted += result.confidence * segment.duration
+                weight += segment.duration
+            entries.append(entry)
+
+        raw = {
+            "segments": entries,
+            "speech_seconds": round(sum(segment.duration for segment in segments), 3),
+        }
+        if errors and len(errors) == len(results):
+            raw["error"] = errors[0]
+        elif errors:
+            raw["segment_errors"] = len(errors)
+
+        succeeded = [r for r in results if not (r.raw or {}).get("error")]
+        if succeeded and succeeded[0].raw and succeeded[0].raw.get("profile"):
+            raw["profile"] = succeeded[0].raw["profile"]
+
+        hedges = [(r.raw or {}).get("hedge") for r in results]
+        if any(hedges):
+            winners = {}
+            for hedge in filter(None, hedges):
+                if hedge["winner"]:
+                    winners[hedge["winner"]] = winners.get(hedge["winner"], 0) + 1
+            raw["hedge"] = {"winners": winners, "fired": sum(1 for h in hedges if h and h["fired"])}
+        return TranscriptResult(
+            text=" ".join(texts),
+            confidence=weighted / weight if weight else 0.0,
+            language=succeeded[0].language if succeeded else meta.lang,
+            timestamp=datetime.utcnow(),
+            provider=results[0].provider,
+            original_format=meta.content_type,
+            raw=raw,
+        )
+
+    def run_batch(
+        self,
+        items: List[Tuple[AudioDecoderPort, Path, AudioMeta]],
+        max_workers: int = 4,
+    ) -> List[TranscriptResult]:
+        """
+        Ejecuta el flujo de transcripción para varios audios.
+
+        La decodificación y limpieza se hacen en paralelo; después los audios
+        del mismo idioma se envían juntos al motor mediante transcribe_batch
+        cuando el motor lo soporta, o en paralelo uno a uno en caso contrario.
+
+        Argumentos:
+            items: Lista de tuplas (decodificador, ruta del audio, metadatos).
+            max_workers: Hilos usados para preparar y transcribir.
+
+        Retorna:
+            List[TranscriptResult]: Resultados en el mismo orden que items.
+        """
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            prepared = list(executor.map(lambda item: self._prepare(*item), items))
+
+            results = [None] * len(items)
+            by_lang = {}
+            for i, clean in enumerate(prepared):
+                if isinstance(clean, TranscriptResult):
+                    results[i] = clean
+                else:
+                    by_lang.setdefault(items[i][2].lang, []).append(i)
+
+            for lang, indexes in by_lang.items():
+                buffers = [prepared[i] for i in indexes]
+                if hasattr(self.stt, "transcribe_batch"):
+                    outputs = self.stt.transcribe_batch(buffers, language=lang)
+                else:
+                    outputs = list(executor.map(
+                        lambda buffer, lang=lang: self.stt.transcribe_buffer(buffer, language=lang), buffers
+                    ))
+                for i, output in zip(indexes, outputs):
+                    results[i] = self._normalize(output, items[i][2], prepared[i])
+
+        return results
@@ -0,0 +1,68 @@
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder import av_backend  # noqa: E402
+from adapters.decoder.m4a_aac import M4ADecoder  # noqa: E402
+from adapters.decoder.ogg_opus import OggOpusDecoder  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+REPEATS = 5
+
+
+def measure(fn, src: Path, repeats: int = REPEATS):
+    """Ejecuta fn(src) varias veces y devuelve (mediana en ms, muestras) o (None, error)."""
+    times, samples = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        try:
+            samples = fn(src)
+        except Exception as e:
+            return None, str(e)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), samples
+
+
+def benchmark():
+    """
+    Compara la latencia por archivo del camino pydub (subproceso ffmpeg)
+    contra la decodificación en proceso con PyAV sobre los audios
+    comprimidos de samples/.
+    """
+    files = sorted(
+        p for p in SAMPLES_DIR.iterdir()
+        if p.suffix.lower() in {".ogg", ".opus", ".m4a"}
+    )
+
+    print(f"{'archivo':<22}{'pydub (ms)':>12}{'pyav (ms)':>12}{'speedup':>10}{'dur (s)':>10}")
+    for path in files:
+        fallback = M4ADecoder.decode_pydub if path.suffix.lower() == ".m4a" else OggOpusDecoder.decode_pydub
+        pydub_ms, pydub_out = measure(fallback, path)
+
+        if av_backend.is_available():
+            av_ms, av_out = measure(av_backend.decode_mono16k, path)
+        else:
+            av_ms, av_out = None, "PyAV no instalado"
+
+        duration = len(av_out) / 16000 if av_ms is not None else 0.0
+        speedup = f"{pydub_ms / av_ms:.1f}x" if pydub_ms and av_ms else "-"
+        print(
+            f"{path.name:<22}"
+            f"{(f'{pydub_ms:.1f}' if pydub_ms else 'error'):>12}"
+            f"{(f'{av_ms:.1f}' if av_ms else 'error'):>12}"
+            f"{speedup:>10}{duration:>10.2f}"
+        )
+        for label, ms, out in (("pydub", pydub_ms, pydub_out), ("pyav", av_ms, av_out)):
+            if ms is None:
+                print(f"    [{label}] {out}")
+
+
+if __name__ == "__main__":
+    """
+    Ejecuta el benchmark de decodificación sobre la carpeta samples/.
+    """
+    benchmark()
@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# Orden en que app.main trae sus dependencias; cada módulo se mide sobre los anteriores.
+MODULES = (
+    "numpy",
+    "fastapi",
+    "domain.service",
+    "adapters.decoder.factory",
+    "adapters.denoise.noisereduce_adapter",
+    "adapters.stt.engine_registry",
+    "app.pipeline",
+    "app.main",
+)
+
+# Librerías que un arranque solo con Azure no debe cargar.
+HEAVY_MODULES = ("torch", "whisper", "google.cloud.speech", "numba", "scipy.signal", "noisereduce", "av")
+
+# Se ejecuta en un intérprete nuevo para medir un arranque en frío.
+CHILD_CODE = """
+import json, os, resource, sys, time
+sys.path.insert(0, {root!r})
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+
+report = {{"modules": [], "baseline_mb": rss_mb()}}
+start = time.perf_counter()
+for name in {modules!r}:
+    t0, m0 = time.perf_counter(), rss_mb()
+    __import__(name)
+    report["modules"].append([name, (time.perf_counter() - t0) * 1000, rss_mb() - m0])
+
+from adapters.stt.engine_registry import get_registry
+t0, m0 = time.perf_counter(), rss_mb()
+registry = get_registry()
+registry.preload()
+report["modules"].append(["registry.preload()", (time.perf_counter() - t0) * 1000, rss_mb() - m0])
+
+report["total_ms"] = (time.perf_counter() - start) * 1000
+report["rss_mb"] = rss_mb()
+report["errors"] = registry.errors
+report["heavy_loaded"] = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps(report))
+"""
+
+
+def measure(engines: str = "azure") -> dict:
+    """Arranca un intérprete con STT_ENGINES=`engines`, importa app.main y precarga los motores."""
+    env = dict(
+        os.environ,
+        STT_ENGINES=engines,
+        AZURE_SPEECH_KEY=os.getenv("AZURE_SPEECH_KEY", "bench-key"),
+        AZURE_REGION=os.getenv("AZURE_REGION", "bench-region"),
+        PYTHONWARNINGS="ignore",
+    )
+    code = CHILD_CODE.format(root=str(ROOT_DIR), modules=MODULES, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark(engines: str = "azure") -> bool:
+    """
+    Mide tiempo de importación y RSS por módulo en un arranque en frío y
+    verifica el presupuesto de STT_STARTUP_BUDGET_MS y STT_STARTUP_BUDGET_MB.
+
+    Retorna:
+        bool: True si el arranque cabe en el presupuesto y no cargó librerías pesadas.
+    """
+    budget_ms = float(os.getenv("STT_STARTUP_BUDGET_MS", "1500"))
+    budget_mb = float(os.getenv("STT_STARTUP_BUDGET_MB", "200"))
+    report = measure(engines)
+
+    print(f"\nArranque con STT_ENGINES={engines} (RSS base {report['baseline_mb']:.0f} MB)")
+    print(f"{'módulo':<40}{'ms':>9}{'+MB':>8}")
+    for name, ms, mb in report["modules"]:
+        print(f"{name:<40}{ms:>9.0f}{mb:>8.1f}")
+    print(f"{'total':<40}{report['total_ms']:>9.0f}{report['rss_mb']:>8.1f}")
+
+    failures = []
+    if report["total_ms"] > budget_ms:
+        failures.append(f"tiempo {report['total_ms']:.0f} ms > {budget_ms:.0f} ms")
+    if report["rss_mb"] > budget_mb:
+        failures.append(f"RSS {report['rss_mb']:.0f} MB > {budget_mb:.0f} MB")
+    if engines == "azure" and report["heavy_loaded"]:
+        failures.append(f"librerías pesadas cargadas: {', '.join(report['heavy_loaded'])}")
+    if report["errors"]:
+        failures.append(f"motores con error: {report['errors']}")
+
+    if failures:
+        print("\nFUERA DE PRESUPUESTO: " + "; ".join(failures))
+        return False
+    print(f"\nDentro del presupuesto ({budget_ms:.0f} ms, {budget_mb:.0f} MB).")
+    return True
+
+
+if __name__ == "__main__":
+    """
+    Mide el arranque del servicio en un intérprete nuevo y termina con
+    código 1 si supera el presupuesto (útil en CI).
+    Uso: python scripts/bench_startup.py [motores, p. ej. azure o azure,google]
+    """
+    sys.exit(0 if benchmark(sys.argv[1] if len(sys.argv) > 1 else "azure") else 1)
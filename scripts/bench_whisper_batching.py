@@ -0,0 +1,105 @@
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.factory import DecoderFactory  # noqa: E402
+from adapters.stt.whisper_adapter import WhisperAdapter  # noqa: E402
+from adapters.stt.whisper_batcher import WhisperBatchScheduler  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+CONCURRENCY_LEVELS = (1, 2, 4, 8)
+ROUNDS = 2
+
+
+def load_corpus():
+    """Decodifica todos los audios de samples/ a AudioBuffer."""
+    buffers = []
+    for path in sorted(p for p in SAMPLES_DIR.iterdir() if p.is_file()):
+        try:
+            buffers.append(DecoderFactory.get(provider="bench", file_path=path).decode(path))
+        except Exception as e:
+            print(f"[BenchBatching] Se omite {path.name}: {e}")
+    return buffers
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run_level(adapter: WhisperAdapter, buffers, concurrency: int) -> dict:
+    """Envía el corpus ROUNDS veces con `concurrency` clientes simultáneos."""
+    requests = buffers * ROUNDS
+    latencies = []
+
+    def call(buffer):
+        start = time.perf_counter()
+        adapter.transcribe_buffer(buffer, "es")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, requests))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "throughput": len(requests) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def benchmark(model_size: str = "tiny"):
+    """
+    Compara, para cada nivel de concurrencia, el planificador con max_batch=1
+    (mismo camino de whisper.decode, una petición por pasada) contra el
+    planificador con max_batch=N (STT_WHISPER_MAX_BATCH). Ambos decodifican
+    con las mismas opciones, así que la diferencia medida es solo el efecto
+    de agrupar peticiones y no el de cambiar model.transcribe por decode.
+    """
+    buffers = load_corpus()
+    adapter = WhisperAdapter(model_size=model_size)
+    if adapter.scheduler is not None:
+        adapter.scheduler.close()
+    batched = WhisperBatchScheduler.from_env(adapter.model)
+    single = WhisperBatchScheduler(adapter.model, max_batch=1, max_wait_ms=0, result_timeout_s=batched.result_timeout)
+    modes = (("lote 1", single), (f"lote {batched.max_batch}", batched))
+
+    # Calentamiento de ambos planificadores.
+    for _, scheduler in modes:
+        adapter.scheduler = scheduler
+        adapter.transcribe_buffer(buffers[0], "es")
+
+    print(f"\nModelo {model_size} | {len(buffers)} audios x {ROUNDS} rondas | "
+          f"max_batch={batched.max_batch} max_wait={batched.max_wait * 1000:.0f} ms")
+    print(f"{'clientes':>9}{'modo':>12}{'req/s':>10}{'p50 (ms)':>11}{'p99 (ms)':>11}{'lote medio':>12}")
+
+    for concurrency in CONCURRENCY_LEVELS:
+        for label, scheduler in modes:
+            adapter.scheduler = scheduler
+            before = dict(scheduler.stats())
+            stats = run_level(adapter, buffers, concurrency)
+            after = scheduler.stats()
+            batches = after["batches"] - before["batches"]
+            mean_batch = (after["items"] - before["items"]) / batches if batches else 1.0
+            print(
+                f"{concurrency:>9}{label:>12}{stats['throughput']:>10.2f}"
+                f"{stats['p50']:>11.0f}{stats['p99']:>11.0f}{mean_batch:>12.2f}"
+            )
+
+    for _, scheduler in modes:
+        scheduler.close()
+
+
+if __name__ == "__main__":
+    """
+    Mide rendimiento y p99 del planificador de micro-lotes de Whisper con el
+    corpus de samples/. Uso: python scripts/bench_whisper_batching.py [tamaño]
+    """
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else "tiny")
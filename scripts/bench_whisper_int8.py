@@ -0,0 +1,137 @@
+import gc
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.factory import DecoderFactory  # noqa: E402
+from adapters.stt.whisper_adapter import WhisperAdapter  # noqa: E402
+from adapters.stt.whisper_int8_adapter import WhisperInt8Adapter  # noqa: E402
+from adapters.stt.whisper_profiles import default_profile  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+ROUNDS = 3
+
+
+def load_corpus():
+    """Decodifica todos los audios de samples/ a AudioBuffer."""
+    buffers = []
+    for path in sorted(p for p in SAMPLES_DIR.iterdir() if p.is_file()):
+        try:
+            buffers.append((path.name, DecoderFactory.get(provider="bench", file_path=path).decode(path)))
+        except Exception as e:
+            print(f"[BenchInt8] Se omite {path.name}: {e}")
+    return buffers
+
+
+def rss_mb() -> float:
+    """Memoria residente actual del proceso en MB (Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def model_mb(model) -> float:
+    """Bytes de parámetros y buffers del state_dict, incluidos los pesos empaquetados int8."""
+    total = 0
+    for value in model.state_dict().values():
+        if hasattr(value, "element_size"):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, tuple):
+            total += sum(v.numel() * v.element_size() for v in value if hasattr(v, "element_size"))
+    return total / (1024 * 1024)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """WER de `hypothesis` respecto de `reference` por distancia de edición entre palabras."""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, other in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def run_engine(adapter_cls, model_size: str, buffers) -> dict:
+    """Carga el motor, transcribe el corpus ROUNDS veces y mide latencia y memoria."""
+    gc.collect()
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    adapter = adapter_cls(model_size=model_size)
+    load_s = time.perf_counter() - start
+    rss_loaded = rss_mb() - rss_before
+
+    profile = default_profile(model_size)
+    adapter.transcribe_buffer(buffers[0][1], "es", profile=profile)  # calentamiento
+
+    latencies = {name: [] for name, _ in buffers}
+    texts = {}
+    for _ in range(ROUNDS):
+        for name, buffer in buffers:
+            start = time.perf_counter()
+            result = adapter.transcribe_buffer(buffer, "es", profile=profile)
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            texts[name] = result.text
+
+    stats = {
+        "load_s": load_s,
+        "rss_mb": rss_loaded,
+        "model_mb": model_mb(adapter.model),
+        "latency_ms": {name: statistics.median(values) for name, values in latencies.items()},
+        "texts": texts,
+    }
+    adapter.close()
+    del adapter
+    gc.collect()
+    return stats
+
+
+def benchmark(model_size: str = "base"):
+    """
+    Compara el motor fp32 ('whisper') con el cuantizado ('whisper-int8')
+    sobre samples/: latencia mediana por audio, memoria del modelo y
+    deriva de la transcripción (WER del int8 tomando fp32 como referencia).
+    """
+    buffers = load_corpus()
+    fp32 = run_engine(WhisperAdapter, model_size, buffers)
+    int8 = run_engine(WhisperInt8Adapter, model_size, buffers)
+
+    print(f"\nModelo {model_size} | {len(buffers)} audios x {ROUNDS} rondas (perfil {default_profile(model_size).name})")
+    print(f"{'audio':<28}{'fp32 (ms)':>11}{'int8 (ms)':>11}{'speedup':>9}{'WER':>8}")
+    speedups, wers = [], []
+    for name, buffer in buffers:
+        a, b = fp32["latency_ms"][name], int8["latency_ms"][name]
+        wer = word_error_rate(fp32["texts"][name], int8["texts"][name])
+        speedups.append(a / b if b else 0.0)
+        wers.append(wer)
+        print(f"{name[:27]:<28}{a:>11.0f}{b:>11.0f}{a / b if b else 0:>8.2f}x{wer:>8.3f}")
+
+    print(f"\n{'':<28}{'fp32':>11}{'int8':>11}")
+    print(f"{'carga (s)':<28}{fp32['load_s']:>11.2f}{int8['load_s']:>11.2f}")
+    print(f"{'pesos del modelo (MB)':<28}{fp32['model_mb']:>11.0f}{int8['model_mb']:>11.0f}")
+    print(f"{'RSS tras cargar (MB)':<28}{fp32['rss_mb']:>11.0f}{int8['rss_mb']:>11.0f}")
+    print(
+        f"\nSpeedup mediano: {statistics.median(speedups):.2f}x | "
+        f"reducción de pesos: {1 - int8['model_mb'] / fp32['model_mb']:.0%} | "
+        f"WER medio int8 vs fp32: {statistics.mean(wers):.3f}"
+    )
+
+
+if __name__ == "__main__":
+    """
+    Mide el motor whisper-int8 frente a whisper fp32 con el corpus de samples/.
+    La primera ejecución también genera la caché de pesos int8.
+    Uso: python scripts/bench_whisper_int8.py [tamaño]
+    """
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else "base")
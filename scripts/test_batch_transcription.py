@@ -0,0 +1,100 @@
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.factory import DecoderFactory  # noqa: E402
+from domain.entities import AudioMeta, TranscriptResult  # noqa: E402
+from domain.service import SttService  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+
+
+class PassThroughDenoiser:
+    def reduce_buffer(self, buffer):
+        return buffer
+
+
+class RecordingEngine:
+    """Base de los motores de prueba: registra (idioma, audios) de cada llamada."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _results(self, buffers, language: str):
+        with self._lock:
+            self.calls.append((language, len(buffers)))
+        return [
+            TranscriptResult(
+                f"{Path(b.source_path).name}|{language}", 0.9, language, datetime.utcnow(), "fake", "wav", {}
+            )
+            for b in buffers
+        ]
+
+
+class BatchEngine(RecordingEngine):
+    """Motor de prueba con transcribe_batch."""
+
+    def transcribe_batch(self, buffers, language: str):
+        return self._results(buffers, language)
+
+
+class SingleEngine(RecordingEngine):
+    """Motor de prueba sin transcribe_batch: se llama una vez por audio."""
+
+    def transcribe_buffer(self, buffer, language: str):
+        return self._results([buffer], language)[0]
+
+
+class BrokenDecoder:
+    def decode(self, src: Path):
+        raise ValueError("encabezado inválido")
+
+
+def build_items(names=("whatsapp.wav", "teams.wav", "web.wav")):
+    items = []
+    for i, name in enumerate(names):
+        path = SAMPLES_DIR / name
+        lang = "es-MX" if i != 1 else "en-US"
+        items.append((DecoderFactory.get(provider="test", file_path=path), path, AudioMeta("test", "audio/wav", lang)))
+    items.insert(1, (BrokenDecoder(), SAMPLES_DIR / "roto.wav", AudioMeta("test", "audio/wav", "es-MX")))
+    return items
+
+
+def check_batched_by_language() -> bool:
+    """Los audios del mismo idioma van en un solo lote; el orden y los errores se conservan."""
+    engine = BatchEngine()
+    results = SttService(None, PassThroughDenoiser(), engine).run_batch(build_items(), max_workers=4)
+    texts = [r.text for r in results]
+    ok = (
+        texts == ["whatsapp.wav|es-MX", "", "teams.wav|en-US", "web.wav|es-MX"]
+        and "encabezado inválido" in results[1].raw["error"]
+        and sorted(engine.calls) == [("en-US", 1), ("es-MX", 2)]
+    )
+    print(f"[TestBatchTranscription] Lotes por idioma {sorted(engine.calls)} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_without_batch_support() -> bool:
+    """Sin transcribe_batch cada audio se transcribe por separado con el mismo resultado."""
+    engine = SingleEngine()
+    results = SttService(None, PassThroughDenoiser(), engine).run_batch(build_items(), max_workers=2)
+    ok = [r.text for r in results] == ["whatsapp.wav|es-MX", "", "teams.wav|en-US", "web.wav|es-MX"]
+    ok &= len(engine.calls) == 3
+    print(f"[TestBatchTranscription] Motor sin lotes: {len(engine.calls)} llamadas | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba SttService.run_batch: agrupación por idioma, orden de los
+    resultados y errores de decodificación por elemento.
+    """
+    success = check_batched_by_language()
+    success &= check_without_batch_support()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,116 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.stt.engine_registry import EngineRegistry  # noqa: E402
+from domain.entities import TranscriptResult  # noqa: E402
+
+
+class FakeAdapter:
+    """Motor de prueba: no carga modelos y registra si fue cerrado."""
+
+    def __init__(self, name: str, error: str = None):
+        self.name = name
+        self.error = error
+        self.closed = False
+
+    def transcribe(self, wav_path: Path, language: str) -> TranscriptResult:
+        return TranscriptResult(
+            text="" if self.error else "hola",
+            confidence=0.0,
+            language=language,
+            timestamp=datetime.utcnow(),
+            provider=self.name,
+            original_format="wav",
+            raw={"error": self.error} if self.error else {},
+        )
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRegistry(EngineRegistry):
+    """Registro que crea FakeAdapter en lugar de cargar motores reales."""
+
+    def __init__(self, failing=(), **kwargs):
+        super().__init__(**kwargs)
+        self.failing = set(failing)
+        self.created = {}
+
+    def _create(self, key: tuple):
+        name = key[0] if key[1] is None else f"{key[0]}:{key[1]}"
+        adapter = FakeAdapter(name, error="sin credenciales" if name in self.failing else None)
+        self.created[key] = adapter
+        return adapter
+
+
+def loaded(registry: EngineRegistry) -> list:
+    return registry.status()["loaded"]
+
+
+def check_lru_eviction() -> bool:
+    """Con presupuesto para dos modelos, cargar un tercero expulsa el menos usado."""
+    registry = FakeRegistry(whisper_sizes=("base", "small", "tiny"), memory_budget_mb=700)
+    registry.get("whisper", "base")
+    registry.get("whisper", "small")
+    registry.get("whisper", "base")  # base pasa a ser el más reciente
+    registry.get("whisper", "tiny")
+    ok = loaded(registry) == ["whisper:base", "whisper:tiny"]
+    ok &= registry.created[("whisper", "small")].closed
+    print(f"[TestEngineRegistry] Expulsión LRU: {loaded(registry)} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_lease_blocks_eviction() -> bool:
+    """Un modelo prestado no se expulsa; se expulsa al devolverse si sigue sobrando memoria."""
+    registry = FakeRegistry(whisper_sizes=("small", "medium"), memory_budget_mb=1600)
+    with registry.lease("whisper", "small") as adapter:
+        registry.get("whisper", "medium")
+        during = loaded(registry)
+        kept = not adapter.closed
+    after = loaded(registry)
+    ok = during == ["whisper:small", "whisper:medium"] and kept and after == ["whisper:medium"]
+    print(f"[TestEngineRegistry] Préstamo: durante {during} -> después {after} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_ready() -> bool:
+    """/ready solo es verdadero si todos los motores configurados calentaron sin error; los fallidos se listan."""
+    sample = ROOT_DIR / "samples" / "web.wav"
+    cases = [
+        # (nombre, motores, fallidos, listo esperado)
+        ("todos fallan", ("azure",), ("azure",), False),
+        ("mixto", ("azure", "whisper"), ("azure",), False),
+        ("un tamaño falla", ("whisper",), ("whisper:small",), False),
+        ("todos limpios", ("azure", "whisper"), (), True),
+    ]
+    ok = True
+    for name, engines, failing, expected in cases:
+        registry = FakeRegistry(engines=engines, whisper_sizes=("tiny", "small"), failing=failing)
+        registry.preload()
+        registry.warmup(sample)
+        passed = registry.ready == expected and registry.status()["failed"] == sorted(failing)
+        ok &= passed
+        print(
+            f"[TestEngineRegistry] Ready {name:<16} -> {registry.ready} "
+            f"(fallidos {registry.status()['failed']}) | {'OK' if passed else 'FALLÓ'}"
+        )
+
+    idle = FakeRegistry(engines=("azure",))
+    ok &= not idle.warmed_up()
+    print(f"[TestEngineRegistry] Ready sin calentar -> {idle.warmed_up()} | {'OK' if not idle.warmed_up() else 'FALLÓ'}")
+    return ok
+
+if __name__ == "__main__":
+    """
+    Prueba la expulsión LRU del registro de motores, su interacción con los
+    préstamos y el criterio de /ready, usando motores de prueba sin modelos.
+    """
+    success = check_lru_eviction()
+    success &= check_lease_blocks_eviction()
+    success &= check_ready()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
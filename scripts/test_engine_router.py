@@ -0,0 +1,219 @@
+import sys
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.stt.engine_router import (  # noqa: E402
+    CircuitBreaker,
+    EngineRouter,
+    EngineState,
+    RoutedTranscriber,
+    TokenBucket,
+)
+from adapters.stt.hedging import HedgedTranscriber, LatencyTracker  # noqa: E402
+from domain.entities import AudioBuffer, TranscriptResult  # noqa: E402
+
+BUFFER = AudioBuffer(samples=np.zeros(16000, dtype=np.float32), sample_rate=16000)
+
+
+class FakeClock:
+    """Reloj manual para el interruptor y el token bucket."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeEngine:
+    def __init__(self, name: str, raw: dict = None):
+        self.name = name
+        self.raw = raw or {}
+
+    def transcribe_buffer(self, buffer, language) -> TranscriptResult:
+        text = "" if self.raw.get("error") else self.name
+        return TranscriptResult(text, 0.9, language, datetime.utcnow(), self.name, "wav", dict(self.raw))
+
+
+class FakeRegistry:
+    def __init__(self, engines: dict):
+        self.engines = engines
+
+    @contextmanager
+    def lease(self, engine: str, model_size: str):
+        yield self.engines[engine]
+
+
+def make_router(engines: dict, clock: FakeClock, tracker: LatencyTracker = None) -> EngineRouter:
+    """Router con interruptores sobre el reloj manual; `engines` es nombre -> costo."""
+    router = EngineRouter([], tracker=tracker or LatencyTracker(min_samples=1))
+    for name, cost in engines.items():
+        router.engines[name] = EngineState(
+            name, cost, breaker=CircuitBreaker(failure_threshold=3, error_rate=0.5, cooldown_s=30, clock=clock)
+        )
+    return router
+
+
+def check_breaker() -> bool:
+    """Se abre con 3 fallos y tasa >= 50 %; tras el enfriamiento deja pasar una sola prueba."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, error_rate=0.5, cooldown_s=30, clock=clock)
+    for success in (True, False, False):
+        breaker.record(success)
+    before = breaker.state
+    breaker.record(False)
+    tripped = breaker.state == "open" and not breaker.allow()
+
+    clock.advance(30)
+    half_open = breaker.state == "half_open"
+    probe, second = breaker.allow(), breaker.allow()
+    breaker.record(False)
+    reopened = breaker.state == "open"
+
+    clock.advance(30)
+    breaker.allow()
+    breaker.record(True)
+    ok = (
+        before == "closed" and tripped and half_open and probe and not second
+        and reopened and breaker.state == "closed" and breaker.allow()
+    )
+    print(
+        f"[TestEngineRouter] Interruptor: {before} -> abierto -> semiabierto (1 prueba) -> "
+        f"abierto -> {breaker.state} | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+def check_quota() -> bool:
+    """Un 429 abre el circuito por Retry-After (segundos o fecha HTTP) o, sin él, por el enfriamiento."""
+    retry_date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+    cases = [
+        # (nombre, Retry-After, segundos abierto esperados)
+        ("sin Retry-After", None, 30),
+        ("Retry-After 5", "5", 5),
+        ("Retry-After fecha", retry_date, 120),
+        ("Retry-After inválido", "pronto", 30),
+    ]
+    ok = True
+    for name, retry_after, open_s in cases:
+        clock = FakeClock()
+        router = make_router({"azure": 1.0}, clock)
+        error = {"error": "Error de Azure STT (429): Too Many Requests", "status_code": 429, "retry_after": retry_after}
+        router.acquire("azure")
+        router.release("azure", FakeEngine("azure", error).transcribe_buffer(BUFFER, "es"), 10.0)
+
+        state = router.state("azure")
+        clock.advance(open_s - 2)
+        still_open = state.breaker.state == "open"
+        clock.advance(4)
+        passed = still_open and state.breaker.state == "half_open" and state.in_flight == 0 and state.quota_errors == 1
+        ok &= passed
+        print(f"[TestEngineRouter] 429 {name:<21} -> abierto ~{open_s} s | {'OK' if passed else 'FALLÓ'}")
+    return ok
+
+
+def check_bucket() -> bool:
+    """El token bucket permite la ráfaga y repone `rate` tokens por segundo."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    burst = [bucket.acquire() for _ in range(3)]
+    clock.advance(0.25)
+    early = bucket.acquire()
+    clock.advance(0.25)
+    refilled = bucket.acquire()
+    clock.advance(10)
+    capped = [bucket.acquire() for _ in range(3)]
+    ok = burst == [True, True, False] and not early and refilled and capped == [True, True, False]
+    print(f"[TestEngineRouter] Token bucket: ráfaga {burst}, reposición {refilled}, tope {capped} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_rank() -> bool:
+    """Sanos dentro del objetivo por costo, error y p95; fuera del objetivo al final; abiertos fuera."""
+    clock = FakeClock()
+    tracker = LatencyTracker(min_samples=1)
+    router = make_router({"whisper": 0.0, "google": 1.0, "azure": 1.0, "deepgram": 1.0}, clock, tracker)
+    router.target_ms = 10000
+    for engine, latency in (("whisper", 20000), ("google", 3000), ("azure", 2000), ("deepgram", 1000)):
+        tracker.record(engine, latency)
+    order = router.rank()
+
+    for _ in range(3):
+        router.state("deepgram").breaker.record(False)
+    without_open = router.rank()
+    expected = ["deepgram", "azure", "google", "whisper"]
+    ok = order == expected and without_open == ["azure", "google", "whisper"]
+    print(f"[TestEngineRouter] Orden {order}, con deepgram abierto {without_open} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_reported_engine() -> bool:
+    """raw['router']['engine'] es el motor que produjo el resultado, no el último rechazado."""
+    clock = FakeClock()
+    router = make_router({"google": 1.0, "azure": 2.0}, clock)
+    # azure en semiabierto con la prueba ya tomada: entra en el orden pero acquire lo rechaza.
+    azure = router.state("azure").breaker
+    for _ in range(3):
+        azure.record(False)
+    clock.advance(30)
+    azure.allow()
+
+    registry = FakeRegistry({"google": FakeEngine("google", {"error": "Google caído"}), "azure": FakeEngine("azure")})
+    result = RoutedTranscriber(router, "auto", registry=registry).transcribe_buffer(BUFFER, "es")
+    report = result.raw["router"]
+    ok = report["engine"] == "google" and [a["engine"] for a in report["attempts"]] == ["google", "azure"]
+    print(f"[TestEngineRouter] Motor reportado {report['engine']}, intentos {report['attempts']} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_hedge_through_router() -> bool:
+    """Las llamadas cubiertas toman cupo del router: el respaldo con circuito abierto no se llama."""
+    clock = FakeClock()
+    router = make_router({"google": 1.0, "azure": 1.0}, clock)
+    for _ in range(3):
+        router.state("azure").breaker.record(False)
+    registry = FakeRegistry({"google": FakeEngine("google", {"error": "Google caído"}), "azure": FakeEngine("azure")})
+
+    class RoutedLease:
+        @staticmethod
+        def lease(engine, model_size):
+            return nullcontext(RoutedTranscriber(router, engine, model_size, registry=registry))
+
+    result = HedgedTranscriber(RoutedLease, "google", "azure", default_delay_ms=50).transcribe_buffer(BUFFER, "es")
+    status = router.status()
+    ok = (
+        result.raw["hedge"]["fired"] and result.raw["hedge"]["winner"] is None
+        and status["google"]["requests"] == 1 and status["azure"]["requests"] == 0
+        and status["google"]["in_flight"] == 0
+    )
+    print(
+        f"[TestEngineRouter] Hedging por el router: google {status['google']['requests']} petición, "
+        f"azure {status['azure']['requests']} (circuito {status['azure']['circuit']}) | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba el EngineRouter con un reloj manual: interruptor y prueba en
+    semiabierto, apertura por 429, reposición del token bucket, orden de
+    motores, motor reportado y hedging a través del router.
+    """
+    success = check_breaker()
+    success &= check_quota()
+    success &= check_bucket()
+    success &= check_rank()
+    success &= check_reported_engine()
+    success &= check_hedge_through_router()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
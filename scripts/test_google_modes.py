@@ -0,0 +1,149 @@
+import sys
+from concurrent import futures
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.factory import DecoderFactory  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+SAMPLE = SAMPLES_DIR / "whatsapp.wav"
+UTTERANCES = ["primera frase", "segunda frase", "tercera frase"]
+
+
+def start_fake_speech_server(calls: dict):
+    """
+    Levanta un servidor gRPC local con el servicio google.cloud.speech.v1.Speech.
+    Cada método responde varios enunciados para verificar que se unan todos;
+    el streaming además envía un resultado intermedio que debe ignorarse.
+    """
+    import grpc
+    from google.cloud import speech
+    from google.longrunning import operations_pb2
+    from google.protobuf import any_pb2
+
+    def results():
+        return [
+            speech.SpeechRecognitionResult(
+                alternatives=[speech.SpeechRecognitionAlternative(transcript=text, confidence=0.8)]
+            )
+            for text in UTTERANCES
+        ]
+
+    def recognize(request, context):
+        calls["recognize"] = calls.get("recognize", 0) + 1
+        return speech.RecognizeResponse(results=results())
+
+    def streaming_recognize(request_iterator, context):
+        chunks = 0
+        for request in request_iterator:
+            chunks += bool(request.audio_content)
+        calls["streaming_chunks"] = chunks
+        yield speech.StreamingRecognizeResponse(
+            results=[speech.StreamingRecognitionResult(
+                alternatives=[speech.SpeechRecognitionAlternative(transcript="intermedio")], is_final=False
+            )]
+        )
+        for result in results():
+            yield speech.StreamingRecognizeResponse(
+                results=[speech.StreamingRecognitionResult(alternatives=result.alternatives, is_final=True)]
+            )
+
+    def long_running_recognize(request, context):
+        calls["long_running"] = calls.get("long_running", 0) + 1
+        response = any_pb2.Any()
+        response.Pack(speech.LongRunningRecognizeResponse.pb(speech.LongRunningRecognizeResponse(results=results())))
+        return operations_pb2.Operation(name="operations/fake", done=True, response=response)
+
+    handler = grpc.method_handlers_generic_handler("google.cloud.speech.v1.Speech", {
+        "Recognize": grpc.unary_unary_rpc_method_handler(
+            recognize,
+            request_deserializer=speech.RecognizeRequest.deserialize,
+            response_serializer=speech.RecognizeResponse.serialize,
+        ),
+        "StreamingRecognize": grpc.stream_stream_rpc_method_handler(
+            streaming_recognize,
+            request_deserializer=speech.StreamingRecognizeRequest.deserialize,
+            response_serializer=speech.StreamingRecognizeResponse.serialize,
+        ),
+        "LongRunningRecognize": grpc.unary_unary_rpc_method_handler(
+            long_running_recognize,
+            request_deserializer=speech.LongRunningRecognizeRequest.deserialize,
+            response_serializer=operations_pb2.Operation.SerializeToString,
+        ),
+    })
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, f"127.0.0.1:{port}"
+
+
+def run_checks() -> bool:
+    """Verifica los tres modos, la unión de resultados y el cliente compartido."""
+    try:
+        import grpc
+        from google.cloud import speech
+        from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
+        from adapters.stt import google_adapter
+    except ImportError as e:
+        print(f"[TestGoogleModes] Omitido: {e}")
+        return True
+
+    calls = {}
+    server, address = start_fake_speech_server(calls)
+    google_adapter._CLIENT = speech.SpeechClient(
+        transport=SpeechGrpcTransport(channel=grpc.insecure_channel(address))
+    )
+
+    first, second = google_adapter.GoogleSTTAdapter(), google_adapter.GoogleSTTAdapter()
+    ok = first.client is second.client
+    print(f"[TestGoogleModes] Cliente compartido por el proceso: {'OK' if ok else 'FALLÓ'}")
+
+    buffer = DecoderFactory.get(provider="test", file_path=SAMPLE).decode(SAMPLE)
+    expected = " ".join(UTTERANCES)
+    limits = {"sync": (60, 120), "streaming": (1, 60), "long_running": (1, 2)}
+
+    for mode, (sync_max, stream_max) in limits.items():
+        first.sync_max_s, first.stream_max_s = sync_max, stream_max
+        result = first.transcribe_buffer(buffer, "es-MX")
+        passed = result.text == expected and result.raw.get("mode") == mode and "error" not in result.raw
+        ok &= passed
+        print(f"[TestGoogleModes] {mode:<12} '{result.text}' | {'OK' if passed else 'FALLÓ'}")
+
+    streamed = calls.get("streaming_chunks", 0) > 1
+    ok &= streamed
+    print(f"[TestGoogleModes] Tramas enviadas en streaming: {calls.get('streaming_chunks', 0)} | {'OK' if streamed else 'FALLÓ'}")
+
+    first.sync_max_s, first.stream_max_s = 1, 2
+    first.inline_max_bytes = first.transcribe_buffer(buffer, "es-MX").raw["upload"]["bytes"] // 2
+    before = calls.get("long_running", 0)
+    result = first.transcribe_buffer(buffer, "es-MX")
+    parts = result.raw.get("upload", {}).get("parts", 1)
+    passed = (
+        parts >= 2
+        and calls.get("long_running", 0) - before == parts
+        and result.text == " ".join([expected] * parts)
+    )
+    ok &= passed
+    print(f"[TestGoogleModes] long_running sobre el límite en línea: {parts} partes | {'OK' if passed else 'FALLÓ'}")
+
+    first.sync_max_s, first.stream_max_s = 1, 60
+    result = first.transcribe(SAMPLE, "es-MX")
+    passed = result.text == expected and result.raw.get("mode") == "streaming"
+    ok &= passed
+    print(f"[TestGoogleModes] streaming desde archivo por bloques | {'OK' if passed else 'FALLÓ'}")
+
+    server.stop(0)
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba los modos sync, streaming y long_running de GoogleSTTAdapter
+    contra un servidor gRPC local que imita el servicio Speech de Google.
+    """
+    success = run_checks()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,122 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.stt.hedging import HedgedTranscriber, LatencyTracker  # noqa: E402
+from domain.entities import AudioBuffer, TranscriptResult  # noqa: E402
+
+BUFFER = AudioBuffer(samples=np.zeros(16000, dtype=np.float32), sample_rate=16000)
+DELAY_MS = 50
+
+
+class FakeEngine:
+    """Motor de prueba: espera `delay_s` (o hasta que se libere `gate`) y responde texto o error."""
+
+    def __init__(self, name: str, delay_s: float = 0.0, error: bool = False, gate: threading.Event = None):
+        self.name = name
+        self.delay_s = delay_s
+        self.error = error
+        self.gate = gate
+
+    def transcribe_buffer(self, buffer, language) -> TranscriptResult:
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay_s)
+        raw = {"error": f"{self.name} falló"} if self.error else {}
+        text = "" if self.error else self.name
+        return TranscriptResult(text, 0.9, language, datetime.utcnow(), self.name, "wav", raw)
+
+
+class FakeRegistry:
+    def __init__(self, engines: dict):
+        self.engines = engines
+
+    @contextmanager
+    def lease(self, engine: str, model_size: str):
+        yield self.engines[engine]
+
+
+def hedged(primary: FakeEngine, backup: FakeEngine, **kwargs) -> HedgedTranscriber:
+    registry = FakeRegistry({primary.name: primary, backup.name: backup})
+    kwargs.setdefault("tracker", LatencyTracker(min_samples=1))
+    return HedgedTranscriber(registry, primary.name, backup.name, default_delay_ms=DELAY_MS, **kwargs)
+
+
+def check_races() -> bool:
+    """Primario rápido, primario lento, primario con error y ambos con error."""
+    cases = [
+        # (nombre, primario, respaldo, texto, ganador, respaldo lanzado)
+        ("primario rápido", FakeEngine("google"), FakeEngine("azure"), "google", "google", False),
+        ("primario lento", FakeEngine("google", 0.5), FakeEngine("azure"), "azure", "azure", True),
+        ("primario con error", FakeEngine("google", error=True), FakeEngine("azure", 0.1), "azure", "azure", True),
+        ("ambos con error", FakeEngine("google", error=True), FakeEngine("azure", error=True), "", None, True),
+    ]
+    ok = True
+    for name, primary, backup, text, winner, fired in cases:
+        result = hedged(primary, backup).transcribe_buffer(BUFFER, "es")
+        hedge = result.raw["hedge"]
+        passed = result.text == text and hedge["winner"] == winner and hedge["fired"] == fired
+        if winner is None:
+            passed &= result.raw.get("error") == "google falló"
+        ok &= passed
+        print(
+            f"[TestHedging] {name:<19} -> ganador {hedge['winner']}, respaldo lanzado {hedge['fired']}, "
+            f"abandonadas {hedge['abandoned']} | {'OK' if passed else 'FALLÓ'}"
+        )
+    return ok
+
+
+def check_errors_not_recorded() -> bool:
+    """Solo las respuestas aceptables alimentan el historial de latencias."""
+    tracker = LatencyTracker(min_samples=1)
+    hedged(FakeEngine("google", error=True), FakeEngine("azure", error=True), tracker=tracker).transcribe_buffer(
+        BUFFER, "es"
+    )
+    failed = tracker.snapshot()
+    hedged(FakeEngine("google"), FakeEngine("azure"), tracker=tracker).transcribe_buffer(BUFFER, "es")
+    snapshot = tracker.snapshot()
+    ok = failed == {} and snapshot["google"]["samples"] == 1 and "azure" not in snapshot
+    print(f"[TestHedging] Latencias registradas: {snapshot} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_in_flight_cap() -> bool:
+    """
+    Con el respaldo ya ocupado por una llamada abandonada que no responde,
+    la siguiente petición no lanza otro respaldo y espera solo al primario.
+    """
+    gate = threading.Event()
+    primary, backup = FakeEngine("google", 0.2), FakeEngine("azure", gate=gate)
+    # Sin historial suficiente el plazo sigue en DELAY_MS para ambas peticiones.
+    transcriber = hedged(primary, backup, max_in_flight=1, tracker=LatencyTracker())
+
+    first = transcriber.transcribe_buffer(BUFFER, "es").raw["hedge"]
+    second = transcriber.transcribe_buffer(BUFFER, "es").raw["hedge"]
+    gate.set()
+
+    ok = (
+        first["fired"] and first["winner"] == "google" and first["abandoned"] == ["azure"]
+        and not second["fired"] and second["skipped"] is not None and second["winner"] == "google"
+    )
+    print(f"[TestHedging] Respaldo omitido con el motor ocupado: '{second['skipped']}' | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba las carreras de HedgedTranscriber con motores falsos: ganador,
+    errores, historial de latencias y límite de llamadas abandonadas.
+    """
+    success = check_races()
+    success &= check_errors_not_recorded()
+    success &= check_in_flight_cap()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
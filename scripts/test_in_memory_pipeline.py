@@ -0,0 +1,80 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.factory import DecoderFactory  # noqa: E402
+from domain.entities import AudioMeta, TranscriptResult  # noqa: E402
+from domain.service import SttService  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+SAMPLES = ["whatsapp.wav", "whatsapp.ogg", "teams.m4a", "wa.waptt.opus"]
+
+
+class RecordingDenoiser:
+    """Reductor de ruido de prueba que devuelve el mismo buffer y lo registra."""
+
+    def __init__(self):
+        self.seen = None
+
+    def reduce_buffer(self, buffer):
+        self.seen = buffer
+        return buffer
+
+
+class RecordingEngine:
+    """Motor de prueba que guarda el buffer recibido."""
+
+    def __init__(self):
+        self.seen = None
+
+    def transcribe_buffer(self, buffer, language: str) -> TranscriptResult:
+        self.seen = buffer
+        return TranscriptResult("hola", 1.0, language, datetime.utcnow(), "fake", "wav", {})
+
+
+def check_decoders() -> bool:
+    """Cada decodificador entrega float32 mono 16 kHz en [-1, 1] sin escribir archivos junto al original."""
+    ok = True
+    for name in SAMPLES:
+        path = SAMPLES_DIR / name
+        before = set(SAMPLES_DIR.iterdir())
+        buffer = DecoderFactory.get(provider="test", file_path=path).decode(path)
+        written = set(SAMPLES_DIR.iterdir()) - before
+        passed = (
+            buffer.samples.dtype == np.float32
+            and buffer.samples.ndim == 1
+            and buffer.sample_rate == 16000
+            and float(np.abs(buffer.samples).max()) <= 1.0 + 1e-6
+            and buffer.duration > 0
+            and not written
+        )
+        ok &= passed
+        print(f"[TestInMemoryPipeline] {name:<15} {buffer.duration:5.2f} s | {'OK' if passed else 'FALLÓ'}")
+    return ok
+
+
+def check_service_handoff() -> bool:
+    """SttService entrega al motor el mismo arreglo que produjo la limpieza, sin pasar por disco."""
+    path = SAMPLES_DIR / "whatsapp.wav"
+    denoiser, engine = RecordingDenoiser(), RecordingEngine()
+    service = SttService(DecoderFactory.get(provider="test", file_path=path), denoiser, engine)
+    result = service.run(path, AudioMeta(provider="test", content_type="audio/wav", lang="es-MX"))
+    ok = result.text == "hola" and engine.seen is denoiser.seen and engine.seen is not None
+    print(f"[TestInMemoryPipeline] Buffer compartido entre etapas | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba que el audio se decodifique una sola vez a un AudioBuffer y
+    viaje en memoria del decodificador al reductor de ruido y al motor.
+    """
+    success = check_decoders()
+    success &= check_service_handoff()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,121 @@
+import io
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.probe import probe  # noqa: E402
+from adapters.input.spool_writer import IngestLimitError, SpoolWriter  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+SERIAL = 0x1234
+
+
+def ogg_page(payload: bytes, granule: int, seq: int, flags: int = 0, serial: int = SERIAL) -> bytes:
+    """Arma una página Ogg (sin CRC, que el escritor no verifica)."""
+    segments = [255] * (len(payload) // 255) + [len(payload) % 255]
+    return (
+        b"OggS" + bytes([0, flags]) + struct.pack("<qII", granule, serial, seq) + b"\x00\x00\x00\x00"
+        + bytes([len(segments)]) + bytes(segments) + payload
+    )
+
+
+def opus_stream(seconds: float, fake_pages: bytes) -> bytes:
+    """Flujo Ogg/Opus sintético de `seconds` segundos con bytes 'OggS' falsos dentro del audio."""
+    head = b"OpusHead" + bytes([1, 1]) + struct.pack("<HIhB", 312, 48000, 0, 0)
+    pages = [ogg_page(head, 0, 0, flags=0x02), ogg_page(b"OpusTags" + bytes(8), 0, 1)]
+    granule = 312
+    for seq in range(2, 12):
+        granule += int(seconds * 48000 / 10)
+        pages.append(ogg_page(bytes(100) + fake_pages + bytes(100), granule, seq, flags=0x04 if seq == 11 else 0))
+    return b"".join(pages)
+
+
+def spool(data: bytes, path: Path, chunk: int = 97, **limits) -> SpoolWriter:
+    writer = SpoolWriter(path, **limits)
+    for i in range(0, len(data), chunk):
+        writer.write(data[i:i + chunk])
+    writer.close()
+    return writer
+
+
+def check_ogg_false_sync(tmp: Path) -> bool:
+    """Un 'OggS' dentro del audio (otra versión, banderas u otro flujo) no altera la duración."""
+    fake = (
+        b"OggS" + bytes([0, 0]) + struct.pack("<qII", 48000 * 9999, 0xBEEF, 0)
+        + b"OggS" + bytes([7, 0xF0]) + struct.pack("<qII", 48000 * 9999, SERIAL, 0)
+    )
+    data = opus_stream(12.0, fake)
+    path = tmp / "falso.opus"
+    writer = spool(data, path)
+    probed = probe(path).duration
+    ok = abs(writer.duration - 12.0) < 0.01 and abs(probed - 12.0) < 0.01
+    print(f"[TestIngestLimits] Ogg con 'OggS' falsos: spool {writer.duration:.2f} s, probe {probed:.2f} s | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_real_opus(tmp: Path) -> bool:
+    """La duración estimada en streaming coincide con la del sondeo para un Opus real."""
+    source = SAMPLES_DIR / "wa.waptt.opus"
+    writer = spool(source.read_bytes(), tmp / "real.opus", chunk=1000)
+    probed = probe(source).duration
+    ok = writer.duration is not None and abs(writer.duration - probed) < 0.05
+    print(f"[TestIngestLimits] Opus real: spool {writer.duration:.2f} s, probe {probed:.2f} s | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_limits(tmp: Path) -> bool:
+    """Los límites de tamaño y de duración abortan la escritura a mitad del flujo."""
+    results = {}
+    for name, data, limits in (
+        ("tamaño", (SAMPLES_DIR / "web.wav").read_bytes(), {"max_bytes": 10_000}),
+        ("duración", (SAMPLES_DIR / "web.wav").read_bytes(), {"max_seconds": 1.0}),
+        ("duración Ogg", opus_stream(12.0, b""), {"max_seconds": 5.0}),
+    ):
+        try:
+            spool(data, tmp / "limite.bin", chunk=4096, **limits)
+            results[name] = False
+        except IngestLimitError:
+            results[name] = True
+    ok = all(results.values())
+    print(f"[TestIngestLimits] Límites que abortan: {results} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_http_413() -> bool:
+    """/transcribe responde 413 (no 200) cuando la entrada supera el límite."""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        print(f"[TestIngestLimits] HTTP 413: omitido ({e})")
+        return True
+
+    os.environ["STT_MAX_INPUT_BYTES"] = "10000"
+    from app.main import app
+
+    client = TestClient(app)
+    data = (SAMPLES_DIR / "web.wav").read_bytes()
+    response = client.post("/transcribe", files={"file": ("web.wav", io.BytesIO(data), "audio/wav")})
+    ok = response.status_code == 413 and "tamaño máximo" in response.json().get("error", "")
+    print(f"[TestIngestLimits] HTTP {response.status_code}: {response.json()} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba la ingesta por bloques: estimación de duración Ogg robusta a
+    bytes 'OggS' dentro del audio, límites de tamaño y duración y el 413
+    de /transcribe.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        success = check_ogg_false_sync(tmp)
+        success &= check_real_opus(tmp)
+        success &= check_limits(tmp)
+    success &= check_http_413()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
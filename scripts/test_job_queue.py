@@ -0,0 +1,202 @@
+import asyncio
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.jobs.sqlite_job_queue import SqliteJobQueue, make_owner  # noqa: E402
+from app.job_runner import JobRunner  # noqa: E402
+from domain.entities import TranscriptResult  # noqa: E402
+
+PARAMS = {"provider": "test", "mime_type": "audio/wav", "lang": "es-MX", "stt_engine": "whisper"}
+
+
+def dead_owner() -> str:
+    """Dueño de este host cuyo proceso ya terminó."""
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return make_owner().split(":")[0] + f":{proc.pid}:deadbeef"
+
+
+def set_heartbeat(queue: SqliteJobQueue, job_id: str, heartbeat_at: str):
+    with queue._connect() as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (heartbeat_at, job_id))
+
+
+def check_lazy_creation(tmp: Path) -> bool:
+    """Construir la cola no crea la base; el primer uso sí."""
+    queue = SqliteJobQueue(tmp / "lazy" / "jobs.sqlite3")
+    created_early = queue.db_path.exists()
+    queue.get("nada")
+    ok = not created_early and queue.db_path.exists()
+    print(f"[TestJobQueue] Base creada en el primer uso | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_lifecycle(tmp: Path) -> bool:
+    """queued -> running (con dueño) -> done, en orden de llegada."""
+    queue = SqliteJobQueue(tmp / "lifecycle.sqlite3")
+    first = queue.enqueue(PARAMS, tmp / "a.wav")
+    second = queue.enqueue(PARAMS, tmp / "b.wav", "http://callback")
+    owner = make_owner()
+
+    claimed = queue.claim(owner)
+    queue.complete(claimed["job_id"], {"text": "hola"})
+    done = queue.get(first)
+    queue.fail(queue.claim(owner)["job_id"], "boom")
+    failed = queue.get(second)
+
+    ok = (
+        claimed["job_id"] == first and claimed["attempts"] == 1
+        and done["status"] == "done" and done["result"] == {"text": "hola"}
+        and failed["status"] == "failed" and failed["error"] == "boom"
+        and queue.claim(owner) is None
+    )
+    print(f"[TestJobQueue] Ciclo queued -> running -> done/failed | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_live_owner_untouched(tmp: Path) -> bool:
+    """Un trabajo de otro worker vivo con latido reciente no se reencola."""
+    queue = SqliteJobQueue(tmp / "live.sqlite3", stale_after_s=60)
+    job_id = queue.enqueue(PARAMS, tmp / "a.wav")
+    queue.claim(make_owner())
+    recovered = queue.requeue_stale(make_owner())
+    ok = recovered == {"requeued": [], "failed": []} and queue.get(job_id)["status"] == "running"
+    print(f"[TestJobQueue] Trabajo de un worker vivo no se toca: {recovered} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_stale_and_dead_owners(tmp: Path) -> bool:
+    """Se recuperan los trabajos con latido viejo o cuyo proceso ya no existe."""
+    queue = SqliteJobQueue(tmp / "stale.sqlite3", stale_after_s=60)
+    remote = queue.enqueue(PARAMS, tmp / "a.wav")
+    queue.claim("otro-host:1234:cafe")
+    set_heartbeat(queue, remote, "2000-01-01T00:00:00")
+
+    local = queue.enqueue(PARAMS, tmp / "b.wav")
+    queue.claim(dead_owner())
+
+    recovered = queue.requeue_stale(make_owner())
+    ok = sorted(recovered["requeued"]) == sorted([remote, local])
+    ok &= queue.get(remote)["status"] == "queued" and queue.get(local)["status"] == "queued"
+    print(f"[TestJobQueue] Latido vencido y proceso muerto reencolados | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_heartbeat(tmp: Path) -> bool:
+    """El latido del dueño evita que su trabajo se considere huérfano."""
+    queue = SqliteJobQueue(tmp / "heartbeat.sqlite3", stale_after_s=60)
+    owner = "otro-host:1234:cafe"
+    job_id = queue.enqueue(PARAMS, tmp / "a.wav")
+    queue.claim(owner)
+    set_heartbeat(queue, job_id, "2000-01-01T00:00:00")
+    renewed = queue.heartbeat(owner)
+    recovered = queue.requeue_stale(make_owner())
+    ok = renewed == 1 and not recovered["requeued"] and queue.get(job_id)["status"] == "running"
+    print(f"[TestJobQueue] Latido renovado mantiene el trabajo | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_max_attempts(tmp: Path) -> bool:
+    """Un trabajo que tumba el proceso se marca 'failed' al agotar los intentos."""
+    queue = SqliteJobQueue(tmp / "attempts.sqlite3", max_attempts=2)
+    job_id = queue.enqueue(PARAMS, tmp / "a.wav")
+    history = []
+    for _ in range(2):
+        queue.claim(dead_owner())
+        recovered = queue.requeue_stale(make_owner())
+        history.append("failed" if recovered["failed"] else "requeued")
+
+    job = queue.get(job_id)
+    ok = history == ["requeued", "failed"] and job["status"] == "failed" and job["attempts"] == 2
+    print(f"[TestJobQueue] Intentos máximos: {history} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+class DeadWebhook(BaseHTTPRequestHandler):
+    """Webhook que siempre responde 503."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(503)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class InstantPool:
+    """Pool de transcripción que responde al instante."""
+
+    async def submit(self, fn, *args):
+        return TranscriptResult("hola", 0.9, "es-MX", datetime.utcnow(), "whisper", "wav", {}), {"depth": 0}
+
+
+def check_webhook_off_runner(tmp: Path) -> bool:
+    """
+    Un webhook caído no retiene al runner: el trabajo termina con la entrega
+    'pending' y el resultado final de los reintentos queda en la fila.
+    """
+    server = HTTPServer(("127.0.0.1", 0), DeadWebhook)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    queue = SqliteJobQueue(tmp / "webhook.sqlite3")
+    url = f"http://127.0.0.1:{server.server_port}/hook"
+    job_id = queue.enqueue(PARAMS, tmp / "a.wav", url)
+
+    async def scenario():
+        runner = JobRunner(queue, InstantPool(), runners=1)
+        runner.callback_retries = 2
+        runner.start()
+        try:
+            start = time.perf_counter()
+            await runner._process(queue.claim(runner.owner))
+            elapsed = time.perf_counter() - start
+            during = queue.get(job_id)
+            deadline = time.monotonic() + 10
+            while runner._deliveries and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            return elapsed, during
+        finally:
+            await runner.stop()
+
+    try:
+        elapsed, during = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+    final = queue.get(job_id)
+    ok = (
+        elapsed < 1.0 and during["status"] == "done" and during["callback_status"] == "pending"
+        and final["callback_status"] == "failed (HTTP 503)"
+    )
+    print(
+        f"[TestJobQueue] Webhook caído fuera del runner: trabajo listo en {elapsed:.2f} s, "
+        f"entrega '{final['callback_status']}' | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba las transiciones de estado de la cola SQLite: dueño y latido al
+    reclamar, recuperación solo de trabajos huérfanos y límite de intentos;
+    y que el runner entregue los webhooks sin retener su turno.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        success = check_lazy_creation(tmp)
+        success &= check_lifecycle(tmp)
+        success &= check_live_owner_untouched(tmp)
+        success &= check_stale_and_dead_owners(tmp)
+        success &= check_heartbeat(tmp)
+        success &= check_max_attempts(tmp)
+        success &= check_webhook_off_runner(tmp)
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
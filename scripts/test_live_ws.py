@@ -0,0 +1,132 @@
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+# Sin motores configurados el pool arranca sin cargar modelos; la cola de
+# trabajos y la caché van a un directorio temporal.
+TMP_DIR = tempfile.mkdtemp()
+os.environ["STT_ENGINES"] = ""
+os.environ["STT_JOBS_DB"] = str(Path(TMP_DIR) / "jobs.sqlite3")
+os.environ["STT_CACHE_DIR"] = str(Path(TMP_DIR) / "cache")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.websockets import WebSocketDisconnect  # noqa: E402
+
+from app import main  # noqa: E402
+from domain.entities import TranscriptResult  # noqa: E402
+
+
+def fake_window_transcription(samples, lang, stt_engine="whisper", model_size=None) -> TranscriptResult:
+    """Sustituye al motor: devuelve la duración de la ventana como texto."""
+    return TranscriptResult(f"{len(samples) / 16000:.1f} s", 0.9, lang, datetime.utcnow(), "fake", "pcm", {})
+
+
+def speech(seconds: float) -> bytes:
+    """Tono de `seconds` segundos entre 0.5 s de silencio a cada lado, en PCM16."""
+    t = np.arange(int(16000 * seconds)) / 16000
+    silence = np.zeros(8000)
+    y = np.concatenate([silence, 0.5 * np.sin(2 * np.pi * 220 * t), silence])
+    return (y * 32767).astype("<i2").tobytes()
+
+
+def receive_until_closed(ws) -> list:
+    """Lee mensajes JSON hasta 'done' o hasta que el servidor cierre el socket."""
+    messages = []
+    try:
+        while True:
+            message = ws.receive_json()
+            messages.append(message)
+            if message["type"] == "done":
+                break
+    except WebSocketDisconnect as e:
+        messages.append({"type": "closed", "code": e.code})
+    return messages
+
+
+def check_format_param(client: TestClient) -> bool:
+    """El parámetro público sigue siendo ?format=; un formato desconocido se rechaza con 1003."""
+    with client.websocket_connect("/ws/transcribe?format=f32") as ws:
+        ready = ws.receive_json()
+        ws.send_text("end")
+        done = receive_until_closed(ws)
+    with client.websocket_connect("/ws/transcribe?format=mp3") as ws:
+        rejected = receive_until_closed(ws)
+
+    ok = (
+        ready["type"] == "ready"
+        and done[-1]["type"] == "done"
+        and rejected[0]["type"] == "error"
+        and rejected[-1] == {"type": "closed", "code": 1003}
+    )
+    print(f"[TestLiveWs] format=f32 aceptado, format=mp3 rechazado | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_bad_opus_packet(client: TestClient) -> bool:
+    """Un paquete Opus corrupto se reporta como error y la sesión continúa hasta 'done'."""
+    with client.websocket_connect("/ws/transcribe?format=opus") as ws:
+        ws.receive_json()
+        ws.send_bytes(b"\xff\xfe no es opus \x00\x01")
+        error = ws.receive_json()
+        ws.send_text("end")
+        rest = receive_until_closed(ws)
+
+    ok = error["type"] == "error" and rest[-1]["type"] == "done"
+    print(f"[TestLiveWs] Paquete Opus corrupto -> {error['type']}, sesión {rest[-1]['type']} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_final_transcript(client: TestClient) -> bool:
+    """Con el pool iniciado, el audio enviado produce un tramo final y luego 'done'."""
+    with client.websocket_connect("/ws/transcribe?format=pcm16") as ws:
+        ws.receive_json()
+        ws.send_bytes(speech(1.0))
+        ws.send_text("end")
+        messages = receive_until_closed(ws)
+
+    finals = [m for m in messages if m["type"] == "final"]
+    ok = len(finals) == 1 and finals[0]["text"] == "2.0 s" and messages[-1]["type"] == "done"
+    print(f"[TestLiveWs] Tramo final {[m['text'] for m in finals]} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_pool_not_started() -> bool:
+    """Sin pool iniciado la sesión termina con un error explícito y cierre 1011, no como desconexión."""
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/transcribe?format=pcm16") as ws:
+        ws.receive_json()
+        ws.send_bytes(speech(1.0))
+        ws.send_text("end")
+        messages = receive_until_closed(ws)
+
+    ok = (
+        messages[0]["type"] == "error"
+        and "no está iniciado" in messages[0]["error"]
+        and messages[-1] == {"type": "closed", "code": 1011}
+    )
+    print(f"[TestLiveWs] Pool sin iniciar -> {[m['type'] for m in messages]} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba el endpoint /ws/transcribe con un motor falso: parámetro format,
+    paquetes corruptos, transcripción final y el error de pool sin iniciar.
+    """
+    main.run_window_transcription = fake_window_transcription
+    success = check_pool_not_started()
+    with TestClient(main.app) as client:
+        success &= check_format_param(client)
+        success &= check_bad_opus_packet(client)
+        success &= check_final_transcript(client)
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,99 @@
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.factory import DecoderFactory  # noqa: E402
+from adapters.decoder.m4a_aac import M4ADecoder  # noqa: E402
+from adapters.decoder.ogg_opus import OggOpusDecoder  # noqa: E402
+from adapters.decoder.probe import probe, sniff_format  # noqa: E402
+from adapters.decoder.wav_decoder import WavDecoder  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+
+MAGIC = {
+    "wav": b"RIFF\x24\x00\x00\x00WAVEfmt ",
+    "ogg": b"OggS\x00\x02" + bytes(10),
+    "m4a": b"\x00\x00\x00\x20ftypM4A ",
+    "flac": b"fLaC\x00\x00\x00\x22",
+    "mp3": b"ID3\x04\x00\x00",
+    "webm": b"\x1a\x45\xdf\xa3" + bytes(8),
+    "": b"hola mundo, no soy audio",
+}
+
+
+def check_magic_bytes() -> bool:
+    """Cada contenedor se reconoce por sus bytes mágicos; el resto queda vacío."""
+    ok = True
+    for expected, header in MAGIC.items():
+        found = sniff_format(header)
+        ok &= found == expected
+        print(f"[TestProbe] Bytes mágicos {expected or 'desconocido':<11} -> '{found}' | {'OK' if found == expected else 'FALLÓ'}")
+    return ok
+
+
+def check_headers(tmp: Path) -> bool:
+    """El sondeo lee códec, frecuencia, canales y duración sin decodificar."""
+    flac = tmp / "tono.flac"
+    sf.write(flac, np.zeros(44100 * 2, dtype=np.float32), 44100, format="FLAC")
+
+    expected = {
+        SAMPLES_DIR / "web.wav": ("wav", "pcm", None),
+        SAMPLES_DIR / "wa.waptt.opus": ("ogg", "opus", 48000),
+        SAMPLES_DIR / "teams.m4a": ("m4a", "aac", None),
+        flac: ("flac", "flac", 44100),
+    }
+    ok = True
+    for path, (container, codec, rate) in expected.items():
+        info = probe(path)
+        duration = sf.info(str(path)).duration if container in ("wav", "flac") else None
+        passed = (
+            info.container == container and info.codec == codec
+            and (rate is None or info.sample_rate == rate)
+            and info.duration is not None and info.duration > 0
+            and (duration is None or abs(info.duration - duration) < 0.01)
+        )
+        ok &= passed
+        print(
+            f"[TestProbe] {path.name:<15} {info.container}/{info.codec} {info.sample_rate} Hz "
+            f"{info.channels} canal(es) {info.duration:.2f} s | {'OK' if passed else 'FALLÓ'}"
+        )
+    return ok
+
+
+def check_content_over_extension(tmp: Path) -> bool:
+    """La fábrica elige el decodificador por el contenido aunque la extensión y el MIME mientan."""
+    cases = {
+        "audio.wav": (SAMPLES_DIR / "wa.waptt.opus", OggOpusDecoder),
+        "audio.ogg": (SAMPLES_DIR / "teams.m4a", M4ADecoder),
+        "audio.m4a": (SAMPLES_DIR / "web.wav", WavDecoder),
+    }
+    ok = True
+    for name, (source, decoder_cls) in cases.items():
+        target = tmp / name
+        shutil.copyfile(source, target)
+        decoder = DecoderFactory.get(provider="whatsapp", file_path=target, mime_type="audio/ogg")
+        passed = isinstance(decoder, decoder_cls)
+        ok &= passed
+        print(f"[TestProbe] {source.name} como {name} -> {type(decoder).__name__} | {'OK' if passed else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba la detección de formato por bytes mágicos, el sondeo de
+    cabeceras y la prioridad del contenido sobre extensión y MIME.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        success = check_magic_bytes()
+        success &= check_headers(tmp)
+        success &= check_content_over_extension(tmp)
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
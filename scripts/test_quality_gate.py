@@ -0,0 +1,83 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.wav_decoder import WavDecoder  # noqa: E402
+from adapters.denoise.quality_gate import DenoiseGate, QualityReport, analyze  # noqa: E402
+
+
+def report(snr_db: float, clipping_ratio: float = 0.0) -> QualityReport:
+    return QualityReport(snr_db=snr_db, clipping_ratio=clipping_ratio, rms=0.1, duration=1.0)
+
+
+def check_decision_table() -> bool:
+    """Ruta elegida por motor según SNR, saturación y STT_DENOISE_POLICY."""
+    whisper = DenoiseGate("whisper")
+    azure = DenoiseGate("azure")
+    forced = DenoiseGate("whisper", overrides={"web": "skip", "whisper/teams": "light"})
+
+    cases = [
+        ("whisper SNR 40", whisper, report(40), "web", "skip"),
+        ("whisper SNR 20", whisper, report(20), "web", "light"),
+        ("whisper SNR 8", whisper, report(8), "web", "full"),
+        ("whisper SNR 40 saturado 5%", whisper, report(40, 0.05), "web", "full"),
+        ("whisper SNR 40 saturación 0.5%", whisper, report(40, 0.005), "web", "skip"),
+        ("azure SNR 20", azure, report(20), "web", "skip"),
+        ("azure SNR 8", azure, report(8), "web", "light"),
+        ("azure SNR 3", azure, report(3), "web", "full"),
+        ("azure SNR 20 saturado 5%", azure, report(20, 0.05), "web", "full"),
+        ("forzado por proveedor", forced, report(8, 0.05), "web", "skip"),
+        ("forzado por motor/proveedor", forced, report(40), "teams", "light"),
+    ]
+    ok = True
+    for name, gate, rep, provider, expected in cases:
+        found = gate.decide(rep, provider)
+        ok &= found == expected
+        print(f"[TestQualityGate] {name:<32} -> {found:<5} | {'OK' if found == expected else 'FALLÓ'}")
+    return ok
+
+
+def check_clipping_before_normalization(tmp: Path) -> bool:
+    """
+    La saturación se mide sobre el nivel original: un tono a -6 dBFS no está
+    saturado aunque se normalice al pico con la ganancia del decodificador, y
+    uno recortado en escala completa sí lo está.
+    """
+    t = np.arange(16000) / 16000
+    tone = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+    quiet, clipped = tmp / "quieto.wav", tmp / "saturado.wav"
+    sf.write(quiet, 0.5 * tone, 16000, subtype="PCM_16")
+    sf.write(clipped, np.clip(3.0 * tone, -1.0, 1.0), 16000, subtype="PCM_16")
+
+    decoder = WavDecoder()
+    ok = True
+    for path, saturated in ((quiet, False), (clipped, True)):
+        buffer = decoder.decode(path)
+        ratio = analyze(buffer.samples, buffer.sample_rate, buffer.metadata["source_peak"]).clipping_ratio
+        normalized = buffer.samples * np.float32(buffer.metadata["gain"])
+        naive = analyze(normalized, buffer.sample_rate).clipping_ratio
+        passed = (ratio > 0.5) if saturated else (ratio == 0.0 and naive > 0.0)
+        ok &= passed
+        print(
+            f"[TestQualityGate] {path.name:<13} saturación {ratio:.2%} (sobre la señal normalizada {naive:.2%}) "
+            f"| {'OK' if passed else 'FALLÓ'}"
+        )
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba la tabla de decisión de DenoiseGate (SNR, saturación y
+    políticas forzadas) y que la saturación se mida antes de normalizar.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        success = check_decision_table()
+        success &= check_clipping_before_normalization(Path(tmp_dir))
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
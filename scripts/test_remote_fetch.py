@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.input.remote_client import RemoteAudioClient, RemoteFetchError  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+
+
+class SamplesHandler(SimpleHTTPRequestHandler):
+    """
+    Servidor local que sirve los archivos de samples/ y simula fallos:
+    - /flaky/<archivo>: responde 503 la primera vez y después el archivo.
+    - /slow/<archivo>: tarda más que el timeout de lectura antes de responder.
+    """
+
+    protocol_version = "HTTP/1.1"
+    flaky_seen = set()
+    connections = set()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        SamplesHandler.connections.add(self.client_address)
+
+        if self.path.startswith("/flaky/") and self.path not in SamplesHandler.flaky_seen:
+            SamplesHandler.flaky_seen.add(self.path)
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.path.startswith("/slow/"):
+            time.sleep(2)
+
+        self.path = "/" + self.path.split("/")[-1]
+        super().do_GET()
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Servidor que no imprime las desconexiones provocadas por los timeouts."""
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def start_server():
+    """Levanta el servidor de muestras en un puerto libre y devuelve (servidor, url_base)."""
+    handler = partial(SamplesHandler, directory=str(SAMPLES_DIR))
+    server = QuietServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class MemorySink:
+    """Destino en memoria que calcula el hash de lo descargado."""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.digest.update(chunk)
+        self.size += len(chunk)
+
+    def discard(self):
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+
+async def fetch(client: RemoteAudioClient, url: str) -> MemorySink:
+    sinks = []
+
+    def open_sink(headers):
+        sinks.append(MemorySink())
+        return sinks[-1]
+
+    await client.stream(url, open_sink)
+    return sinks[-1]
+
+
+async def run_checks(base_url: str) -> bool:
+    """
+    Descarga todas las muestras en paralelo, verifica su hash, el reintento
+    ante un 503 y el timeout de lectura. Devuelve True si todo es correcto.
+    """
+    ok = True
+    client = RemoteAudioClient(per_host=4, read_timeout=1.0, retries=2, backoff=0.1)
+    files = sorted(p for p in SAMPLES_DIR.iterdir() if p.is_file())
+
+    start = time.perf_counter()
+    sinks = await asyncio.gather(*[fetch(client, f"{base_url}/{p.name}") for p in files])
+    elapsed = time.perf_counter() - start
+
+    for path, sink in zip(files, sinks):
+        expected = hashlib.sha256(path.read_bytes()).hexdigest()
+        match = sink.digest.hexdigest() == expected
+        ok &= match
+        print(f"[TestRemoteFetch] {path.name}: {sink.size} bytes | hash {'OK' if match else 'DISTINTO'}")
+
+    print(
+        f"[TestRemoteFetch] {len(files)} descargas en {elapsed * 1000:.1f} ms "
+        f"usando {len(SamplesHandler.connections)} conexiones TCP."
+    )
+
+    sink = await fetch(client, f"{base_url}/flaky/web.wav")
+    retried = sink.size == (SAMPLES_DIR / "web.wav").stat().st_size
+    ok &= retried
+    print(f"[TestRemoteFetch] Reintento tras 503: {'OK' if retried else 'FALLÓ'}")
+
+    try:
+        await fetch(client, f"{base_url}/slow/web.wav")
+        print("[TestRemoteFetch] Timeout de lectura: FALLÓ (la descarga no expiró)")
+        ok = False
+    except RemoteFetchError as e:
+        print(f"[TestRemoteFetch] Timeout de lectura: OK ({e})")
+
+    await client.aclose()
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba el cliente HTTP compartido contra un servidor local
+    que sirve los archivos de la carpeta samples/.
+    """
+    server, base_url = start_server()
+    success = asyncio.run(run_checks(base_url))
+    server.shutdown()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
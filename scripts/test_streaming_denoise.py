@@ -0,0 +1,93 @@
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.wav_decoder import WavDecoder  # noqa: E402
+from adapters.denoise.noisereduce_adapter import NoiseReduceAdapter  # noqa: E402
+from domain.entities import AudioBuffer  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+MIN_DIFF_SNR_DB = 30.0
+MAX_EXTRA_MEMORY_GROWTH = 1.25
+
+
+def build_signal(seconds: float, seed: int = 0) -> np.ndarray:
+    """Concatena los WAV de samples/ con ruido blanco hasta la duración pedida."""
+    decoder = WavDecoder()
+    base = np.concatenate([decoder.decode(p).samples for p in sorted(SAMPLES_DIR.glob("*.wav"))])
+    reps = int(np.ceil(seconds * 16000 / len(base)))
+    y = np.tile(base, reps)[:int(seconds * 16000)]
+    noise = 0.01 * np.random.default_rng(seed).standard_normal(len(y))
+    return (y + noise).astype(np.float32)
+
+
+def diff_snr_db(reference: np.ndarray, other: np.ndarray) -> float:
+    """Relación señal/diferencia en dB entre la salida completa y la de streaming."""
+    error = np.sum((reference - other) ** 2)
+    return float("inf") if error == 0 else float(10 * np.log10(np.sum(reference ** 2) / error))
+
+
+def check_equivalence(seconds: float = 180) -> bool:
+    """Compara el modo completo contra el modo streaming sobre la misma señal."""
+    y = build_signal(seconds)
+    full = NoiseReduceAdapter(stream_min_seconds=float("inf"))
+    streaming = NoiseReduceAdapter(stream_min_seconds=1)
+
+    start = time.perf_counter()
+    reference = full.reduce_buffer(AudioBuffer(samples=y)).samples
+    full_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = streaming.reduce_buffer(AudioBuffer(samples=y)).samples
+    streaming_s = time.perf_counter() - start
+
+    same_length = len(reference) == len(result)
+    snr = diff_snr_db(reference, result) if same_length else float("-inf")
+    print(
+        f"[TestStreamingDenoise] {seconds:.0f} s | completo {full_s:.2f} s | streaming {streaming_s:.2f} s "
+        f"| longitud {'OK' if same_length else 'DISTINTA'} | SNR de la diferencia {snr:.1f} dB"
+    )
+    return same_length and snr >= MIN_DIFF_SNR_DB
+
+
+def extra_memory_mb(seconds: float) -> float:
+    """Memoria pico del modo streaming descontando la señal de entrada y la de salida."""
+    y = build_signal(seconds)
+    adapter = NoiseReduceAdapter(stream_min_seconds=1)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = adapter.reduce_buffer(AudioBuffer(samples=y))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    output_bytes = result.samples.base.nbytes if result.samples.base is not None else result.samples.nbytes
+    return (peak - output_bytes) / 1e6
+
+
+def check_bounded_memory() -> bool:
+    """Verifica que la memoria de trabajo no crezca con la duración de la grabación."""
+    short_mb, long_mb = extra_memory_mb(300), extra_memory_mb(1200)
+    bounded = long_mb <= short_mb * MAX_EXTRA_MEMORY_GROWTH
+    print(
+        f"[TestStreamingDenoise] Memoria de trabajo: 5 min {short_mb:.1f} MB | 20 min {long_mb:.1f} MB "
+        f"| {'acotada' if bounded else 'CRECE con la duración'}"
+    )
+    return bounded
+
+
+if __name__ == "__main__":
+    """
+    Prueba el modo streaming de NoiseReduceAdapter: equivalencia con el
+    modo completo dentro de la tolerancia y memoria de trabajo acotada.
+    """
+    success = check_equivalence()
+    success &= check_bounded_memory()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
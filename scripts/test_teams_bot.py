@@ -0,0 +1,68 @@
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from bot import teams_bot  # noqa: E402
+
+
+def install_clients(stt_delay_s: dict, webhook_log: list):
+    """
+    Sustituye los clientes del bot por transportes en memoria: Tracky STT
+    tarda stt_delay_s[url] en responder y el webhook registra lo recibido.
+    """
+    async def stt_handler(request: httpx.Request) -> httpx.Response:
+        url = dict(httpx.QueryParams(request.content.decode()))["audio_url"]
+        await asyncio.sleep(stt_delay_s.get(url, 0))
+        return httpx.Response(200, json={"text": f"texto de {url}"})
+
+    async def webhook_handler(request: httpx.Request) -> httpx.Response:
+        webhook_log.append(json.loads(request.content))
+        return httpx.Response(204)
+
+    teams_bot._stt_client = httpx.AsyncClient(transport=httpx.MockTransport(stt_handler))
+    teams_bot._webhook_client = httpx.AsyncClient(transport=httpx.MockTransport(webhook_handler))
+    teams_bot._semaphore = asyncio.Semaphore(teams_bot.STT_CONCURRENCY)
+
+
+async def check_deadline_and_webhook() -> bool:
+    """
+    Un adjunto que tarda más que BOT_STT_TIMEOUT se abandona al cumplirse el
+    plazo total; los demás se reenvían al webhook por su propio cliente.
+    """
+    teams_bot.STT_TIMEOUT = 0.3
+    teams_bot.TRANSCRIPT_WEBHOOK = "http://webhook.test/transcripts"
+    webhook_log = []
+    install_clients({"http://audio/lento": 5.0}, webhook_log)
+
+    attachments = [{"contentUrl": "http://audio/rapido"}, {"contentUrl": "http://audio/lento"}]
+    started = time.perf_counter()
+    await teams_bot.deliver_transcripts({"id": "act-1"}, attachments)
+    elapsed = time.perf_counter() - started
+
+    delivered = [entry["audio_url"] for entry in webhook_log]
+    ok = delivered == ["http://audio/rapido"] and elapsed < 1.0 and webhook_log[0]["activity_id"] == "act-1"
+    ok &= teams_bot._webhook_client is not teams_bot._stt_client
+    print(
+        f"[TestTeamsBot] Plazo por llamada: {elapsed:.2f} s, entregados {delivered} "
+        f"| {'OK' if ok else 'FALLÓ'}"
+    )
+    await teams_bot._stt_client.aclose()
+    await teams_bot._webhook_client.aclose()
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba el bot intermedio de Teams con transportes HTTP en memoria:
+    plazo total por llamada a Tracky STT y entrega por webhook.
+    """
+    success = asyncio.run(check_deadline_and_webhook())
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
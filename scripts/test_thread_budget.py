@@ -0,0 +1,110 @@
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from app import resources  # noqa: E402
+from app.resources import ResourceManager  # noqa: E402
+
+# Máquina de referencia: 16 núcleos visibles por afinidad.
+AFFINITY_CPUS = 16
+
+
+def fake_cgroup(root: Path, files: dict) -> Path:
+    """Crea un directorio cgroup falso con los archivos indicados (ruta relativa -> contenido)."""
+    root.mkdir(parents=True)
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return root
+
+
+def check_budget_math(tmp: Path) -> bool:
+    """Núcleos efectivos = min(afinidad, cuota del cgroup, STT_CPU_LIMIT), repartidos entre procesos x workers."""
+    cases = [
+        # (nombre, archivos cgroup, kwargs, cuota, efectivos, intra-op, inter-op)
+        ("v2 sin límite", {"cpu.max": "max 100000\n"}, {"processes": 2, "slots": 2}, None, 16, 4, 1),
+        ("v2 cuota 4", {"cpu.max": "400000 100000\n"}, {"slots": 2}, 4.0, 4, 2, 1),
+        ("v2 cuota 1.5", {"cpu.max": "150000 100000\n"}, {"slots": 2}, 1.5, 1, 1, 1),
+        ("v1 cuota 6", {"cpu/cpu.cfs_quota_us": "600000\n", "cpu/cpu.cfs_period_us": "100000\n"},
+         {"slots": 3}, 6.0, 6, 2, 1),
+        ("v1 sin límite", {"cpu/cpu.cfs_quota_us": "-1\n", "cpu/cpu.cfs_period_us": "100000\n"},
+         {"slots": 4}, None, 16, 4, 1),
+        ("sin cgroup, STT_CPU_LIMIT 3", {}, {"slots": 1, "cpu_limit": 3.0}, None, 3, 3, 1),
+        ("inter-op acotado a intra-op", {"cpu.max": "800000 100000\n"}, {"slots": 4, "inter_op": 4}, 8.0, 8, 2, 2),
+        ("más workers que núcleos", {"cpu.max": "200000 100000\n"}, {"processes": 2, "slots": 4}, 2.0, 2, 1, 1),
+    ]
+    ok = True
+    for i, (name, files, kwargs, quota, effective, intra_op, inter_op) in enumerate(cases):
+        root = fake_cgroup(tmp / f"cgroup{i}", files)
+        budget = ResourceManager(cgroup_root=root, **kwargs).plan()
+        found = (budget.cgroup_quota, budget.effective_cpus, budget.intra_op, budget.inter_op)
+        expected = (quota, effective, intra_op, inter_op)
+        ok &= found == expected
+        print(
+            f"[TestThreadBudget] {name:<29} cuota {budget.cgroup_quota} -> {budget.effective_cpus} núcleos, "
+            f"{budget.intra_op} intra-op, {budget.inter_op} inter-op | {'OK' if found == expected else 'FALLÓ'}"
+        )
+    return ok
+
+
+def check_own_cgroup(tmp: Path) -> bool:
+    """La cuota sale del cgroup propio (/proc/self/cgroup) y es la menor de su jerarquía."""
+    cases = [
+        # (nombre, /proc/self/cgroup, archivos cgroup, cuota)
+        ("v2 anidado, límite en el padre", "0::/kubepods/pod1/ctr\n", {
+            "kubepods/cpu.max": "200000 100000\n",
+            "kubepods/pod1/cpu.max": "max 100000\n",
+            "kubepods/pod1/ctr/cpu.max": "400000 100000\n",
+        }, 2.0),
+        ("v2 límite solo en el propio", "0::/app.slice/stt.service\n", {
+            "app.slice/stt.service/cpu.max": "300000 100000\n",
+        }, 3.0),
+        ("v2 propio fuera del montaje", "0::/docker/abc\n", {"cpu.max": "250000 100000\n"}, 2.5),
+        ("v1 anidado", "4:cpu,cpuacct:/docker/abc\n0::/\n", {
+            "cpu/cpu.cfs_quota_us": "-1\n",
+            "cpu/cpu.cfs_period_us": "100000\n",
+            "cpu/docker/abc/cpu.cfs_quota_us": "150000\n",
+            "cpu/docker/abc/cpu.cfs_period_us": "100000\n",
+        }, 1.5),
+    ]
+    ok = True
+    for i, (name, proc, files, quota) in enumerate(cases):
+        root = fake_cgroup(tmp / f"own{i}", files)
+        proc_cgroup = tmp / f"own{i}.cgroup"
+        proc_cgroup.write_text(proc)
+        budget = ResourceManager(slots=1, cgroup_root=root, proc_cgroup=proc_cgroup).plan()
+        passed = budget.cgroup_quota == quota
+        ok &= passed
+        print(f"[TestThreadBudget] {name:<31} cuota {budget.cgroup_quota} | {'OK' if passed else 'FALLÓ'}")
+    return ok
+
+
+def check_disabled(tmp: Path) -> bool:
+    """Con STT_THREAD_BUDGET=off el reparto se calcula y reporta, pero no se aplica."""
+    root = fake_cgroup(tmp / "off", {"cpu.max": "400000 100000\n"})
+    manager = ResourceManager(slots=2, enabled=False, cgroup_root=root)
+    budget = manager.apply()
+    status = manager.status()
+    ok = budget.applied == {"disabled": True} and status["intra_op"] == 2 and status["applied"] == {"disabled": True}
+    print(f"[TestThreadBudget] Reparto desactivado: {status['applied']} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba el cálculo del reparto de hilos a partir de directorios cgroup
+    falsos (v1 y v2), la resolución del cgroup propio y su jerarquía, la
+    afinidad y STT_CPU_LIMIT.
+    """
+    resources._affinity_cpus = lambda: AFFINITY_CPUS
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        success = check_budget_math(tmp)
+        success &= check_own_cgroup(tmp)
+        success &= check_disabled(tmp)
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,111 @@
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.cache.transcript_cache import TranscriptCache  # noqa: E402
+from adapters.denoise.quality_gate import DenoiseGate  # noqa: E402
+from domain.entities import TranscriptResult  # noqa: E402
+
+DIGEST = "a" * 64
+
+
+def result(text: str = "hola", raw: dict = None) -> TranscriptResult:
+    return TranscriptResult(text, 0.9, "es", datetime.utcnow(), "whisper", "audio/ogg", raw or {})
+
+
+def check_keys() -> bool:
+    """La clave cambia con proveedor, MIME y política de limpieza; el idioma se normaliza por motor."""
+    base = TranscriptCache.key(DIGEST, "whisper", "medium", "es-MX", provider="whatsapp", mime_type="audio/ogg")
+    cases = {
+        "mismos parámetros": (TranscriptCache.key(DIGEST, "whisper", "medium", "es-MX", provider="whatsapp", mime_type="audio/ogg"), True),
+        "idioma equivalente": (TranscriptCache.key(DIGEST, "whisper", "medium", "es", provider="whatsapp", mime_type="audio/ogg"), True),
+        "otro proveedor": (TranscriptCache.key(DIGEST, "whisper", "medium", "es-MX", provider="teams", mime_type="audio/ogg"), False),
+        "otro MIME": (TranscriptCache.key(DIGEST, "whisper", "medium", "es-MX", provider="whatsapp", mime_type="audio/mp4"), False),
+        "otro tamaño": (TranscriptCache.key(DIGEST, "whisper", "small", "es-MX", provider="whatsapp", mime_type="audio/ogg"), False),
+    }
+
+    gate = DenoiseGate("whisper", overrides={"teams": "full"})
+    forced = TranscriptCache.key(DIGEST, "whisper", "medium", "es-MX", {"denoise": gate.policy("teams")}, "teams", "audio/ogg")
+    default = TranscriptCache.key(DIGEST, "whisper", "medium", "es-MX", {"denoise": DenoiseGate("whisper").policy("teams")}, "teams", "audio/ogg")
+    cases["política de limpieza"] = (forced, default == forced)
+
+    ok = True
+    for name, (key, same) in cases.items():
+        passed = (key == base) == same
+        ok &= passed
+        print(f"[TestTranscriptCache] Clave con {name}: {'igual' if key == base else 'distinta'} | {'OK' if passed else 'FALLÓ'}")
+    return ok
+
+
+def check_tiers(tmp: Path) -> bool:
+    """Un put se sirve desde memoria y, en otra instancia, desde disco; los errores no se guardan."""
+    cache = TranscriptCache(cache_dir=str(tmp / "tiers"))
+    cache.put("k", result())
+    cache.put("err", result("", {"error": "boom"}))
+    memory_hit = cache.get("k")
+    disk_hit = TranscriptCache(cache_dir=str(tmp / "tiers")).get("k")
+    stats = cache.stats()
+    ok = (
+        memory_hit.text == "hola" and disk_hit.text == "hola"
+        and cache.get("err") is None and stats["memory_hits"] == 1 and stats["stores"] == 1
+    )
+    print(f"[TestTranscriptCache] Memoria y disco: {stats} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_concurrent_puts(tmp: Path) -> bool:
+    """Varios put simultáneos de la misma clave no fallan ni dejan temporales."""
+    cache = TranscriptCache(cache_dir=str(tmp / "concurrent"))
+    errors = []
+
+    def writer(i: int):
+        try:
+            for _ in range(20):
+                cache.put("same", result(f"texto {i}"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    leftovers = list((tmp / "concurrent").glob("*.tmp"))
+    stored = TranscriptCache(cache_dir=str(tmp / "concurrent")).get("same")
+    ok = not errors and not leftovers and stored is not None and stored.text.startswith("texto")
+    print(f"[TestTranscriptCache] put concurrentes: {len(errors)} errores, {len(leftovers)} temporales | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_ttl(tmp: Path) -> bool:
+    """Una entrada en disco más vieja que el TTL se descarta."""
+    cache = TranscriptCache(cache_dir=str(tmp / "ttl"), ttl_seconds=60)
+    cache.put("old", result())
+    path = tmp / "ttl" / "old.json"
+    os.utime(path, (path.stat().st_atime - 120, path.stat().st_mtime - 120))
+    fresh = TranscriptCache(cache_dir=str(tmp / "ttl"), ttl_seconds=60)
+    ok = fresh.get("old") is None and not path.exists()
+    print(f"[TestTranscriptCache] Expiración por TTL | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba la clave de la caché de transcripciones y sus niveles de
+    memoria y disco, incluidas escrituras concurrentes y expiración.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        success = check_keys()
+        success &= check_tiers(tmp)
+        success &= check_concurrent_puts(tmp)
+        success &= check_ttl(tmp)
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,262 @@
+import io
+import json
+import os
+import sys
+import threading
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("AZURE_SPEECH_KEY", "test-key")
+os.environ.setdefault("AZURE_REGION", "test-region")
+
+from adapters.decoder.factory import DecoderFactory  # noqa: E402
+from adapters.denoise.noisereduce_adapter import NoiseReduceAdapter  # noqa: E402
+from adapters.denoise.quality_gate import DenoiseGate  # noqa: E402
+from adapters.stt.azure_adapter import AzureSTTAdapter  # noqa: E402
+from adapters.decoder import av_backend  # noqa: E402
+from adapters.stt.upload_encoder import encode_upload, encode_upload_parts, scaled_samples, stream_flac  # noqa: E402
+from adapters.vad.energy_vad import EnergyVAD  # noqa: E402
+from domain.entities import AudioMeta  # noqa: E402
+from domain.service import SttService  # noqa: E402
+
+SAMPLES_DIR = ROOT_DIR / "samples"
+OPUS_SAMPLE = SAMPLES_DIR / "wa.waptt.opus"
+WAV_SAMPLE = SAMPLES_DIR / "whatsapp.wav"
+
+
+class AzureStandIn(BaseHTTPRequestHandler):
+    """Servidor local con la forma de la API REST de Azure; guarda lo recibido."""
+
+    received = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        AzureStandIn.received.append((self.headers["Content-Type"], body))
+        payload = json.dumps({"RecognitionStatus": "Success", "DisplayText": "hola"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def decode(path: Path, denoise: str = "skip"):
+    """Decodifica una muestra y simula la decisión de la compuerta de ruido."""
+    buffer = DecoderFactory.get(provider="test", file_path=path).decode(path)
+    buffer.metadata = dict(buffer.metadata, pipeline={"denoise": denoise})
+    return buffer
+
+
+def check_encodings() -> bool:
+    """Cada codificación comprimida debe ser más chica que PCM y decodificarse con la misma duración."""
+    ok = True
+    buffer = decode(WAV_SAMPLE)
+    for encoding in ("wav", "flac", "ogg_opus"):
+        payload = encode_upload(buffer, encoding)
+        samples, sr = sf.read(io.BytesIO(payload.data), dtype="float32")
+        same_length = abs(len(samples) / sr - buffer.duration) < 0.05
+        smaller = encoding == "wav" or len(payload.data) < payload.pcm_bytes
+        ok &= same_length and smaller
+        print(
+            f"[TestUploadEncoding] {encoding:<9} {len(payload.data):>8} bytes "
+            f"({len(payload.data) / payload.pcm_bytes:.1%} de PCM) en {payload.encode_ms:.1f} ms "
+            f"| {'OK' if same_length and smaller else 'FALLÓ'}"
+        )
+    return ok
+
+
+def check_passthrough() -> bool:
+    """El Opus original sin modificar se envía tal cual; si se le quitó ruido, se recodifica."""
+    untouched = encode_upload(decode(OPUS_SAMPLE, "skip"), "ogg_opus")
+    denoised = encode_upload(decode(OPUS_SAMPLE, "full"), "ogg_opus")
+    ok = untouched.passthrough and untouched.data == OPUS_SAMPLE.read_bytes() and not denoised.passthrough
+    print(
+        f"[TestUploadEncoding] Passthrough Opus: {len(untouched.data)} bytes originales "
+        f"| recodificado tras denoise: {len(denoised.data)} bytes | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+def check_azure() -> bool:
+    """Sube un audio al servidor local de Azure y verifica Content-Type, cuerpo y raw['upload']."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AzureStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    adapter = AzureSTTAdapter()
+    adapter.endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    result = adapter.transcribe_buffer(decode(OPUS_SAMPLE), "es-MX")
+    server.shutdown()
+
+    content_type, body = AzureStandIn.received[-1]
+    upload = (result.raw or {}).get("upload", {})
+    ok = (
+        result.text == "hola"
+        and content_type.startswith("audio/ogg")
+        and upload.get("bytes") == len(body)
+        and upload.get("passthrough") is True
+    )
+    print(f"[TestUploadEncoding] Azure: {content_type} | upload={upload} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_service_passthrough() -> bool:
+    """
+    A través de SttService con el VAD activo: la compuerta omite la limpieza
+    del Opus de WhatsApp, el VAD encuentra un solo tramo y Azure recibe los
+    bytes originales del archivo.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AzureStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    adapter = AzureSTTAdapter()
+    adapter.endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    service = SttService(
+        DecoderFactory.get(provider="whatsapp", file_path=OPUS_SAMPLE),
+        NoiseReduceAdapter(),
+        adapter,
+        DenoiseGate("azure"),
+        segmenter=EnergyVAD.from_env("azure"),
+    )
+    result = service.run(OPUS_SAMPLE, AudioMeta(provider="whatsapp", content_type="audio/ogg", lang="es-MX"))
+    server.shutdown()
+
+    _, body = AzureStandIn.received[-1]
+    raw = result.raw or {}
+    ok = (
+        raw.get("pipeline", {}).get("denoise") == "skip"
+        and len(raw.get("segments", [])) == 1
+        and body == OPUS_SAMPLE.read_bytes()
+    )
+    print(
+        f"[TestUploadEncoding] SttService + VAD: ruta {raw.get('pipeline', {}).get('denoise')}, "
+        f"{len(raw.get('segments', []))} tramo(s), {len(body)} bytes enviados | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+def check_inline_parts() -> bool:
+    """Por encima del límite en línea el audio se divide en partes que caben, sin perder muestras."""
+    buffer = decode(OPUS_SAMPLE, "skip")
+    whole = encode_upload_parts(buffer, "ogg_opus", 10 * 1000 * 1000)
+    limit = len(encode_upload(buffer, "flac").data) // 3
+    parts = encode_upload_parts(buffer, "flac", limit)
+    frames = sum(sf.info(io.BytesIO(p.data)).frames for p in parts)
+    ok = (
+        len(whole) == 1 and whole[0].passthrough
+        and len(parts) >= 3
+        and all(len(p.data) <= limit and not p.passthrough for p in parts)
+        and frames == len(buffer.samples)
+    )
+    print(
+        f"[TestUploadEncoding] Límite en línea {limit} bytes: {len(parts)} partes "
+        f"{[len(p.data) for p in parts]} | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+def check_stream_flac() -> bool:
+    """El FLAC en streaming entrega bytes antes de terminar de codificar y el flujo unido decodifica igual."""
+    av = av_backend.load_av()
+    buffer = decode(WAV_SAMPLE)
+    report = {}
+    stream = stream_flac(buffer, 8192, report)
+    first = next(stream)
+    early = not report
+    data = first + b"".join(stream)
+
+    if av is None:
+        ok = early and data[:4] == b"fLaC" and report["bytes"] == len(data)
+        print(f"[TestUploadEncoding] FLAC en streaming (sin PyAV, no se decodifica) | {'OK' if ok else 'FALLÓ'}")
+        return ok
+
+    with av.open(io.BytesIO(data), format="flac") as container:
+        decoded = np.concatenate([frame.to_ndarray().reshape(-1) for frame in container.decode(audio=0)])
+    expected = scaled_samples(buffer)
+    ok = (
+        early
+        and report["bytes"] == len(data)
+        and report["streamed"]
+        and len(decoded) == len(expected)
+        and float(np.abs(decoded / 32768.0 - expected).max()) < 1e-3
+    )
+    print(
+        f"[TestUploadEncoding] FLAC en streaming: primera trama {len(first)} bytes, "
+        f"total {report['bytes']} bytes | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+def check_google() -> bool:
+    """Envía un audio FLAC a un servidor gRPC local con el servicio Speech de Google."""
+    try:
+        import grpc
+        from google.cloud import speech
+        from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
+        from adapters.stt.google_adapter import GoogleSTTAdapter
+    except ImportError as e:
+        print(f"[TestUploadEncoding] Google: omitido ({e})")
+        return True
+
+    received = []
+
+    def recognize(request, context):
+        received.append(request)
+        return speech.RecognizeResponse(
+            results=[speech.SpeechRecognitionResult(
+                alternatives=[speech.SpeechRecognitionAlternative(transcript="hola", confidence=0.9)]
+            )]
+        )
+
+    handler = grpc.method_handlers_generic_handler("google.cloud.speech.v1.Speech", {
+        "Recognize": grpc.unary_unary_rpc_method_handler(
+            recognize,
+            request_deserializer=speech.RecognizeRequest.deserialize,
+            response_serializer=speech.RecognizeResponse.serialize,
+        ),
+    })
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    adapter = GoogleSTTAdapter(client=speech.SpeechClient(transport=SpeechGrpcTransport(channel=channel)))
+    result = adapter.transcribe_buffer(decode(WAV_SAMPLE, "full"), "es-MX")
+    server.stop(0)
+
+    request = received[-1] if received else None
+    upload = (result.raw or {}).get("upload", {})
+    ok = (
+        request is not None
+        and result.text == "hola"
+        and request.config.encoding == speech.RecognitionConfig.AudioEncoding.FLAC
+        and len(request.audio.content) == upload.get("bytes")
+    )
+    print(f"[TestUploadEncoding] Google: upload={upload} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba la codificación de subida de los motores en la nube contra
+    servidores locales que imitan Azure (HTTP) y Google (gRPC).
+    """
+    success = check_encodings()
+    success &= check_passthrough()
+    success &= check_azure()
+    success &= check_service_passthrough()
+    success &= check_inline_parts()
+    success &= check_stream_flac()
+    success &= check_google()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
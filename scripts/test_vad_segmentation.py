@@ -0,0 +1,234 @@
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+os.environ.setdefault("AZURE_SPEECH_KEY", "test-key")
+os.environ.setdefault("AZURE_REGION", "test-region")
+os.environ["STT_AZURE_UPLOAD_ENCODING"] = "wav"
+
+from adapters.denoise.noisereduce_adapter import NoiseReduceAdapter  # noqa: E402
+from adapters.denoise.quality_gate import DenoiseGate  # noqa: E402
+from adapters.vad.energy_vad import EnergyVAD  # noqa: E402
+from adapters.stt.engine_registry import get_registry  # noqa: E402
+from app.pipeline import _segmenter, run_transcription  # noqa: E402
+from domain.entities import AudioBuffer, AudioMeta, TranscriptResult  # noqa: E402
+from domain.service import SttService  # noqa: E402
+
+SR = 16000
+
+
+def synth(layout: list, seed: int = 0) -> np.ndarray:
+    """Concatena tramos (segundos, con_voz): ruido fuerte como voz y piso de ruido muy bajo como silencio."""
+    rng = np.random.default_rng(seed)
+    parts = [
+        (0.5 if speech else 1e-4) * rng.standard_normal(int(seconds * SR))
+        for seconds, speech in layout
+    ]
+    return np.concatenate(parts).astype(np.float32)
+
+
+class FakeDecoder:
+    def __init__(self, samples: np.ndarray):
+        self.samples = samples
+
+    def decode(self, src: Path) -> AudioBuffer:
+        return AudioBuffer(samples=self.samples.copy(), sample_rate=SR, source_format="wav", source_path=src)
+
+
+class RecordingEngine:
+    """Motor de prueba que registra el desplazamiento y la duración de cada tramo."""
+
+    def __init__(self):
+        self.pieces = []
+
+    def transcribe_buffer(self, buffer, language: str) -> TranscriptResult:
+        self.pieces.append((buffer.metadata.get("offset"), buffer.duration))
+        return TranscriptResult("hola", 0.9, language, datetime.utcnow(), "fake", "wav", {})
+
+
+def check_split() -> bool:
+    """
+    Dos tramos con voz separados por silencio se detectan en su posición; con
+    un máximo de 3 s no caben juntos y se entregan por separado.
+    """
+    audio = AudioBuffer(samples=synth([(1, False), (2, True), (2, False), (2, True), (1, False)]), sample_rate=SR)
+    segments = EnergyVAD(max_segment_s=3.0).split(audio)
+    expected = [(1.0, 3.0), (5.0, 7.0)]
+    ok = len(segments) == 2 and all(
+        abs(s.start - a) <= 0.2 and abs(s.end - b) <= 0.2 for s, (a, b) in zip(segments, expected)
+    )
+    found = [(s.start, s.end) for s in segments]
+    print(f"[TestVad] Tramos detectados {found} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_max_segment() -> bool:
+    """
+    70 s de voz con pausas de 0.3 s (más breves que el silencio mínimo, así
+    que no separan tramos) se cortan en piezas que no superan el máximo.
+    """
+    audio = AudioBuffer(samples=synth([(1, False)] + [(1.7, True), (0.3, False)] * 35), sample_rate=SR)
+    segments = EnergyVAD(max_segment_s=30.0).split(audio)
+    longest = max(s.duration for s in segments)
+    ok = len(segments) >= 3 and longest <= 30.0 + 1e-6 and segments[-1].end >= 70.5
+    print(f"[TestVad] 70 s de voz continua -> {len(segments)} tramos, el mayor de {longest:.1f} s | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_offsets_after_trim() -> bool:
+    """
+    Con limpieza ligera se recortan 3 s de silencio inicial; los tramos del
+    resultado se reportan sobre el audio recibido, no sobre el recortado.
+    """
+    samples = synth([(3, False), (2, True), (2, False), (2, True), (1, False)])
+    engine = RecordingEngine()
+    service = SttService(
+        FakeDecoder(samples),
+        NoiseReduceAdapter(),
+        engine,
+        DenoiseGate("whisper", overrides={"test": "light"}),
+        segmenter=EnergyVAD(max_segment_s=3.0),
+    )
+    result = service.run(Path("prueba.wav"), AudioMeta(provider="test", content_type="audio/wav", lang="es"))
+
+    segments = [(s["start"], s["end"]) for s in result.raw["segments"]]
+    expected = [(3.0, 5.0), (7.0, 9.0)]
+    ok = (
+        result.raw["pipeline"]["denoise"] == "light"
+        and len(segments) == 2
+        and all(abs(a - x) <= 0.2 and abs(b - y) <= 0.2 for (a, b), (x, y) in zip(segments, expected))
+        and [offset for offset, _ in engine.pieces] == [start for start, _ in segments]
+    )
+    print(f"[TestVad] Tramos tras el recorte {segments} (esperados ~{expected}) | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+def check_default_engines() -> bool:
+    """
+    Todos los motores pasan por el VAD. Se corta en tramos para Whisper y
+    Azure (y con Azure como respaldo); Google recibe un solo tramo sin tope
+    salvo con STT_VAD=1.
+    """
+    cases = [
+        # (STT_VAD, motor, respaldo, duración máxima esperada)
+        ("", "whisper", None, 30.0), ("", "auto", None, 30.0), ("", "azure", None, 55.0),
+        ("", "google", None, math.inf), ("1", "google", None, 55.0),
+        ("", "google", "azure", 55.0), ("", "google", "whisper", 30.0),
+    ]
+    previous = os.environ.pop("STT_VAD", None)
+    ok = True
+    try:
+        for value, engine, backup, expected in cases:
+            if value:
+                os.environ["STT_VAD"] = value
+            else:
+                os.environ.pop("STT_VAD", None)
+            found = _segmenter(engine, backup).max_segment_s
+            ok &= found == expected
+            print(
+                f"[TestVad] STT_VAD='{value}' motor {engine:<7} respaldo {str(backup):<7} -> "
+                f"tramos de hasta {found} s | {'OK' if found == expected else 'FALLÓ'}"
+            )
+    finally:
+        os.environ.pop("STT_VAD", None)
+        if previous is not None:
+            os.environ["STT_VAD"] = previous
+    return ok
+
+
+class AzureStandIn(BaseHTTPRequestHandler):
+    """Servidor con la forma del REST corto de Azure: rechaza audio de más de 60 s, como el servicio real."""
+
+    durations = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        duration = sf.info(io.BytesIO(body)).duration
+        AzureStandIn.durations.append(duration)
+        if duration > 60:
+            status, payload = 400, {"error": "Audio demasiado largo"}
+        else:
+            status, payload = 200, {"RecognitionStatus": "Success", "DisplayText": "hola"}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def run_file(tmp: Path, samples: np.ndarray, engine: str) -> TranscriptResult:
+    path = tmp / f"{engine}-{len(samples)}.wav"
+    sf.write(str(path), samples, SR, subtype="PCM_16")
+    return run_transcription(path, "test", "audio/wav", "es-MX", engine)
+
+
+def check_azure_long(tmp: Path) -> bool:
+    """Un audio de 68 s por run_transcription con Azure llega en tramos de menos de 60 s, todos aceptados."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AzureStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    get_registry().get("azure").endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    samples = synth([(1, False)] + [(8, True), (1, False)] * 7 + [(4, True)])
+    result = run_file(tmp, samples, "azure")
+    server.shutdown()
+
+    durations = AzureStandIn.durations
+    ok = (
+        len(samples) / SR > 60
+        and "error" not in result.raw
+        and len(durations) >= 2
+        and max(durations) <= 55.0 + 1e-6
+    )
+    print(
+        f"[TestVad] Azure con {len(samples) / SR:.0f} s -> {len(durations)} llamadas, la mayor de "
+        f"{max(durations or [0]):.1f} s | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+def check_silence_skips_engines(tmp: Path) -> bool:
+    """El audio sin voz se descarta sin llamar a ningún motor, incluido Google (que no se corta)."""
+    calls = len(AzureStandIn.durations)
+    ok = True
+    for engine in ("azure", "google"):
+        result = run_file(tmp, np.zeros(SR * 70, dtype=np.float32), engine)
+        passed = result.text == "" and result.raw.get("segments") == [] and "error" not in result.raw
+        ok &= passed
+        print(f"[TestVad] 70 s de silencio con {engine} -> sin llamadas | {'OK' if passed else 'FALLÓ'}")
+    ok &= len(AzureStandIn.durations) == calls
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba la segmentación por voz: posición de los tramos, corte de tramos
+    largos, desplazamientos sobre el audio recibido tras el recorte de la
+    limpieza, los motores que se segmentan por defecto, un audio largo por
+    Azure y el descarte del silencio antes de llamar a los motores.
+    """
+    success = check_split()
+    success &= check_max_segment()
+    success &= check_offsets_after_trim()
+    success &= check_default_engines()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        success &= check_azure_long(Path(tmp_dir))
+        success &= check_silence_skips_engines(Path(tmp_dir))
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,109 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.decoder.wav_decoder import WavDecoder  # noqa: E402
+
+
+def tone(sample_rate: int, seconds: float = 1.0, peak: float = 0.5) -> np.ndarray:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return (peak * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def check_same_level(tmp: Path) -> bool:
+    """
+    El mismo tono llega a su nivel original por la ruta mapeada (PCM16 y
+    float32) y por bloques, y con la ganancia de metadata queda con pico 1.
+    """
+    cases = {
+        "PCM16 16 kHz mono (mapeado)": (tone(16000), 16000, "PCM_16", 0.5),
+        "float32 16 kHz mono (mapeado)": (tone(16000), 16000, "FLOAT", 0.5),
+        "float32 16 kHz pico 2 (mapeado)": (tone(16000, peak=2.0), 16000, "FLOAT", 2.0),
+        "PCM16 44.1 kHz estéreo (bloques)": (np.stack([tone(44100)] * 2, axis=1), 44100, "PCM_16", 0.5),
+    }
+    decoder = WavDecoder()
+    ok = True
+    for i, (name, (samples, sr, subtype, expected)) in enumerate(cases.items()):
+        path = tmp / f"caso{i}.wav"
+        sf.write(path, samples, sr, subtype=subtype)
+        buffer = decoder.decode(path)
+        peak = float(np.abs(buffer.samples).max())
+        scaled = peak * buffer.metadata["gain"]
+        passed = (
+            abs(peak - expected) < 2e-3 and abs(buffer.metadata["source_peak"] - expected) < 2e-3
+            and abs(scaled - 1.0) < 1e-3 and buffer.sample_rate == 16000 and abs(buffer.duration - 1.0) < 0.01
+        )
+        ok &= passed
+        print(f"[TestWavDecoder] {name:<34} pico {peak:.4f}, con ganancia {scaled:.4f} | {'OK' if passed else 'FALLÓ'}")
+    return ok
+
+
+def check_zero_copy(tmp: Path) -> bool:
+    """
+    Un float32 mono 16 kHz de grabadora (pico 0.5) se entrega como vista del
+    archivo, sin escalar, con la ganancia en metadata; solo el ya normalizado
+    evita la reescritura en to_wav_mono16k.
+    """
+    decoder = WavDecoder()
+    quiet = tmp / "grabadora.wav"
+    sf.write(quiet, tone(16000, peak=0.5), 16000, subtype="FLOAT")
+    buffer = decoder.decode(quiet)
+    view = (
+        buffer.metadata["zero_copy"] and isinstance(buffer.samples, np.memmap)
+        and abs(buffer.metadata["source_peak"] - 0.5) < 1e-6 and abs(buffer.metadata["gain"] - 2.0) < 1e-5
+    )
+    rewritten = decoder.to_wav_mono16k(quiet)
+    rewritten_peak = float(np.abs(sf.read(rewritten, dtype="float32")[0]).max())
+
+    full = tmp / "normalizado.wav"
+    sf.write(full, tone(16000, peak=1.0), 16000, subtype="FLOAT")
+    kept = decoder.decode(full).metadata["zero_copy"] and decoder.to_wav_mono16k(full) == full
+
+    ok = view and abs(rewritten_peak - 1.0) < 1e-3 and kept
+    print(
+        f"[TestWavDecoder] float32 pico 0.5 sin copia (ganancia {buffer.metadata['gain']:.2f}), "
+        f"normalizado sin reescritura | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+def check_truncated(tmp: Path) -> bool:
+    """
+    Un archivo cortado a mitad del bloque de datos (y en un byte impar) se
+    mapea hasta la última muestra completa, sin pasar del final del archivo.
+    """
+    decoder = WavDecoder()
+    ok = True
+    for subtype, itemsize in (("PCM_16", 2), ("FLOAT", 4)):
+        path = tmp / f"truncado_{subtype}.wav"
+        sf.write(path, tone(16000), 16000, subtype=subtype)
+        data = path.read_bytes()
+        path.write_bytes(data[:len(data) - 16000 * itemsize // 2 - 1])
+        buffer = decoder.decode(path)
+        expected = (16000 * itemsize // 2 - 1) // itemsize
+        passed = buffer.metadata["zero_copy"] == (subtype == "FLOAT") and len(buffer.samples) == expected
+        ok &= passed
+        print(f"[TestWavDecoder] {subtype} truncado -> {len(buffer.samples)} muestras | {'OK' if passed else 'FALLÓ'}")
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba que WavDecoder entregue el audio a su nivel original en todas sus
+    rutas (mapeo en memoria de PCM16 y float32, lectura por bloques) con la
+    ganancia de normalización en metadata, el acceso sin copia para float32
+    y el mapeo acotado al bloque de datos de archivos truncados.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        success = check_same_level(tmp)
+        success &= check_zero_copy(tmp)
+        success &= check_truncated(tmp)
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,130 @@
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+from adapters.stt.whisper_profiles import (  # noqa: E402
+    PROFILES_BY_NAME,
+    LatencyBudgetTranscriber,
+    ProfileSelector,
+    RtfTracker,
+)
+from domain.entities import AudioBuffer, TranscriptResult  # noqa: E402
+
+
+class FakeAdapter:
+    """Adaptador Whisper de prueba que registra el perfil con el que se le llama."""
+
+    def __init__(self, model_size: str, calls: list):
+        self.model_size = model_size
+        self.calls = calls
+
+    def transcribe_buffer(self, buffer, language, profile=None) -> TranscriptResult:
+        self.calls.append((self.model_size, profile.name, buffer.duration))
+        return TranscriptResult("hola", 0.9, language, datetime.utcnow(), "whisper", "wav", {})
+
+    def transcribe_batch(self, buffers, language, profile=None) -> list:
+        return [self.transcribe_buffer(buffer, language, profile) for buffer in buffers]
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.calls = []
+
+    @contextmanager
+    def lease(self, engine: str, model_size: str):
+        yield FakeAdapter(model_size, self.calls)
+
+
+def seconds(duration: float) -> AudioBuffer:
+    return AudioBuffer(samples=np.zeros(int(16000 * duration), dtype=np.float32), sample_rate=16000)
+
+
+def check_selection_with_priors() -> bool:
+    """Sin historial se usan los RTF a priori: el perfil más preciso que cabe, o el más rápido si ninguno cabe."""
+    selector = ProfileSelector(RtfTracker(), ["small", "medium"])
+    cases = [
+        (10.0, 20000, "medium-beam"),
+        (10.0, 6000, "small-beam"),
+        (10.0, 100, "small-greedy"),
+        (0.2, 600, "small-beam"),
+    ]
+    ok = True
+    for duration, budget, expected in cases:
+        profile, predicted = selector.select(duration, budget)
+        ok &= profile.name == expected
+        print(
+            f"[TestWhisperProfiles] {duration:>4} s, presupuesto {budget:>5} ms -> {profile.name:<13} "
+            f"(estimado {predicted:.0f} ms) | {'OK' if profile.name == expected else 'FALLÓ'}"
+        )
+    return ok
+
+
+def check_learned_rtf() -> bool:
+    """
+    El historial medido sustituye al valor a priori, por motor: si medium-beam
+    resulta rápido en whisper, cabe en el presupuesto; en whisper-int8 no cambia nada.
+    """
+    tracker = RtfTracker()
+    selector = ProfileSelector(tracker, ["small", "medium"])
+    medium_beam = PROFILES_BY_NAME["medium-beam"]
+    for _ in range(3):
+        tracker.record(medium_beam, elapsed_s=4.0, duration_s=10.0)
+
+    learned, _ = selector.select(10.0, 6000)
+    other_engine, _ = selector.select(10.0, 6000, engine="whisper-int8")
+    forced, _ = selector.select(10.0, 20000, model_size="small")
+    ok = (
+        abs(tracker.rtf(medium_beam) - 0.4) < 1e-9
+        and learned.name == "medium-beam"
+        and other_engine.name == "small-beam"
+        and forced.name == "small-beam"
+        and tracker.snapshot()["whisper:medium-beam"]["samples"] == 3
+    )
+    print(
+        f"[TestWhisperProfiles] RTF aprendido {tracker.rtf(medium_beam):.2f} -> whisper {learned.name}, "
+        f"whisper-int8 {other_engine.name}, solo small {forced.name} | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+def check_transcriber_report() -> bool:
+    """El transcriptor toma el modelo del perfil elegido y lo reporta en raw['profile']; el lote usa la duración total."""
+    registry = FakeRegistry()
+    selector = ProfileSelector(RtfTracker(), ["small", "medium"])
+    transcriber = LatencyBudgetTranscriber(registry, 6000, selector=selector)
+
+    single = transcriber.transcribe_buffer(seconds(10.0), "es")
+    batch = transcriber.transcribe_batch([seconds(2.0), seconds(2.0)], "es")
+
+    report = single.raw["profile"]
+    ok = (
+        registry.calls[0] == ("small", "small-beam", 10.0)
+        and report["name"] == "small-beam"
+        and report["budget_ms"] == 6000
+        and report["predicted_ms"] == 5000.0
+        and [r.raw["profile"]["name"] for r in batch] == ["medium-beam", "medium-beam"]
+        and [call[0] for call in registry.calls[1:]] == ["medium", "medium"]
+    )
+    print(
+        f"[TestWhisperProfiles] Audio de 10 s -> {report['name']}, lote de 4 s -> "
+        f"{batch[0].raw['profile']['name']} | {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+if __name__ == "__main__":
+    """
+    Prueba la elección de perfiles Whisper por presupuesto de latencia:
+    RTF a priori, historial medido por motor y reporte del perfil elegido.
+    """
+    success = check_selection_with_priors()
+    success &= check_learned_rtf()
+    success &= check_transcriber_report()
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)
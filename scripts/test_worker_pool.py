@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sys
+import threading
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+# Sin motores configurados el pool arranca sin cargar modelos.
+os.environ["STT_ENGINES"] = ""
+
+from app.worker_pool import PoolSaturatedError, TranscriptionPool  # noqa: E402
+
+
+def blocking_task(gate: threading.Event, value: int) -> int:
+    gate.wait(5)
+    return value
+
+
+async def check_admission() -> bool:
+    """Con 1 worker y cola 1, la tercera tarea simultánea se rechaza y la segunda reporta espera."""
+    pool = TranscriptionPool(kind="thread", max_workers=1, max_queue=1, retry_after=7)
+    pool.start()
+    gate = threading.Event()
+
+    first = asyncio.ensure_future(pool.submit(blocking_task, gate, 1))
+    second = asyncio.ensure_future(pool.submit(blocking_task, gate, 2))
+    await asyncio.sleep(0.05)
+
+    try:
+        await pool.submit(blocking_task, gate, 3)
+        rejected = None
+    except PoolSaturatedError as e:
+        rejected = e.retry_after
+
+    await asyncio.sleep(0.1)
+    gate.set()
+    (r1, s1), (r2, s2) = await first, await second
+    pool.shutdown()
+
+    ok = rejected == 7 and (r1, r2) == (1, 2) and s1["depth"] == 0 and s2["depth"] == 1 and s2["wait_ms"] >= 100
+    print(
+        f"[TestWorkerPool] Admisión: rechazo con Retry-After={rejected} | esperas {s1['wait_ms']} / {s2['wait_ms']} ms "
+        f"| {'OK' if ok else 'FALLÓ'}"
+    )
+    return ok
+
+
+async def check_shutdown_cancels_queued() -> bool:
+    """Al detener el pool, las tareas en cola se cancelan sin esperar a que corran."""
+    pool = TranscriptionPool(kind="thread", max_workers=1, max_queue=2)
+    pool.start()
+    gate = threading.Event()
+
+    running = asyncio.ensure_future(pool.submit(blocking_task, gate, 1))
+    queued = asyncio.ensure_future(pool.submit(blocking_task, gate, 2))
+    await asyncio.sleep(0.05)
+    pool.shutdown()
+    gate.set()
+
+    results = await asyncio.gather(running, queued, return_exceptions=True)
+    ok = results[0][0] == 1 and isinstance(results[1], asyncio.CancelledError) and pool.depth == 0
+    print(f"[TestWorkerPool] Cancelación al detener: {[type(r).__name__ for r in results]} | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+async def check_not_started() -> bool:
+    pool = TranscriptionPool(kind="thread")
+    try:
+        await pool.submit(blocking_task, threading.Event(), 1)
+        ok = False
+    except RuntimeError:
+        ok = True
+    print(f"[TestWorkerPool] Pool sin iniciar rechaza tareas | {'OK' if ok else 'FALLÓ'}")
+    return ok
+
+
+async def main() -> bool:
+    success = await check_admission()
+    success &= await check_shutdown_cancels_queued()
+    success &= await check_not_started()
+    return success
+
+
+if __name__ == "__main__":
+    """
+    Prueba el control de admisión del pool de trabajo, las métricas de
+    cola y la cancelación de tareas pendientes al detenerlo.
+    """
+    success = asyncio.run(main())
+    print("\n[Resultado]", "OK" if success else "FALLÓ")
+    sys.exit(0 if success else 1)